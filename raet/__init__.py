@@ -9,7 +9,9 @@ __author__ = "Samuel M. Smith"
 __license__ =  "Apache2"
 
 
-__all__ = ['raeting', 'nacling', 'keeping', 'lotting', 'stacking', 'road', 'lane']
+__all__ = ['raeting', 'nacling', 'keeping', 'lotting', 'batching',
+           'scheduling', 'coding', 'executing', 'stacking', 'road', 'lane',
+           'asyncing', 'consoling', 'metering']
 
 import  importlib
 for m in __all__:
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+'''
+asyncing.py raet protocol asyncio event loop driver
+
+Drives a RoadStack or LaneStack from an asyncio event loop instead of a
+polling loop that calls .serviceAll. The stack server socket is handed to a
+datagram transport so received datagrams go onto the stack .rxes deque as
+they arrive. The stack .txes are sent by the stack itself so its transmit
+error handling applies, and any left blocked are sent once the socket is
+writable again.
+Transaction and keep alive processing runs on a loop timer set to the
+earliest stack deadline so an idle stack does not wake up.
+
+Requires asyncio or its python 2 backport trollius unless given a loop that
+provides the event loop methods the driver uses.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+from collections import deque
+
+try:
+    import asyncio
+except ImportError:
+    try:
+        import trollius as asyncio
+    except ImportError:
+        asyncio = None
+
+from . import raeting
+
+from .consoling import getConsole
+console = getConsole()
+
+if asyncio is not None:
+    DatagramProtocol = asyncio.DatagramProtocol
+else:
+    DatagramProtocol = object
+
+class StackProtocol(DatagramProtocol):
+    '''
+    Datagram protocol that puts received datagrams on the .rxes deque of the
+    stack of its driver and wakes the driver
+    '''
+    def __init__(self, driver):
+        '''
+        Setup StackProtocol instance
+        '''
+        self.driver = driver
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        stack = self.driver.stack
+        # triple = ( packet, source address, destination address)
+        stack.rxes.append((data, addr, stack.server.ha))
+        stack.rxCounter.inc()
+        self.driver.wake()
+
+    def error_received(self, exc):
+        console.terse("{0} transport error = {1}\n".format(self.driver.stack.name, exc))
+        self.driver.stack.incStat('transport_error')
+
+    def connection_lost(self, exc):
+        self.transport = None
+
+class Driver(object):
+    '''
+    Runs stack on asyncio event loop
+
+    The driver keeps the stack store stamp in step with the loop clock
+    unless clock is False in which case the stamp is left to whatever owns
+    the store.
+    '''
+    Period = 1.0 # max seconds between services when no deadline is sooner
+
+    def __init__(self, stack, loop=None, period=None, clock=True):
+        '''
+        Setup Driver instance
+
+        stack is RoadStack or LaneStack with open server
+        loop is event loop, default is the current asyncio event loop
+        period is max seconds between services
+        clock is True to drive stack store stamp from loop time
+        '''
+        if asyncio is None and loop is None:
+            emsg = "Driver requires asyncio or trollius or a loop."
+            raise raeting.StackError(emsg)
+        if not stack.server:
+            emsg = "Driver requires stack with open server."
+            raise raeting.StackError(emsg)
+
+        self.stack = stack
+        self.loop = loop if loop is not None else asyncio.get_event_loop()
+        self.period = period if period is not None else self.Period
+        self.clock = clock
+        self.offset = self.loop.time() - (stack.store.stamp or 0.0)
+        self.protocol = StackProtocol(self)
+        self.transport = None
+        self.handle = None # pending timer handle of next service
+        self.due = None # loop time of pending service
+        self.writing = False # True while waiting on writable server socket
+        self.receivers = deque() # futures waiting on .receive
+        self.senders = [] # futures waiting on .transmit
+
+    def start(self):
+        '''
+        Hands stack server socket to a datagram transport and starts service
+        Returns future done once the transport is connected
+        '''
+        channel = getattr(self.stack, 'channel', None)
+        if channel: # forwarded datagrams from other shards of road
+            self.loop.add_reader(channel.server.ss.fileno(), self.wake)
+        future = self.loop.create_task(self.loop.create_datagram_endpoint(
+                                            lambda: self.protocol,
+                                            sock=self.stack.server.ss))
+        future.add_done_callback(self._started)
+        return future
+
+    def _started(self, future):
+        '''
+        Done callback of endpoint creation
+        '''
+        if future.cancelled() or future.exception() is not None:
+            return
+        self.transport, protocol = future.result()
+        self.wake()
+
+    def wake(self):
+        '''
+        Schedule service as soon as possible
+        '''
+        self.reschedule(0.0)
+
+    def reschedule(self, delay):
+        '''
+        Schedule service in delay seconds unless one is already due sooner
+        '''
+        due = self.loop.time() + delay
+        if self.handle is not None:
+            if self.due <= due:
+                return
+            self.handle.cancel()
+        self.due = due
+        self.handle = self.loop.call_later(delay, self.service)
+
+    def service(self):
+        '''
+        Service stack once then reschedule at next deadline
+        '''
+        self.handle = None
+        self.due = None
+        stack = self.stack
+        if self.clock:
+            stack.store.changeStamp(self.loop.time() - self.offset)
+
+        if getattr(stack, 'channel', None):
+            ha = stack.server.ha
+            stack.rxes.extend([(raw, sa, ha) for raw, sa in stack.channel.receive()])
+        stack.serviceRxes()
+        stack.process()
+        if hasattr(stack, 'manage'):
+            stack.manage()
+        stack.serviceTxMsgs()
+        self.flush()
+        self.deliver()
+        self.reschedule(self.delay())
+
+    def flush(self):
+        '''
+        Send stack .txes with the stack .serviceTxes so send errors are handled
+        by the stack. If any are left blocked wait for the socket to be writable
+        '''
+        if self.transport is None:
+            return
+        stack = self.stack
+        stack.serviceTxes()
+        if stack.txes:
+            if not self.writing:
+                self.writing = True
+                self.loop.add_writer(stack.server.ss.fileno(), self.writable)
+            return
+
+        senders, self.senders = self.senders, []
+        for future in senders:
+            if not future.done():
+                future.set_result(None)
+
+    def writable(self):
+        '''
+        Writer callback once blocked server socket is writable
+        '''
+        self.loop.remove_writer(self.stack.server.ss.fileno())
+        self.writing = False
+        self.wake()
+
+    def deliver(self):
+        '''
+        Resolve receive futures with received messages in order
+        '''
+        rxMsgs = self.stack.rxMsgs
+        while rxMsgs and self.receivers:
+            future = self.receivers.popleft()
+            if not future.done():
+                future.set_result(rxMsgs.popleft())
+
+    def delay(self):
+        '''
+        Returns seconds until the earliest stack deadline capped at .period
+        '''
+        stack = self.stack
+        if stack.txMsgs or stack.rxes:
+            return 0.0
+        delay = self.period
+        deadline = stack.nextDeadline()
+        if deadline is not None and stack.store.stamp is not None:
+            delay = min(delay, max(0.0, deadline - stack.store.stamp))
+        return delay
+
+    def future(self):
+        '''
+        Returns new future of the loop
+        '''
+        create = getattr(self.loop, 'create_future', None)
+        if create is not None:
+            return create()
+        return asyncio.Future(loop=self.loop)
+
+    def transmit(self, msg, duid=None):
+        '''
+        Queue msg to remote at duid on stack
+        Returns future done once its packets are sent
+        '''
+        future = self.future()
+        self.stack.transmit(msg, duid)
+        self.senders.append(future)
+        self.wake()
+        return future
+
+    def receive(self):
+        '''
+        Returns future resolved with next message received by stack
+        '''
+        future = self.future()
+        self.receivers.append(future)
+        self.deliver()
+        return future
+
+    def close(self):
+        '''
+        Stop service and close transport which closes stack server socket
+        '''
+        if self.handle is not None:
+            self.handle.cancel()
+            self.handle = None
+        channel = getattr(self.stack, 'channel', None)
+        if channel:
+            self.loop.remove_reader(channel.server.ss.fileno())
+        if self.writing:
+            self.loop.remove_writer(self.stack.server.ss.fileno())
+            self.writing = False
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+        for future in self.receivers:
+            future.cancel()
+        self.receivers.clear()
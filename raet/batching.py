@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+'''
+batching.py raet protocol batched datagram socket io
+
+Uses the linux recvmmsg and sendmmsg system calls via ctypes when available
+so that many datagrams are received or sent with one system call.
+Falls back to one receive or send per datagram otherwise.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import sys
+import os
+import socket
+import errno
+import struct
+import ctypes
+import ctypes.util
+
+from .consoling import getConsole
+console = getConsole()
+
+NAME_SIZE = 128 # sizeof(struct sockaddr_storage)
+MSG_DONTWAIT = getattr(socket, 'MSG_DONTWAIT', 0x40)
+FAMILY_PACKER = struct.Struct('=H') # sa_family_t in host byte order
+PORT_PACKER = struct.Struct('!H') # in_port_t in network byte order
+
+class Iovec(ctypes.Structure):
+    '''
+    struct iovec
+    '''
+    _fields_ = [('iov_base', ctypes.c_void_p),
+                ('iov_len', ctypes.c_size_t)]
+
+class Msghdr(ctypes.Structure):
+    '''
+    struct msghdr
+    '''
+    _fields_ = [('msg_name', ctypes.c_void_p),
+                ('msg_namelen', ctypes.c_uint32),
+                ('msg_iov', ctypes.POINTER(Iovec)),
+                ('msg_iovlen', ctypes.c_size_t),
+                ('msg_control', ctypes.c_void_p),
+                ('msg_controllen', ctypes.c_size_t),
+                ('msg_flags', ctypes.c_int)]
+
+class Mmsghdr(ctypes.Structure):
+    '''
+    struct mmsghdr
+    '''
+    _fields_ = [('msg_hdr', Msghdr),
+                ('msg_len', ctypes.c_uint)]
+
+def _loadLibc(name, argtypes):
+    '''
+    Returns ctypes function name from libc if platform supports it else None
+    '''
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        func = getattr(libc, name)
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = argtypes
+    func.restype = ctypes.c_int
+    return func
+
+recvmmsg = _loadLibc('recvmmsg', [ctypes.c_int, ctypes.POINTER(Mmsghdr),
+                                  ctypes.c_uint, ctypes.c_int, ctypes.c_void_p])
+sendmmsg = _loadLibc('sendmmsg', [ctypes.c_int, ctypes.POINTER(Mmsghdr),
+                                  ctypes.c_uint, ctypes.c_int])
+
+def decodeAddress(name):
+    '''
+    Returns socket address decoded from raw sockaddr string name in the same
+    form as returned by socket.recvfrom for the address family
+    '''
+    if len(name) < FAMILY_PACKER.size:
+        return None
+    family, = FAMILY_PACKER.unpack_from(name)
+    if family == socket.AF_INET:
+        port, = PORT_PACKER.unpack_from(name, 2)
+        return (socket.inet_ntoa(name[4:8]), port)
+    if family == socket.AF_INET6:
+        port, = PORT_PACKER.unpack_from(name, 2)
+        flowinfo, = struct.unpack_from('!I', name, 4)
+        scopeid, = struct.unpack_from('=I', name, 24)
+        return (socket.inet_ntop(socket.AF_INET6, name[8:24]), port,
+                flowinfo, scopeid)
+    if family == socket.AF_UNIX:
+        path = name[2:]
+        if not path.startswith('\x00'): # not linux abstract namespace
+            path = path.split('\x00', 1)[0]
+        return path
+    return None
+
+def encodeAddress(address):
+    '''
+    Returns raw sockaddr string encoded from socket address in the same form
+    as accepted by socket.sendto. (host, port) for AF_INET or path for AF_UNIX
+    Returns None if address cannot be encoded without name resolution
+    '''
+    if isinstance(address, basestring):
+        return FAMILY_PACKER.pack(socket.AF_UNIX) + address
+    try:
+        host, port = address
+        return (FAMILY_PACKER.pack(socket.AF_INET) +
+                PORT_PACKER.pack(port) +
+                socket.inet_aton(host) +
+                '\x00' * 8)
+    except (ValueError, TypeError, socket.error, struct.error):
+        return None
+
+class Receiver(object):
+    '''
+    Batched datagram receiver for non blocking server socket such as
+    ioflo.base.aiding.SocketUdpNb or SocketUxdNb
+    Receives up to .count datagrams per recvmmsg system call into a pool of
+    preallocated buffers of .bufsize each.
+    When recvmmsg is not available falls back to server.receive per datagram
+    '''
+    Count = 64 # default max datagrams per batch
+    Cache = 1024 # max number of decoded source addresses to cache
+
+    def __init__(self, server, count=None, bufsize=None):
+        '''
+        Setup Receiver instance
+
+        server is server object with .ss socket and .bs buffer size
+        count is max datagrams to receive per batch
+        bufsize is max size of one datagram defaults to server.bs
+        '''
+        self.server = server
+        self.count = count if count is not None else self.Count
+        self.bufsize = bufsize if bufsize is not None else server.bs
+        self.batched = recvmmsg is not None
+        self.addresses = dict() # decoded source addresses keyed by raw name
+        if self.batched:
+            self.bufs = [ctypes.create_string_buffer(self.bufsize)
+                                for i in range(self.count)]
+            self.names = [ctypes.create_string_buffer(NAME_SIZE)
+                                for i in range(self.count)]
+            self.iovs = (Iovec * self.count)()
+            self.msgs = (Mmsghdr * self.count)()
+            for i in range(self.count):
+                self.iovs[i].iov_base = ctypes.addressof(self.bufs[i])
+                self.iovs[i].iov_len = self.bufsize
+                hdr = self.msgs[i].msg_hdr
+                hdr.msg_name = ctypes.addressof(self.names[i])
+                hdr.msg_namelen = NAME_SIZE
+                hdr.msg_iov = ctypes.pointer(self.iovs[i])
+                hdr.msg_iovlen = 1
+
+    def receive(self):
+        '''
+        Perform non blocking batched receive on server socket
+        Returns list of duples (data, sa) where sa is source address
+        Returns empty list if no data
+        '''
+        if not self.batched:
+            received = []
+            for i in range(self.count):
+                rx, ra = self.server.receive()  # if no data the duple is ('',None)
+                if not rx:
+                    break
+                received.append((rx, ra))
+            return received
+
+        count = recvmmsg(self.server.ss.fileno(), self.msgs, self.count,
+                         MSG_DONTWAIT, None)
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            emsg = "socket.error = {0}: receiving at {1}\n".format(
+                    os.strerror(err), self.server.ha)
+            console.terse(emsg)
+            raise socket.error(err, os.strerror(err))
+
+        received = []
+        addresses = self.addresses
+        for i in range(count):
+            msg = self.msgs[i]
+            hdr = msg.msg_hdr
+            name = ctypes.string_at(hdr.msg_name, hdr.msg_namelen)
+            hdr.msg_namelen = NAME_SIZE # reset for reuse
+            sa = addresses.get(name)
+            if sa is None:
+                if len(addresses) >= self.Cache:
+                    addresses.clear()
+                sa = addresses[name] = decodeAddress(name)
+            received.append((ctypes.string_at(self.iovs[i].iov_base,
+                                              min(msg.msg_len, self.bufsize)),
+                             sa))
+        return received
+
+class Transmitter(object):
+    '''
+    Batched datagram transmitter for non blocking server socket such as
+    ioflo.base.aiding.SocketUdpNb or SocketUxdNb
+    Sends up to .count datagrams per sendmmsg system call.
+    When sendmmsg is not available falls back to server.send per datagram
+    '''
+    Count = 64 # default max datagrams per batch
+    Cache = 1024 # max number of encoded destination addresses to cache
+
+    def __init__(self, server, count=None):
+        '''
+        Setup Transmitter instance
+
+        server is server object with .ss socket
+        count is max datagrams to send per batch
+        '''
+        self.server = server
+        self.count = count if count is not None else self.Count
+        self.batched = sendmmsg is not None
+        self.addresses = dict() # encoded (name buffer, size) keyed by address
+        if self.batched:
+            self.iovs = (Iovec * self.count)()
+            self.msgs = (Mmsghdr * self.count)()
+            for i in range(self.count):
+                hdr = self.msgs[i].msg_hdr
+                hdr.msg_iov = ctypes.pointer(self.iovs[i])
+                hdr.msg_iovlen = 1
+
+    def send(self, txes):
+        '''
+        Perform non blocking batched send on server socket of up to .count
+        duples (data, da) from sequence txes where da is destination address
+        Returns number of leading duples sent.
+        Stops at the first duple that fails or cannot be batched so the caller
+        may handle that one individually
+        Without sendmmsg the duple it stops at has already failed a send so
+        the caller should drop it rather than resend it
+        '''
+        if not self.batched:
+            sent = 0
+            for tx, ta in txes[:self.count]:
+                try:
+                    self.server.send(tx, ta)
+                except socket.error:
+                    break
+                sent += 1
+            return sent
+
+        addresses = self.addresses
+        if len(addresses) + self.count > self.Cache: # prune before any header points into it
+            addresses.clear()
+        datas = [] # keep references to data while sending
+        names = [] # keep references to name buffers while sending
+        count = 0
+        for tx, ta in txes[:self.count]:
+            name = addresses.get(ta)
+            if name is None:
+                raw = encodeAddress(ta)
+                if raw is None:
+                    break
+                name = addresses[ta] = (ctypes.create_string_buffer(raw, len(raw)),
+                                        len(raw))
+            names.append(name)
+            data = ctypes.c_char_p(tx)
+            datas.append(data)
+            self.iovs[count].iov_base = ctypes.cast(data, ctypes.c_void_p).value
+            self.iovs[count].iov_len = len(tx)
+            hdr = self.msgs[count].msg_hdr
+            hdr.msg_name = ctypes.addressof(name[0])
+            hdr.msg_namelen = name[1]
+            count += 1
+
+        if not count:
+            return 0
+
+        sent = sendmmsg(self.server.ss.fileno(), self.msgs, count, MSG_DONTWAIT)
+        return sent if sent > 0 else 0
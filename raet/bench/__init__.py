@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+'''
+raet.bench package
+modules associated with benchmarking road and lane stacks
+
+To run all the scenarios and print json results:
+
+python -m raet.bench
+
+To run the packet codec microbenchmarks and print a ns per op table:
+
+python -m raet.bench.packing
+'''
+
+__all__ = ['benching', 'roading', 'laning', 'running', 'packing']
+
+import  importlib
+for m in __all__:
+    importlib.import_module(".{0}".format(m), package='raet.bench')
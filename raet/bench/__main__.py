@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+'''
+Runs raet benchmark CLI with python -m raet.bench
+'''
+from raet.bench import running
+
+running.main()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+'''
+benching.py raet benchmark harness
+
+Recorder of message counts, latencies, and cpu time of one scenario run and
+helpers to service in process stacks against the real clock.
+CPU time is for the whole process so covers both ends of the scenario.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import os
+import time
+import tempfile
+import shutil
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+from ioflo.base import storing
+
+from ..consoling import getConsole
+console = getConsole()
+
+def cpuTime():
+    '''
+    Returns user plus system cpu seconds used by this process
+    '''
+    times = os.times()
+    return times[0] + times[1]
+
+def percentile(values, fraction):
+    '''
+    Returns value at fraction, 0.0 to 1.0, of sorted values or None if empty
+    Uses nearest rank
+    '''
+    if not values:
+        return None
+    values = sorted(values)
+    return values[int(round(fraction * (len(values) - 1)))]
+
+class Recorder(object):
+    '''
+    Records one run of a scenario
+    '''
+    def __init__(self, name, **params):
+        '''
+        Setup Recorder instance
+
+        name is scenario name
+        params are scenario parameters reported with the results
+        '''
+        self.name = name
+        self.params = odict(sorted(params.items()))
+        self.latencies = [] # seconds
+        self.count = 0 # units of work such as messages or joins
+        self.size = 0 # payload bytes
+        self.wall = None
+        self.cpu = None
+
+    def start(self):
+        '''
+        Start wall clock and cpu timers
+        '''
+        self.wall = time.time()
+        self.cpu = cpuTime()
+
+    def stop(self):
+        '''
+        Stop wall clock and cpu timers
+        '''
+        self.wall = time.time() - self.wall
+        self.cpu = cpuTime() - self.cpu
+
+    def mark(self, latency, size=0):
+        '''
+        Record one unit of work that took latency seconds with payload size
+        '''
+        self.latencies.append(latency)
+        self.count += 1
+        self.size += size
+
+    def result(self):
+        '''
+        Returns odict of results with rates per second, latencies in
+        milliseconds, and cpu per unit of work in microseconds
+        '''
+        result = odict()
+        result['scenario'] = self.name
+        result['params'] = self.params
+        result['count'] = self.count
+        result['seconds'] = self.wall
+        result['rate'] = self.count / self.wall if self.wall else None
+        result['bandwidth'] = self.size / self.wall if self.wall else None
+        for key, fraction in (('p50', 0.5), ('p99', 0.99)):
+            value = percentile(self.latencies, fraction)
+            result[key] = value * 1000.0 if value is not None else None
+        result['cpu'] = self.cpu * 1e6 / self.count if self.count else None
+        return result
+
+class Clock(object):
+    '''
+    Store whose stamp follows the real clock so stack timers run in real time
+    '''
+    def __init__(self):
+        '''
+        Setup Clock instance
+        '''
+        self.base = time.time()
+        self.store = storing.Store(stamp=0.0)
+
+    def update(self):
+        '''
+        Update store stamp to real elapsed time
+        '''
+        self.store.changeStamp(time.time() - self.base)
+
+def service(stacks, clock, done, timeout=10.0, manage=False):
+    '''
+    Service stacks as fast as possible until done() or timeout seconds
+    If manage then also manage stacks that have .manage
+    Returns True if done
+    '''
+    end = time.time() + timeout
+    while True:
+        clock.update()
+        for stack in stacks:
+            stack.serviceAllRx()
+            if manage and hasattr(stack, 'manage'):
+                stack.manage()
+            stack.serviceAllTx()
+        if done():
+            return True
+        if time.time() > end:
+            console.terse("Benchmark service timed out\n")
+            return False
+
+class Sandbox(object):
+    '''
+    Temporary directory for stack keeps and sockets that is removed on close
+    '''
+    def __init__(self):
+        '''
+        Setup Sandbox instance
+        '''
+        self.dirpath = tempfile.mkdtemp(prefix="raet", suffix="bench", dir='/tmp')
+
+    def path(self, *parts):
+        '''
+        Returns path of parts inside sandbox
+        '''
+        return os.path.join(self.dirpath, *parts)
+
+    def close(self):
+        '''
+        Remove sandbox directory
+        '''
+        if os.path.exists(self.dirpath):
+            shutil.rmtree(self.dirpath)
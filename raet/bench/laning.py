@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+'''
+laning.py raet benchmark scenarios for lane stacks
+
+Both yards run in this process on uxd sockets in a sandbox directory.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import time
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+
+from ..lane import stacking, yarding
+from . import benching
+
+from ..consoling import getConsole
+console = getConsole()
+
+def page(count=1000, size=64, burst=10, **kwa):
+    '''
+    Page throughput and latency from other yard to main yard
+    '''
+    recorder = benching.Recorder('lane_page', count=count, size=size, burst=burst, **kwa)
+    sandbox = benching.Sandbox()
+    clock = benching.Clock()
+    stacks = []
+    try:
+        for name in ('main', 'other'):
+            stacks.append(stacking.LaneStack(name=name,
+                                             yid=1,
+                                             localname=name,
+                                             lanename='bench',
+                                             basedirpath=sandbox.path('lane', 'keep'),
+                                             sockdirpath=sandbox.dirpath,
+                                             store=clock.store,
+                                             **kwa))
+        main, other = stacks
+        main.addRemote(yarding.RemoteYard(stack=main, ha=other.local.ha))
+        other.addRemote(yarding.RemoteYard(stack=other, ha=main.local.ha))
+        pad = 'x' * size
+
+        def done():
+            while main.rxMsgs:
+                body = main.rxMsgs.popleft()
+                recorder.mark(time.time() - body['stamp'], size)
+            return recorder.count >= sent
+
+        recorder.start()
+        sent = 0
+        while sent < count:
+            for i in range(min(burst, count - sent)):
+                other.transmit(odict(stamp=time.time(), pad=pad))
+                sent += 1
+            if not benching.service(stacks, clock, done):
+                break
+        recorder.stop()
+    finally:
+        for stack in stacks:
+            stack.close()
+        sandbox.close()
+    return recorder.result()
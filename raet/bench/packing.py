@@ -0,0 +1,369 @@
+# -*- coding: utf-8 -*-
+'''
+packing.py raet packet and page codec microbenchmarks
+
+Times each stage of packing and parsing road packets and trays and lane books
+for each head kind, body kind, and coat and foot kind and reports ns per op.
+Each stage can also be run under cProfile or pyinstrument.
+
+example:
+python -m raet.bench.packing
+python -m raet.bench.packing -n 2000 -s rx_inner -p cprofile
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import sys
+import argparse
+import cProfile
+import pstats
+from timeit import default_timer
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+
+from .. import raeting
+from ..road import stacking, estating, packeting
+from ..lane import paging
+from . import benching
+
+from ..consoling import getConsole
+console = getConsole()
+
+Port = 7570 # udp port of main stack, other stack uses the port above it
+
+STAGES = ['tx_pack', 'rx_outer', 'rx_inner', 'tray_pack', 'tray_parse',
+          'book_pack', 'book_parse']
+
+# (ck, fk) combinations
+CRYPTS = [(raeting.coatKinds.nada, raeting.footKinds.nada),
+          (raeting.coatKinds.nada, raeting.footKinds.nacl),
+          (raeting.coatKinds.nacl, raeting.footKinds.nacl)]
+
+class Pair(object):
+    '''
+    Main and other road stacks that hold each others keys so packets from
+    other can be signed and encrypted for main
+    '''
+    def __init__(self, sandbox, port=Port):
+        '''
+        Setup Pair instance
+        '''
+        stacks = []
+        for eid, name in ((1, 'main'), (2, 'other')):
+            stacks.append(stacking.RoadStack(name=name,
+                                             localname=name,
+                                             eid=eid,
+                                             main=(eid == 1),
+                                             ha=('127.0.0.1', port + eid - 1),
+                                             dirpath=sandbox.path('road', 'keep', name)))
+        self.main, self.other = stacks
+        remotes = []
+        for stack, peer in ((self.main, self.other), (self.other, self.main)):
+            remote = estating.RemoteEstate(stack=stack,
+                                           eid=peer.local.uid,
+                                           name=peer.local.name,
+                                           ha=peer.local.ha,
+                                           verkey=peer.local.signer.verhex,
+                                           pubkey=peer.local.priver.pubhex)
+            stack.addRemote(remote)
+            remotes.append(remote)
+        remotes[0].publee = estating.nacling.Publican(key=remotes[1].privee.pubhex)
+        remotes[1].publee = estating.nacling.Publican(key=remotes[0].privee.pubhex)
+
+    def close(self):
+        '''
+        Close servers and clear keeps
+        '''
+        for stack in (self.main, self.other):
+            stack.close()
+            stack.clearLocal()
+            stack.clearRemoteKeeps()
+
+def bodyOf(bk, size):
+    '''
+    Returns message body for body kind bk with about size bytes of payload
+    '''
+    stuff = 'x' * size
+    if bk == raeting.bodyKinds.raw:
+        return stuff
+    return odict(msg='Hello Raet World', stuff=stuff)
+
+def timed(func, setup, number, profiler=None):
+    '''
+    Returns ns per op of func called on each of number items from setup(number)
+    setup is not timed
+    '''
+    items = setup(number)
+    if profiler is not None:
+        profiler.start()
+    start = default_timer()
+    for item in items:
+        func(item)
+    elapsed = default_timer() - start
+    if profiler is not None:
+        profiler.stop()
+    return elapsed * 1e9 / number
+
+class Profiler(object):
+    '''
+    Wraps cProfile or pyinstrument with common start and stop
+    '''
+    def __init__(self, kind):
+        '''
+        Setup Profiler instance of kind 'cprofile' or 'pyinstrument'
+        '''
+        self.kind = kind
+        if kind == 'cprofile':
+            self.profile = cProfile.Profile()
+        elif kind == 'pyinstrument':
+            if not pyinstrument:
+                emsg = "Pyinstrument not installed."
+                raise ValueError(emsg)
+            self.profile = pyinstrument.Profiler()
+        else:
+            emsg = "Unknown profiler '{0}'".format(kind)
+            raise ValueError(emsg)
+
+    def start(self):
+        if self.kind == 'cprofile':
+            self.profile.enable()
+        else:
+            self.profile.start()
+
+    def stop(self):
+        if self.kind == 'cprofile':
+            self.profile.disable()
+        else:
+            self.profile.stop()
+
+    def report(self, stream=None, limit=20):
+        '''
+        Write profile report to stream, default stdout
+        '''
+        stream = stream or sys.stdout
+        if self.kind == 'cprofile':
+            stats = pstats.Stats(self.profile, stream=stream)
+            stats.sort_stats('cumulative').print_stats(limit)
+        else:
+            stream.write(self.profile.output_text())
+
+def roadCases(pair, size, hks=None, bks=None, crypts=None):
+    '''
+    Generator of (labels, stages) for each combination of kinds
+    where stages is odict of (func, setup) keyed by stage name
+    '''
+    main, other = pair.main, pair.other
+    hks = hks or [raeting.headKinds.raet, raeting.headKinds.json, raeting.headKinds.binary]
+    bks = bks or [raeting.bodyKinds.json, raeting.bodyKinds.msgpack, raeting.bodyKinds.raw]
+    crypts = crypts or CRYPTS
+    for hk in hks:
+        for bk in bks:
+            if bk == raeting.bodyKinds.msgpack and not packeting.msgpack:
+                continue
+            for ck, fk in crypts:
+                data = odict(hk=hk, bk=bk, ck=ck, fk=fk,
+                             se=other.local.uid, de=main.local.uid,
+                             tk=raeting.trnsKinds.message)
+                labels = odict([('hk', raeting.HEAD_KIND_NAMES[hk]),
+                                ('bk', raeting.BODY_KIND_NAMES[bk]),
+                                ('ck', raeting.COAT_KIND_NAMES[ck]),
+                                ('fk', raeting.FOOT_KIND_NAMES[fk])])
+                yield labels, roadStages(main, other, data, bodyOf(bk, size),
+                                         bodyOf(bk, 4 * raeting.UDP_MAX_PACKET_SIZE))
+
+def roadStages(main, other, data, body, large):
+    '''
+    Returns odict of (func, setup) keyed by stage name for road packets with
+    data sent from other to main with small body and large segmented body
+    '''
+    def txPacket(i):
+        return packeting.TxPacket(stack=other,
+                                  kind=raeting.pcktKinds.message,
+                                  embody=body,
+                                  data=data)
+    packet = txPacket(0)
+    packet.pack()
+    packed = packet.packed
+
+    tray = packeting.TxTray(stack=other, data=data, body=large)
+    tray.pack()
+    segments = [packet.packed for packet in tray.packets]
+
+    def rxPacket(packed):
+        return packeting.RxPacket(stack=main, packed=packed)
+
+    def rxOuters(raws):
+        packets = [rxPacket(raw) for raw in raws]
+        for packet in packets:
+            packet.parseOuter()
+        return packets
+
+    def rxInner(packet):
+        packet.parseInner()
+        return packet.body.data # body decodes lazily
+
+    def trayParse(packets):
+        tray = packeting.RxTray(stack=main)
+        for packet in packets:
+            tray.parse(packet)
+
+    stages = odict()
+    stages['tx_pack'] = (lambda packet: packet.pack(),
+                         lambda n: [txPacket(i) for i in range(n)])
+    stages['rx_outer'] = (lambda packet: packet.parseOuter(),
+                          lambda n: [rxPacket(packed) for i in range(n)])
+    stages['rx_inner'] = (rxInner,
+                          lambda n: rxOuters([packed] * n))
+    stages['tray_pack'] = (lambda tray: tray.pack(),
+                           lambda n: [packeting.TxTray(stack=other, data=data, body=large)
+                                      for i in range(n)])
+    stages['tray_parse'] = (trayParse,
+                            lambda n: [rxOuters(segments) for i in range(n)])
+    return stages
+
+def laneCases(size, pks=None):
+    '''
+    Generator of (labels, stages) for each lane pack kind
+    '''
+    pks = pks or [raeting.packKinds.json, raeting.packKinds.pack]
+    for pk in pks:
+        if pk == raeting.packKinds.pack and not paging.msgpack:
+            continue
+        for label, body in (('small', odict(msg='Hello Raet World', stuff='x' * size)),
+                            ('large', odict(stuff='x' * 4 * raeting.UXD_MAX_PACKET_SIZE))):
+            labels = odict([('pk', raeting.PACK_KIND_NAMES[pk]), ('size', label)])
+            yield labels, laneStages(odict(pk=pk, sn='other', dn='main'), body)
+
+def laneStages(data, body):
+    '''
+    Returns odict of (func, setup) keyed by stage name for lane books
+    '''
+    book = paging.TxBook(data=data, body=body)
+    book.pack()
+    packeds = [page.packed for page in book.pages]
+
+    def bookParse(pages):
+        book = paging.RxBook()
+        for page in pages:
+            page.head.parse()
+            book.parse(page)
+
+    stages = odict()
+    stages['book_pack'] = (lambda book: book.pack(),
+                           lambda n: [paging.TxBook(data=data, body=body) for i in range(n)])
+    stages['book_parse'] = (bookParse,
+                            lambda n: [[paging.RxPage(packed=packed) for packed in packeds]
+                                       for i in range(n)])
+    return stages
+
+def run(number=1000, size=64, stages=None, profile=None, port=Port, stream=None):
+    '''
+    Returns list of odict rows of ns per op for each stage and kind combination
+    number is ops per stage
+    size is small body payload size
+    stages is list of stage names to run, default all
+    profile is None, 'cprofile', or 'pyinstrument' to profile the timed ops
+    and write a report per stage to stream
+    '''
+    stages = stages or STAGES
+    for stage in stages:
+        if stage not in STAGES:
+            emsg = "Unknown codec stage '{0}'".format(stage)
+            raise ValueError(emsg)
+    if profile:
+        Profiler(profile) # fail early if not available
+
+    rows = []
+
+    def measure(labels, cases):
+        for name, (func, setup) in cases.items():
+            if name not in stages:
+                continue
+            profiler = Profiler(profile) if profile else None
+            ns = timed(func, setup, number, profiler)
+            row = odict(stage=name)
+            row.update(labels)
+            row['ns'] = ns
+            rows.append(row)
+            if profiler:
+                (stream or sys.stdout).write("\n{0} {1}\n".format(name,
+                        " ".join("{0}={1}".format(k, v) for k, v in labels.items())))
+                profiler.report(stream)
+
+    sandbox = benching.Sandbox()
+    pair = Pair(sandbox, port=port)
+    try:
+        for labels, cases in roadCases(pair, size):
+            measure(labels, cases)
+    finally:
+        pair.close()
+        sandbox.close()
+    for labels, cases in laneCases(size):
+        measure(labels, cases)
+    return rows
+
+def table(rows):
+    '''
+    Returns text table of rows with one column per label and ns per op
+    '''
+    columns = []
+    for row in rows:
+        for key in row:
+            if key != 'ns' and key not in columns:
+                columns.append(key)
+    columns.append('ns')
+    widths = [max([len(column)] + [len(cell(row.get(column, ''))) for row in rows])
+              for column in columns]
+    lines = ["  ".join(column.ljust(width) for column, width in zip(columns, widths))]
+    for row in rows:
+        lines.append("  ".join(cell(row.get(column, '')).ljust(width)
+                               if column != 'ns' else
+                               cell(row[column]).rjust(width)
+                               for column, width in zip(columns, widths)))
+    return "\n".join(lines) + "\n"
+
+def cell(value):
+    '''
+    Returns table cell string of value
+    '''
+    if isinstance(value, float):
+        return "{0:.0f}".format(value)
+    return str(value)
+
+def main(argv=None):
+    '''
+    Main entry point for codec benchmark CLI
+    '''
+    parser = argparse.ArgumentParser(description="Run raet codec microbenchmarks.")
+    parser.add_argument('-n', '--number', type=int, default=1000,
+                        help="Ops per stage. Default is 1000.")
+    parser.add_argument('-z', '--size', type=int, default=64,
+                        help="Small body payload bytes. Default is 64.")
+    parser.add_argument('-s', '--stages', nargs='*', choices=STAGES, default=None,
+                        help="Stages to run. Default is all.")
+    parser.add_argument('-p', '--profile', choices=['cprofile', 'pyinstrument'],
+                        default=None, help="Profile each stage.")
+    parser.add_argument('-j', '--json', action='store_true',
+                        help="Write json rows instead of table.")
+    args = parser.parse_args(argv)
+    console.reinit(verbosity=console.Wordage.terse)
+    rows = run(number=args.number, size=args.size, stages=args.stages,
+               profile=args.profile)
+    if args.json:
+        sys.stdout.write(json.dumps(rows, indent=2) + '\n')
+    else:
+        sys.stdout.write(table(rows))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+'''
+roading.py raet benchmark scenarios for road stacks
+
+All stacks run in this process over loopback udp ports starting at port.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import time
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+
+from ..road import stacking
+from . import benching
+
+from ..consoling import getConsole
+console = getConsole()
+
+Port = 7560 # default udp port of main stack, others use the ports above it
+
+def makeMain(sandbox, clock, port, **kwa):
+    '''
+    Returns main road stack bound to port that auto accepts
+    '''
+    return stacking.RoadStack(name='main',
+                              localname='main',
+                              eid=1,
+                              main=True,
+                              auto=True,
+                              ha=('127.0.0.1', port),
+                              dirpath=sandbox.path('road', 'keep', 'main'),
+                              store=clock.store,
+                              **kwa)
+
+def makeOthers(sandbox, clock, port, count, **kwa):
+    '''
+    Returns list of count other road stacks bound to the ports above port
+    '''
+    others = []
+    for i in range(count):
+        name = "other{0}".format(i)
+        others.append(stacking.RoadStack(name=name,
+                                         localname=name,
+                                         eid=0,
+                                         ha=('127.0.0.1', port + 1 + i),
+                                         dirpath=sandbox.path('road', 'keep', name),
+                                         store=clock.store,
+                                         **kwa))
+    return others
+
+def close(stacks):
+    '''
+    Close servers and clear keeps of stacks
+    '''
+    for stack in stacks:
+        stack.close()
+        stack.clearLocal()
+        stack.clearRemoteKeeps()
+
+def allowed(stack):
+    '''
+    Returns True if stack has allowed its first remote
+    '''
+    return bool(stack.remotes) and bool(stack.remotes.values()[0].allowed)
+
+def bootstrap(main, others, clock):
+    '''
+    Join and allow others with main
+    '''
+    for other in others:
+        other.join(ha=main.local.ha)
+    benching.service([main] + others, clock,
+                     lambda: all(other.remotes and other.remotes.values()[0].joined
+                                 for other in others) and not main.transactions)
+    for other in others:
+        other.allow()
+    if not benching.service([main] + others, clock,
+                            lambda: all(allowed(other) for other in others)
+                                    and not main.transactions):
+        console.terse("Bootstrap of road benchmark failed\n")
+
+def messages(name, count, size, burst, port, **kwa):
+    '''
+    Returns result of sending count messages with size byte payloads from
+    other to main in bursts of burst messages
+    '''
+    recorder = benching.Recorder(name, count=count, size=size, burst=burst, **kwa)
+    sandbox = benching.Sandbox()
+    clock = benching.Clock()
+    main = makeMain(sandbox, clock, port, **kwa)
+    other = makeOthers(sandbox, clock, port, 1, **kwa)[0]
+    try:
+        bootstrap(main, [other], clock)
+        pad = 'x' * size
+
+        def done():
+            while main.rxMsgs:
+                body = main.rxMsgs.popleft()
+                recorder.mark(time.time() - body['stamp'], size)
+            return recorder.count >= sent
+
+        recorder.start()
+        sent = 0
+        while sent < count:
+            for i in range(min(burst, count - sent)):
+                other.transmit(odict(stamp=time.time(), pad=pad))
+                sent += 1
+            if not benching.service([main, other], clock, done):
+                break
+        recorder.stop()
+    finally:
+        close([main, other])
+        sandbox.close()
+    return recorder.result()
+
+def message(count=1000, size=64, burst=10, port=Port, **kwa):
+    '''
+    Small message rate and latency
+    '''
+    return messages('road_message', count, size, burst, port, **kwa)
+
+def segmented(count=20, size=65536, burst=1, port=Port, **kwa):
+    '''
+    Large segmented message bandwidth
+    '''
+    return messages('road_segmented', count, size, burst, port, **kwa)
+
+def join(count=20, port=Port, **kwa):
+    '''
+    Storm of count estates joining and allowing with main at once
+    Latency is from join start until allowed
+    '''
+    recorder = benching.Recorder('road_join', count=count, **kwa)
+    sandbox = benching.Sandbox()
+    clock = benching.Clock()
+    main = makeMain(sandbox, clock, port, **kwa)
+    others = makeOthers(sandbox, clock, port, count, **kwa)
+    try:
+        pending = set(others)
+        joining = set(others)
+
+        def done():
+            for other in list(joining):
+                if other.remotes and other.remotes.values()[0].joined:
+                    joining.discard(other)
+                    other.allow()
+            for other in list(pending):
+                if allowed(other):
+                    pending.discard(other)
+                    recorder.mark(time.time() - start)
+            return not pending
+
+        recorder.start()
+        start = time.time()
+        for other in others:
+            other.join(ha=main.local.ha)
+        benching.service([main] + others, clock, done, timeout=10.0 + count)
+        recorder.stop()
+    finally:
+        close([main] + others)
+        sandbox.close()
+    return recorder.result()
+
+def alive(count=20, rounds=10, port=Port, **kwa):
+    '''
+    Alive heartbeat overhead per remote
+    Each round main sends an alive to each of count remotes
+    Latency is from round start until the alive transaction completes
+    '''
+    recorder = benching.Recorder('road_alive', count=count, rounds=rounds, **kwa)
+    sandbox = benching.Sandbox()
+    clock = benching.Clock()
+    main = makeMain(sandbox, clock, port, **kwa)
+    others = makeOthers(sandbox, clock, port, count, **kwa)
+    try:
+        bootstrap(main, others, clock)
+        recorder.start()
+        for i in range(rounds):
+            start = time.time()
+            for remote in main.remotes.values():
+                main.alive(duid=remote.uid)
+            pending = set(main.transactions.keys())
+
+            def done():
+                now = time.time()
+                for index in list(pending):
+                    if index not in main.transactions:
+                        pending.discard(index)
+                        recorder.mark(now - start)
+                return not pending
+
+            if not benching.service([main] + others, clock, done):
+                break
+        recorder.stop()
+    finally:
+        close([main] + others)
+        sandbox.close()
+    return recorder.result()
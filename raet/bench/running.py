@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+'''
+running.py raet benchmark runner CLI
+
+Runs benchmark scenarios and reports json results
+
+example:
+python -m raet.bench
+python -m raet.bench -s road_message lane_page -c 5000 -o results.json
+python -m raet.bench -v concise -s road_join -c 100
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import sys
+import time
+import platform
+import argparse
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+
+import raet
+from . import roading, laning
+
+from ..consoling import getConsole
+console = getConsole()
+
+SCENARIOS = odict([('road_message', roading.message),
+                   ('road_segmented', roading.segmented),
+                   ('road_join', roading.join),
+                   ('road_alive', roading.alive),
+                   ('lane_page', laning.page), ])
+
+def run(names=None, **kwa):
+    '''
+    Returns odict report of results of scenarios in names, default all
+    kwa are passed to each scenario, such as count, and override its defaults
+    '''
+    names = names or SCENARIOS.keys()
+    report = odict()
+    report['raet'] = raet.__version__
+    report['python'] = platform.python_version()
+    report['platform'] = platform.platform()
+    report['stamp'] = time.time()
+    report['results'] = []
+    for name in names:
+        scenario = SCENARIOS.get(name)
+        if scenario is None:
+            emsg = "Unknown benchmark scenario '{0}'".format(name)
+            raise ValueError(emsg)
+        console.concise("Running benchmark scenario '{0}'\n", name)
+        report['results'].append(scenario(**kwa))
+    return report
+
+def parseArgs(argv=None):
+    '''
+    Returns parsed command line args
+    '''
+    parser = argparse.ArgumentParser(description="Run raet benchmark scenarios.")
+    parser.add_argument('-s', '--scenarios',
+                        nargs='*',
+                        choices=SCENARIOS.keys(),
+                        default=None,
+                        help="Scenarios to run. Default is all.")
+    parser.add_argument('-c', '--count',
+                        type=int,
+                        default=None,
+                        help="Units of work per scenario. Default per scenario.")
+    parser.add_argument('-v', '--verbose',
+                        choices=console.Wordage._fields,
+                        default='terse',
+                        help="Console verbosity. Default is terse.")
+    parser.add_argument('-o', '--output',
+                        default='',
+                        help="Json results file path. Default is stdout.")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    '''
+    Main entry point for benchmark CLI
+    '''
+    args = parseArgs(argv)
+    console.reinit(verbosity=getattr(console.Wordage, args.verbose))
+    kwa = dict()
+    if args.count is not None:
+        kwa['count'] = args.count
+    report = run(args.scenarios, **kwa)
+    dump = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(dump + '\n')
+    else:
+        sys.stdout.write(dump + '\n')
@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+'''
+raet.bench unit test package
+'''
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for codec microbenchmarks
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting
+from raet.bench import packing
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Codec stages with small op counts
+    '''
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def testRun(self):
+        '''
+        Test rows for each stage and kind combination and table
+        '''
+        console.terse("{0}\n".format(self.testRun.__doc__))
+        rows = packing.run(number=2, stages=['rx_inner', 'book_parse'])
+        stages = [row['stage'] for row in rows]
+        kinds = 3 * len(packing.CRYPTS) * (3 if packing.packeting.msgpack else 2)
+        self.assertEqual(stages.count('rx_inner'), kinds)
+        self.assertEqual(stages.count('book_parse'), 4 if packing.paging.msgpack else 2)
+        self.assertEqual(len(rows), len(stages))
+        for row in rows:
+            self.assertGreater(row['ns'], 0.0)
+        self.assertEqual(rows[0].keys(), ['stage', 'hk', 'bk', 'ck', 'fk', 'ns'])
+
+        lines = packing.table(rows).splitlines()
+        self.assertEqual(len(lines), len(rows) + 1)
+        self.assertEqual(lines[0].split(), ['stage', 'hk', 'bk', 'ck', 'fk', 'pk', 'size', 'ns'])
+        self.assertRaises(ValueError, packing.run, stages=['tx_nada'])
+        self.assertRaises(ValueError, packing.run, profile='nada')
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testRun', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testRun')
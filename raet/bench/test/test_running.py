@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for benchmark scenarios and runner
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import json
+import tempfile
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet.bench import benching, running
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Benchmark scenarios with small counts
+    '''
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def testPercentile(self):
+        '''
+        Test nearest rank percentile
+        '''
+        console.terse("{0}\n".format(self.testPercentile.__doc__))
+        values = range(100, 0, -1)
+        self.assertEqual(benching.percentile(values, 0.5), 51)
+        self.assertEqual(benching.percentile(values, 0.99), 99)
+        self.assertEqual(benching.percentile(values, 0.0), 1)
+        self.assertEqual(benching.percentile(values, 1.0), 100)
+        self.assertIs(benching.percentile([], 0.5), None)
+
+    def testRun(self):
+        '''
+        Test each scenario runs and reports all units of work
+        '''
+        console.terse("{0}\n".format(self.testRun.__doc__))
+        report = running.run(count=4)
+        self.assertEqual([result['scenario'] for result in report['results']],
+                         running.SCENARIOS.keys())
+        for result in report['results']:
+            count = result['params']['count'] * result['params'].get('rounds', 1)
+            self.assertEqual(result['count'], count)
+            self.assertGreater(result['rate'], 0.0)
+            self.assertLessEqual(result['p50'], result['p99'])
+        self.assertRaises(ValueError, running.run, ['road_nada'])
+
+    def testMain(self):
+        '''
+        Test command line writes json report to output file
+        '''
+        console.terse("{0}\n".format(self.testMain.__doc__))
+        fd, path = tempfile.mkstemp(prefix="raet", suffix=".json")
+        os.close(fd)
+        try:
+            running.main(['-s', 'lane_page', '-c', '3', '-o', path])
+            with open(path) as f:
+                report = json.load(f)
+        finally:
+            os.remove(path)
+            console.reinit(verbosity=console.Wordage.concise)
+        self.assertEqual(report['results'][0]['scenario'], 'lane_page')
+        self.assertEqual(report['results'][0]['count'], 3)
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testPercentile',
+             'testRun',
+             'testMain', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testRun')
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+'''
+coding.py raet protocol packet body codecs
+
+Registry of body codecs keyed by body kind from raeting.BODY_KINDS
+Each codec packs body data into a string and unpacks a string into body data
+either as an odict that preserves field order or as a faster plain dict.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+from collections import Mapping
+try:
+    import simplejson as json
+except ImportError:
+    import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+
+from . import raeting
+
+from .consoling import getConsole
+console = getConsole()
+
+class Codec(object):
+    '''
+    Base body codec. Subclasses override .pack and .unpack
+    The base packs every body as empty like the nada body kind
+    '''
+    Kind = raeting.bodyKinds.unknown
+
+    def __init__(self, kind=None):
+        '''
+        Setup Codec instance for body kind
+        '''
+        self.kind = kind if kind is not None else self.Kind
+
+    def pack(self, data):
+        '''
+        Returns packed string of body data
+        '''
+        return ''
+
+    def unpack(self, packed, plain=False):
+        '''
+        Returns body data unpacked from packed string
+        If plain then mappings are plain dicts instead of odicts
+        Raises PacketError if packed is not valid
+        '''
+        return dict() if plain else odict()
+
+class NadaCodec(Codec):
+    '''
+    Codec for empty body
+    '''
+    Kind = raeting.bodyKinds.nada
+
+class RawCodec(Codec):
+    '''
+    Codec for body that is already formatted string
+    '''
+    Kind = raeting.bodyKinds.raw
+
+    def pack(self, data):
+        return data
+
+    def unpack(self, packed, plain=False):
+        return packed
+
+class JsonCodec(Codec):
+    '''
+    Codec for json serialized body mapping
+    '''
+    Kind = raeting.bodyKinds.json
+
+    def pack(self, data):
+        if not data:
+            return ''
+        return json.dumps(data, separators=(',', ':'))
+
+    def unpack(self, packed, plain=False):
+        if not packed:
+            return dict() if plain else odict()
+        try:
+            if plain:
+                kit = json.loads(packed)
+            else:
+                kit = json.loads(packed, object_pairs_hook=odict)
+        except ValueError as ex:
+            emsg = "Invalid json packet body. {0}".format(ex)
+            raise raeting.PacketError(emsg)
+        if not isinstance(kit, Mapping):
+            emsg = "Packet body not a mapping."
+            raise raeting.PacketError(emsg)
+        return kit
+
+class MsgpackCodec(Codec):
+    '''
+    Codec for msgpack serialized body mapping
+    Reuses one packer and unpacks plain dicts without a hook
+    '''
+    Kind = raeting.bodyKinds.msgpack
+
+    def __init__(self, **kwa):
+        '''
+        Setup MsgpackCodec instance
+        '''
+        super(MsgpackCodec, self).__init__(**kwa)
+        self.packer = msgpack.Packer() if msgpack else None
+
+    def pack(self, data):
+        if not data:
+            return ''
+        if not msgpack:
+            emsg = "Msgpack not installed."
+            raise raeting.PacketError(emsg)
+        return self.packer.pack(data)
+
+    def unpack(self, packed, plain=False):
+        if not packed:
+            return dict() if plain else odict()
+        if not msgpack:
+            emsg = "Msgpack not installed."
+            raise raeting.PacketError(emsg)
+        try:
+            if plain:
+                kit = msgpack.unpackb(packed)
+            else:
+                kit = msgpack.unpackb(packed, object_pairs_hook=odict)
+        except Exception as ex:  # msgpack raises several unrelated types
+            emsg = "Invalid msgpack packet body. {0}".format(ex)
+            raise raeting.PacketError(emsg)
+        if not isinstance(kit, Mapping):
+            emsg = "Packet body not a mapping."
+            raise raeting.PacketError(emsg)
+        return kit
+
+CODECS = dict() # registered codec instances keyed by body kind
+
+def register(codec):
+    '''
+    Register codec instance for its body kind replacing any prior codec
+    '''
+    if codec.kind == raeting.bodyKinds.unknown:
+        emsg = "Cannot register codec for unknown body kind."
+        raise ValueError(emsg)
+    CODECS[codec.kind] = codec
+
+def fetch(kind):
+    '''
+    Returns codec registered for body kind
+    Raises PacketError if none registered
+    '''
+    codec = CODECS.get(kind)
+    if codec is None:
+        emsg = "Unrecognizable packet body."
+        raise raeting.PacketError(emsg)
+    return codec
+
+register(NadaCodec())
+register(RawCodec())
+register(JsonCodec())
+register(MsgpackCodec())
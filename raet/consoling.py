@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+'''
+consoling.py raet console logging facade
+
+Wraps the ioflo console so the write methods take a format string and args
+and only format when the console verbosity would write the message.
+
+example:
+console = getConsole()
+console.verbose("{0} received packet\n{1}\n", self.name, raw)
+
+Guard any other work done only for a message with console.enabled
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import ioflo libs
+from ioflo.base import consoling
+
+Wordage = consoling.Console.Wordage
+
+class Console(object):
+    '''
+    Facade of ioflo console with deferred formatting and level guards
+    Other attributes such as reinit and Wordage are those of the ioflo console
+    '''
+    def __init__(self, console):
+        '''
+        Setup Console instance that wraps ioflo console
+        '''
+        self._console = console
+
+    def __getattr__(self, name):
+        return getattr(self._console, name)
+
+    def enabled(self, verbosity):
+        '''
+        Returns True if console writes messages at verbosity
+        '''
+        return verbosity <= self._console._verbosity
+
+    def write(self, msg, *args, **kwa):
+        '''
+        Write msg formatted with args at verbosity keyword arg, default always
+        '''
+        verbosity = kwa.get('verbosity')
+        if verbosity is None or verbosity <= self._console._verbosity:
+            self._console.write(msg.format(*args) if args else msg)
+
+    def terse(self, msg, *args):
+        if Wordage.terse <= self._console._verbosity:
+            self._console.write(msg.format(*args) if args else msg)
+
+    def concise(self, msg, *args):
+        if Wordage.concise <= self._console._verbosity:
+            self._console.write(msg.format(*args) if args else msg)
+
+    def verbose(self, msg, *args):
+        if Wordage.verbose <= self._console._verbosity:
+            self._console.write(msg.format(*args) if args else msg)
+
+    def profuse(self, msg, *args):
+        if Wordage.profuse <= self._console._verbosity:
+            self._console.write(msg.format(*args) if args else msg)
+
+def getConsole(name='console', **kwa):
+    '''
+    Returns facade of the ioflo console of name
+    '''
+    return Console(consoling.getConsole(name, **kwa))
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+'''
+executing.py raet protocol crypto offload executor
+
+Pool of worker threads for batches of crypto work such as signing,
+verifying, encrypting, and decrypting. The libsodium calls release the GIL
+so the workers run on multiple cores while the stack service loop waits for
+the batch. Results are returned in submission order so packets keep their
+order per remote.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+from multiprocessing.pool import ThreadPool
+
+from .consoling import getConsole
+console = getConsole()
+
+class Executor(object):
+    '''
+    Runs batches of jobs on a pool of .workers threads
+    Batches smaller than .threshold run inline since handing them off to the
+    pool costs more than it saves
+    '''
+    Workers = 2 # default number of worker threads
+    Threshold = 2 # default min batch size to hand off to pool
+
+    def __init__(self, workers=None, threshold=None):
+        '''
+        Setup Executor instance
+
+        workers is number of worker threads
+        threshold is min batch size to run in pool
+        '''
+        self.workers = workers if workers is not None else self.Workers
+        self.threshold = threshold if threshold is not None else self.Threshold
+        self.pool = ThreadPool(self.workers)
+
+    def map(self, func, jobs):
+        '''
+        Returns list of results of func applied to each job in jobs in order
+        Must not be called from within a job
+        '''
+        if len(jobs) < self.threshold:
+            return [func(job) for job in jobs]
+        return self.pool.map(func, jobs)
+
+    def close(self):
+        '''
+        Stop worker threads after pending jobs complete
+        '''
+        self.pool.close()
+        self.pool.join()
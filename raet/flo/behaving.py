@@ -42,7 +42,7 @@ from ioflo.base import aiding
 from ioflo.base import storing
 from ioflo.base import deeding
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
 from .. import raeting
@@ -131,7 +131,7 @@ class RaetRoadStackCloser(deeding.Deed):  # pylint: disable=W0232
         Close udp socket
         '''
         if self.stack.value and isinstance(self.stack.value, RoadStack):
-            self.stack.value.server.close()
+            self.stack.value.close()
 
 class RaetRoadStackJoiner(deeding.Deed):  # pylint: disable=W0232
     '''
@@ -365,7 +365,7 @@ class RaetLaneStackCloser(deeding.Deed):  # pylint: disable=W0232
         Close uxd socket
         '''
         if self.stack.value and isinstance(self.stack.value, LaneStack):
-            self.stack.value.server.close()
+            self.stack.value.close()
 
 class RaetLaneStackYardAdd(deeding.Deed):  # pylint: disable=W0232
     '''
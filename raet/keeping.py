@@ -23,7 +23,7 @@ from ioflo.base import aiding
 from . import raeting
 from . import nacling
 
-from ioflo.base.consoling import getConsole
+from .consoling import getConsole
 console = getConsole()
 
 KEEP_DIR = os.path.join('/var', 'cache', 'raet', 'keep')
@@ -222,10 +222,12 @@ class Keep(object):
         if os.path.exists(self.remotedirpath):
             os.rmdir(self.remotedirpath)
 
-    def loadAllRemoteData(self):
+    def loadAllRemoteData(self, owns=None):
         '''
         Load and Return the datadict from the all the remote data files
         indexed by uid in filenames
+        owns is callable that returns True for the uid strings to load,
+        default loads all
         '''
         datadict = odict()
         for filename in os.listdir(self.remotedirpath):
@@ -235,6 +237,8 @@ class Keep(object):
             prefix, sep, uid = root.partition('.')
             if not uid or prefix != self.prefix:
                 continue
+            if owns is not None and not owns(uid):
+                continue
             filepath = os.path.join(self.remotedirpath, filename)
             datadict[uid] = self.load(filepath)
         return datadict
@@ -21,7 +21,7 @@ from ioflo.base import aiding
 from .. import raeting
 from .. import keeping
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
 class LaneKeep(keeping.Keep):
@@ -15,12 +15,12 @@ except ImportError:
 try:
     import msgpack
 except ImportError:
-    mspack = None
+    msgpack = None
 
 # Import ioflo libs
 from ioflo.base.odicting import odict
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
 from .. import raeting
@@ -430,8 +430,8 @@ class RxBook(Book):
         #paginated so add to pages
         pc = page.data['pc'] #page count
         pn = page.data['pn']
-        console.verbose("page count={0} number={1} session id={2} book id={2}\n".format(
-                     pc, pn, page.data['si'], page.data['bi']))
+        console.verbose("page count={0} number={1} session id={2} book id={3}\n",
+                        pc, pn, page.data['si'], page.data['bi'])
 
         if not self.sections: #update data from first page received
             self.data.update(page.data)
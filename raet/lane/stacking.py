@@ -19,7 +19,7 @@ except ImportError:
 try:
     import msgpack
 except ImportError:
-    mspack = None
+    msgpack = None
 
 # Import ioflo libs
 from ioflo.base.odicting import odict
@@ -29,7 +29,7 @@ from ioflo.base import storing
 from .. import raeting, nacling, stacking
 from . import paging, yarding, keeping
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
 class LaneStack(stacking.Stack):
@@ -159,7 +159,7 @@ class LaneStack(stacking.Stack):
         Assumes that there is a message on the .rxes deque
         '''
         raw, sa, da = self.rxes.popleft()
-        console.verbose("{0} received raw message \n{1}\n".format(self.name, raw))
+        console.verbose("{0} received raw message \n{1}\n", self.name, raw)
         page = paging.RxPage(packed=raw)
 
         try:
@@ -170,8 +170,7 @@ class LaneStack(stacking.Stack):
 
         dn = page.data['dn']
         if dn != self.local.name:
-            emsg = "Invalid destination yard name = {0}. Dropping packet...\n".format(dn)
-            console.concise( emsg)
+            console.concise("Invalid destination yard name = {0}. Dropping packet...\n", dn)
             self.incStat('invalid_destination')
 
         sn = page.data['sn']
@@ -222,8 +221,8 @@ class LaneStack(stacking.Stack):
         Retrieve next page from stack receive queue if any and parse
         Assumes received header has been parsed
         '''
-        console.verbose("{0} received page header\n{1}\n".format(self.name, received.data))
-        console.verbose("{0} received page index = '{1}'\n".format(self.name, received.index))
+        console.verbose("{0} received page header\n{1}\n", self.name, received.data)
+        console.verbose("{0} received page index = '{1}'\n", self.name, received.index)
 
         if received.paginated:
             index = (received.data['si'], received.data['bi'])
@@ -255,14 +254,14 @@ class LaneStack(stacking.Stack):
         '''
         body, duid = self.txMsgs.popleft() # duple (body dict, destination name)
         self.message(body, duid)
-        console.verbose("{0} sending to {1}\n{2}\n".format(self.name, duid, body))
+        console.verbose("{0} sending to {1}\n{2}\n", self.name, duid, body)
 
     def _handleOneTx(self, laters, blocks):
         '''
         Handle one message on .txes deque
         Assumes there is a message
         aters is deque of messages to try again later
-        blocks is list of blocked destination address so put all associated into laters
+        blocks is set of blocked destination address so put all associated into laters
         '''
         tx, ta = self.txes.popleft()  # duple = (packet, destination address)
 
@@ -276,18 +275,24 @@ class LaneStack(stacking.Stack):
             if ex.errno == errno.ECONNREFUSED:
                 console.terse("socket.error = {0}\n".format(ex))
                 self.incStat("stale_transmit_yard")
-                yard = self.remotes.get(ta)
+                yard = None # remotes are keyed by uid so find yard by ha
+                for remote in self.remotes.values():
+                    if remote.ha == ta:
+                        yard = remote
+                        break
                 if yard:
                     self.removeRemote(yard.uid)
                     console.terse("Reaped yard {0}\n".format(yard.name))
             elif ex.errno == errno.EAGAIN or ex.errno == errno.EWOULDBLOCK:
                 #busy with last message save it for later
                 laters.append((tx, ta))
-                blocks.append(ta)
+                blocks.add(ta)
 
             else:
                 console.terse("Sending to '{0}' from '{1}\n".format(ta, self.local.ha))
                 raise
+        else:
+            self.txCounter.inc()
 
     def message(self, body, duid):
         '''
@@ -12,6 +12,7 @@ else:
 
 import os
 import time
+import socket
 import tempfile
 import shutil
 from collections import deque
@@ -23,7 +24,7 @@ from ioflo.base import storing
 from ioflo.base.consoling import getConsole
 console = getConsole()
 
-from raet import raeting
+from raet import raeting, batching
 from raet.lane import yarding, stacking
 
 def setUpModule():
@@ -172,6 +173,25 @@ class BasicTestCase(unittest.TestCase):
 
         self.message(mains=mains, others=others)
 
+    def testMetrics(self):
+        '''
+        Datagram metrics of lane stacks
+        '''
+        console.terse("{0}\n".format(self.testMetrics.__doc__))
+        self.bootstrap(kind=raeting.packKinds.json)
+
+        mains = [odict(what="This is a message to the serf. Get to Work", extra="Fix the fence.")]
+        others = [odict(what="This is a message to the lord. Let me be", extra="Go away."),
+                  odict(what="This is a message to the lord. Let me be", extra="Again.")]
+        self.message(mains=mains, others=others)
+
+        snap = self.main.snapshotMetrics()
+        self.assertEqual(snap['tx_datagrams'], 1)
+        self.assertEqual(snap['rx_datagrams'], 2)
+        snap = self.other.snapshotMetrics()
+        self.assertEqual(snap['tx_datagrams'], 2)
+        self.assertEqual(snap['rx_datagrams'], 1)
+
     def testMessageMsgpack(self):
         '''
         Basic messaging with msgpack packing
@@ -261,6 +281,66 @@ class BasicTestCase(unittest.TestCase):
 
         self.message(mains=mains, others=others, duration=2.0)
 
+    def testMessageSectionedBatched(self):
+        '''
+        Sectioned messages with batched server receive and transmit
+        '''
+        console.terse("{0}\n".format(self.testMessageSectionedBatched.__doc__))
+
+        self.bootstrap(kind=raeting.packKinds.json)
+        for stack in (self.main, self.other):
+            stack.rxbatch = 8
+            stack.receiver = batching.Receiver(stack.server, count=stack.rxbatch)
+            stack.txbatch = 8
+            stack.transmitter = batching.Transmitter(stack.server, count=stack.txbatch)
+
+        stuff = []
+        for i in range(10000):
+            stuff.append(str(i).rjust(10, " "))
+        stuff = "".join(stuff)
+
+        mains = []
+        others = []
+        for i in range(3):
+            mains.append(odict([('house', "Mama mia{0}".format(i)), ('content', stuff)]))
+            others.append(odict([('house', "Papa pia{0}".format(i)), ('content', stuff)]))
+
+        self.message(mains=mains, others=others, duration=2.0)
+
+    def testStaleYardBatched(self):
+        '''
+        Stale yard is sent to once and reaped with batched or fallback transmit
+        '''
+        console.terse("{0}\n".format(self.testStaleYardBatched.__doc__))
+
+        self.bootstrap(kind=raeting.packKinds.json)
+        path = os.path.join(self.baseDirpath, 'cherry.stale.uxd')
+        sends = []
+        send = self.other.server.send
+        def counted(tx, ta):
+            if ta == path:
+                sends.append(ta)
+            return send(tx, ta)
+        self.other.server.send = counted
+        self.other.txbatch = 8
+        self.other.transmitter = batching.Transmitter(self.other.server,
+                                                      count=self.other.txbatch)
+
+        for batched in (self.other.transmitter.batched, False):
+            self.other.transmitter.batched = batched
+            stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            stale.bind(path)
+            stale.close() # socket file left without reader
+            yard = yarding.RemoteYard(stack=self.other, ha=path)
+            self.other.addRemote(yard)
+            self.other.transmit(odict(house="Mama mia"), duid=yard.uid)
+            del sends[:]
+            self.other.serviceAll()
+            self.assertEqual(len(sends), 1)
+            self.assertNotIn(yard.uid, self.other.remotes)
+            os.remove(path)
+        self.assertEqual(self.other.stats['stale_transmit_yard'], 2)
+
     def testMessageSectionedMsgpack(self):
         '''
         Sectioned messages with msgpack packing
@@ -399,11 +479,14 @@ def runSome():
     """ Unittest runner """
     tests =  []
     names = ['testMessageJson',
+             'testMetrics',
              'testMessageMsgpack',
              'testMessageMultipleJson',
              'testMessageMultipleMsgpack',
              'testMessageSectionedJson',
              'testMessageSectionedMsgpack',
+             'testMessageSectionedBatched',
+             'testStaleYardBatched',
              'testAutoAccept',
              'testAutoAcceptNot', ]
     tests.extend(map(BasicTestCase, names))
@@ -16,7 +16,7 @@ from .. import raeting
 from .. import nacling
 from .. import lotting
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
 YARD_UXD_DIR = os.path.join('/var', 'cache', 'raet')
@@ -182,7 +182,7 @@ class RemoteYard(Yard):
         Safely add book at index,(si, bi) If not already there
         '''
         self.books[index] = book
-        console.verbose( "Added book to {0} at '{1}'\n".format(self.name, index))
+        console.verbose("Added book to {0} at '{1}'\n", self.name, index)
 
     def removeBook(self, index, book=None):
         '''
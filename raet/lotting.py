@@ -18,7 +18,7 @@ attributes or properties that are both gettable and settable.
 # Import ioflo libs
 from ioflo.base.odicting import odict
 
-from ioflo.base.consoling import getConsole
+from .consoling import getConsole
 console = getConsole()
 
 from . import raeting
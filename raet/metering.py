@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+'''
+metering.py raet protocol stack metrics
+
+Typed counters, gauges, and histograms registered by name on a Meter.
+Hot paths hold a reference to a metric handle from registration time so
+updating it is an attribute increment instead of a keyed dict lookup.
+Gauges may fetch their value when snapshot so queue depths cost nothing
+until read.
+
+Resetting a meter zeroes its counters and histograms. Prometheus expects
+counters to only grow and reads a drop as a restart of the process, so do
+not reset a meter that is scraped.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import bisect
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+
+from .consoling import getConsole
+console = getConsole()
+
+class Counter(object):
+    '''
+    Monotonic count such as datagrams or redos
+    '''
+    Kind = 'counter'
+
+    def __init__(self, name, doc=''):
+        '''
+        Setup Counter instance
+        '''
+        self.name = name
+        self.doc = doc
+        self.value = 0
+
+    def inc(self, delta=1):
+        '''
+        Increment by delta
+        '''
+        self.value += delta
+
+    def snapshot(self):
+        '''
+        Returns current value
+        '''
+        return self.value
+
+    def reset(self):
+        '''
+        Zero value
+        '''
+        self.value = 0
+
+class Gauge(Counter):
+    '''
+    Value that goes up and down such as a queue depth
+    If fetch is provided it is called for the value at snapshot
+    '''
+    Kind = 'gauge'
+
+    def __init__(self, name, doc='', fetch=None):
+        '''
+        Setup Gauge instance
+        '''
+        super(Gauge, self).__init__(name=name, doc=doc)
+        self.fetch = fetch
+
+    def set(self, value):
+        '''
+        Set value
+        '''
+        self.value = value
+
+    def dec(self, delta=1):
+        '''
+        Decrement by delta
+        '''
+        self.value -= delta
+
+    def snapshot(self):
+        '''
+        Returns fetched or current value
+        '''
+        if self.fetch is not None:
+            return self.fetch()
+        return self.value
+
+class Histogram(object):
+    '''
+    Distribution of observed values such as durations in seconds
+    Counts each value in the first bucket whose upper bound is not less than
+    the value with a last bucket for values above all the bounds
+    '''
+    Kind = 'histogram'
+    Bounds = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+    def __init__(self, name, doc='', bounds=None):
+        '''
+        Setup Histogram instance
+        '''
+        self.name = name
+        self.doc = doc
+        self.bounds = tuple(sorted(bounds if bounds is not None else self.Bounds))
+        self.reset()
+
+    def observe(self, value):
+        '''
+        Count value
+        '''
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        '''
+        Returns odict of count, sum and cumulative bucket counts keyed by
+        upper bound with None as the unbounded last bucket
+        '''
+        buckets = odict()
+        total = 0
+        for bound, count in zip(self.bounds + (None, ), self.counts):
+            total += count
+            buckets[bound] = total
+        return odict([('count', self.count), ('sum', self.sum), ('buckets', buckets)])
+
+    def reset(self):
+        '''
+        Zero all counts
+        '''
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+class Meter(object):
+    '''
+    Registry of metrics keyed by name
+    labels is odict of labels of all the metrics such as the stack name
+    '''
+    def __init__(self, labels=None):
+        '''
+        Setup Meter instance
+        '''
+        self.labels = labels if labels is not None else odict()
+        self.metrics = odict()
+
+    def register(self, metric):
+        '''
+        Returns metric registered under the name of metric
+        Registers metric if name is new
+        Raises ValueError if name already registered to a different kind
+        '''
+        prior = self.metrics.get(metric.name)
+        if prior is None:
+            self.metrics[metric.name] = metric
+            return metric
+        if prior.Kind != metric.Kind:
+            emsg = "Metric '{0}' already registered as {1}".format(metric.name, prior.Kind)
+            raise ValueError(emsg)
+        return prior
+
+    def counter(self, name, doc=''):
+        '''
+        Returns counter handle registered as name
+        Raises ValueError if name is registered to another kind
+        '''
+        return self.register(Counter(name, doc=doc))
+
+    def gauge(self, name, doc='', fetch=None):
+        '''
+        Returns gauge handle registered as name
+        '''
+        return self.register(Gauge(name, doc=doc, fetch=fetch))
+
+    def histogram(self, name, doc='', bounds=None):
+        '''
+        Returns histogram handle registered as name
+        '''
+        return self.register(Histogram(name, doc=doc, bounds=bounds))
+
+    def snapshot(self, reset=False):
+        '''
+        Returns odict of snapshots of all metrics keyed by name
+        If reset then reset all metrics after taking the snapshot so counters
+        restart from zero and are no longer monotonic across snapshots
+        '''
+        snap = odict((name, metric.snapshot()) for name, metric in self.metrics.items())
+        if reset:
+            self.reset()
+        return snap
+
+    def reset(self):
+        '''
+        Reset all metrics
+        Counters restart from zero which a prometheus scraper sees as a restart
+        '''
+        for metric in self.metrics.values():
+            metric.reset()
+
+    def export(self, exporter=None):
+        '''
+        Returns result of exporter(meter), default prometheus text format
+        '''
+        return (exporter or prometheus)(self)
+
+def escape(text, quote=False):
+    '''
+    Returns text with backslash and newline escaped and also double quote
+    if quote as required in prometheus help text and label values
+    '''
+    if not isinstance(text, basestring):
+        text = str(text)
+    text = text.replace('\\', '\\\\').replace('\n', '\\n')
+    if quote:
+        text = text.replace('"', '\\"')
+    return text
+
+def prometheus(meter, prefix='raet'):
+    '''
+    Returns metrics of meter in prometheus text exposition format
+    Counter names get the _total suffix
+    '''
+    def labeled(extra=None):
+        labels = odict(meter.labels)
+        if extra:
+            labels.update(extra)
+        if not labels:
+            return ''
+        return "{{{0}}}".format(",".join('{0}="{1}"'.format(key, escape(value, quote=True))
+                                           for key, value in labels.items()))
+
+    lines = []
+    for name, metric in meter.metrics.items():
+        full = "{0}_{1}".format(prefix, name) if prefix else name
+        if metric.Kind == Counter.Kind and not full.endswith('_total'):
+            full += '_total'
+        if metric.doc:
+            lines.append("# HELP {0} {1}".format(full, escape(metric.doc)))
+        lines.append("# TYPE {0} {1}".format(full, metric.Kind))
+        snap = metric.snapshot()
+        if metric.Kind == Histogram.Kind:
+            for bound, count in snap['buckets'].items():
+                le = repr(float(bound)) if bound is not None else "+Inf"
+                lines.append("{0}_bucket{1} {2}".format(full, labeled(odict(le=le)), count))
+            lines.append("{0}_sum{1} {2!r}".format(full, labeled(), snap['sum']))
+            lines.append("{0}_count{1} {2}".format(full, labeled(), snap['count']))
+        else:
+            lines.append("{0}{1} {2}".format(full, labeled(), snap))
+    return "\n".join(lines) + "\n"
@@ -5,6 +5,7 @@ nacling.py raet protocol nacl (crypto) management classes
 
 # Import python libs
 import time
+import ctypes
 
 import six
 import libnacl
@@ -13,11 +14,14 @@ import libnacl
 import warnings
 
 
-from ioflo.base.consoling import getConsole
+from .consoling import getConsole
 console = getConsole()
 
 from . import encoding
 
+# detached signature verification avoids joining signature and message
+crypto_sign_verify_detached = getattr(libnacl.nacl, 'crypto_sign_verify_detached', None)
+
 class CryptoError(Exception):
     """
     Base exception for all nacl related errors
@@ -409,11 +413,17 @@ class Signer(object):
         '''
         return self.key.sign(msg)
 
-    def signature(self, msg):
+    def signature(self, msg, size=None):
         '''
         Return only the signature string resulting from signing the message
+        If msg is a bytearray buffer then sign in place its leading size bytes
+        or all of it when size is None without copying
         '''
-        return self.key.sign(msg).signature
+        if isinstance(msg, bytearray):
+            if size is None:
+                size = len(msg)
+            msg = (ctypes.c_char * size).from_buffer(msg)
+        return libnacl.crypto_sign(msg, self.key._signing_key)[:libnacl.crypto_sign_BYTES]
 
 class Verifier(object):
     '''
@@ -437,12 +447,24 @@ class Verifier(object):
     def verify(self, signature, msg):
         '''
         Verify the message
+        If msg is a bytearray buffer then verify it in place without copying
+        when libsodium provides detached verification
         '''
         if not self.key:
             return False
+        if crypto_sign_verify_detached is not None:
+            if len(signature) != libnacl.crypto_sign_BYTES:
+                return False
+            size = len(msg)
+            if isinstance(msg, bytearray):
+                msg = (ctypes.c_char * size).from_buffer(msg)
+            return not crypto_sign_verify_detached(signature,
+                                                   msg,
+                                                   ctypes.c_ulonglong(size),
+                                                   self.keyraw)
         try:
-            self.key.verify(signature + msg)
-        except BadSignatureError:
+            self.key.verify(signature + bytes(msg))
+        except (BadSignatureError, ValueError):
             return False
         return True
 
@@ -498,11 +520,27 @@ class Privateer(object):
                         now)
         return nonce
 
+    def box(self, pubkey):
+        '''
+        Return Box with the shared key precomputed from the .key and the pubkey
+        If pubkey is hex encoded it is converted first
+
+        The returned Box may be passed as the pubkey to .encrypt or .decrypt
+        to avoid recomputing the shared key on every call
+        '''
+        if not isinstance(pubkey, PublicKey):
+            if len(pubkey) == 32:
+                pubkey = PublicKey(pubkey, encoding.RawEncoder)
+            else:
+                pubkey = PublicKey(pubkey, encoding.HexEncoder)
+        return Box(self.key, pubkey)
+
     def encrypt(self, msg, pubkey, enhex=False):
         '''
         Return duple of (cyphertext, nonce) resulting from encrypting the message
         using shared key generated from the .key and the pubkey
         If pubkey is hex encoded it is converted first
+        If pubkey is a Box then its precomputed shared key is used
         If enhex is True then use HexEncoder otherwise use RawEncoder
 
         Intended for the owner of the passed in public key
@@ -510,12 +548,7 @@ class Privateer(object):
         msg is string
         pub is Publican instance
         '''
-        if not isinstance(pubkey, PublicKey):
-            if len(pubkey) == 32:
-                pubkey = PublicKey(pubkey, encoding.RawEncoder)
-            else:
-                pubkey = PublicKey(pubkey, encoding.HexEncoder)
-        box = Box(self.key, pubkey)
+        box = pubkey if isinstance(pubkey, Box) else self.box(pubkey)
         nonce = self.nonce()
         encoder = encoding.HexEncoder if enhex else encoding.RawEncoder
         encrypted = box.encrypt(msg, nonce, encoder)
@@ -526,6 +559,7 @@ class Privateer(object):
         Return decrypted msg contained in cypher using nonce and shared key
         generated from .key and pubkey.
         If pubkey is hex encoded it is converted first
+        If pubkey is a Box then its precomputed shared key is used
         If dehex is True then use HexEncoder otherwise use RawEncoder
 
         Intended for the owner of .key
@@ -534,12 +568,7 @@ class Privateer(object):
         nonce is string
         pub is Publican instance
         '''
-        if not isinstance(pubkey, PublicKey):
-            if len(pubkey) == 32:
-                pubkey = PublicKey(pubkey, encoding.RawEncoder)
-            else:
-                pubkey = PublicKey(pubkey, encoding.HexEncoder)
-        box = Box(self.key, pubkey)
+        box = pubkey if isinstance(pubkey, Box) else self.box(pubkey)
         decoder = encoding.HexEncoder if dehex else encoding.RawEncoder
         if dehex and len(nonce) != box.NONCE_SIZE:
             nonce = decoder.decode(nonce)
@@ -63,6 +63,8 @@ header data =
         This packet is part of a segmented message
     af: All Flag (AllFlag) Default 0
         Resend all segments not just one
+    zf: Compressed Flag (ZipFlag) Default 0
+        Body is zlib compressed inside the coat
 
     bk: Body kind   (BodyKind) Default 0
     ck: Coat kind   (CoatKind) Default 0
@@ -70,7 +72,7 @@ header data =
     fl: Footer length (FootLen) Default 0
 
     fg: flags  packed (Flags) Default '00' hs
-         2 char Hex string with bits (0, 0, af, sf, 0, wf, bf, cf)
+         2 char Hex string with bits (0, 0, af, sf, zf, wf, bf, cf)
          Zeros are TBD flags
 }
 
@@ -119,7 +121,9 @@ UDP_MAX_PACKET_SIZE = min(1024, UDP_MAX_DATAGRAM_SIZE) # assumes IPV6 capable eq
 UXD_MAX_PACKET_SIZE = (2 ** 16) - 1 # 65535
 MAX_SEGMENT_COUNT = (2 ** 16) - 1 # 65535
 MAX_MESSAGE_SIZE = min(67107840, UDP_MAX_PACKET_SIZE * MAX_SEGMENT_COUNT)
+COMPRESS_LEVEL = 1 # zlib level of body compression favors speed over ratio
 MAX_HEAD_SIZE = 255
+MAX_SACK_BITS = 1024 # max selective ack bitmap bits so segment ack fits one packet
 
 JSON_END = '\r\n\r\n'
 HEAD_END = '\n\n'
@@ -225,6 +229,7 @@ PACKET_DEFAULTS = odict([
                             ('ml', 0),
                             ('sf', False),
                             ('af', False),
+                            ('zf', False),
                             ('bk', 0),
                             ('ck', 0),
                             ('fk', 0),
@@ -235,16 +240,16 @@ PACKET_DEFAULTS = odict([
 PACKET_FIELDS = ['sh', 'sp', 'dh', 'dp',
                  'ri', 'vn', 'pk', 'pl', 'hk', 'hl',
                  'se', 'de', 'cf', 'bf', 'si', 'ti', 'tk',
-                 'dt', 'oi', 'wf', 'sn', 'sc', 'ml', 'sf', 'af',
+                 'dt', 'oi', 'wf', 'sn', 'sc', 'ml', 'sf', 'af', 'zf',
                  'bk', 'ck', 'fk', 'fl', 'fg']
 
 PACKET_HEAD_FIELDS = ['ri', 'vn', 'pk', 'pl', 'hk', 'hl',
                'se', 'de', 'cf', 'bf', 'si', 'ti', 'tk',
-               'dt', 'oi', 'wf', 'sn', 'sc', 'ml', 'sf', 'af',
+               'dt', 'oi', 'wf', 'sn', 'sc', 'ml', 'sf', 'af', 'zf',
                'bk', 'bl', 'ck', 'cl', 'fk', 'fl', 'fg']
 
-PACKET_FLAGS = ['af', 'sf', 'wf', 'bf', 'cf']
-PACKET_FLAG_FIELDS = ['', '', 'af', 'sf', '', 'wf', 'bf', 'cf']
+PACKET_FLAGS = ['af', 'sf', 'zf', 'wf', 'bf', 'cf']
+PACKET_FLAG_FIELDS = ['', '', 'af', 'sf', 'zf', 'wf', 'bf', 'cf']
 
 PACKET_FIELD_FORMATS = odict([
                     ('ri', '.4s'),
@@ -268,6 +273,7 @@ PACKET_FIELD_FORMATS = odict([
                     ('ml', 'x'),
                     ('sf', ''),
                     ('af', ''),
+                    ('zf', ''),
                     ('bk', 'x'),
                     ('ck', 'x'),
                     ('fk', 'x'),
@@ -275,6 +281,30 @@ PACKET_FIELD_FORMATS = odict([
                     ('fg', '.2s'),
               ])
 
+# binary head kind core fields at fixed offsets in network byte order
+# ri vn pk hk hl fg pl bm where bm is bitmap of optional fields present
+PACKET_BINARY_CORE_FORMAT = '!4sBBBBBHH'
+PACKET_BINARY_KIND_OFFSET = 6 # offset of hk in binary head core
+PACKET_BINARY_BITMAP_OFFSET = 11 # offset of bm in binary head core
+
+# binary head optional fields in bitmap bit order, included if not default value
+PACKET_BINARY_FIELD_FORMATS = odict([
+                    ('se', 'I'),
+                    ('de', 'I'),
+                    ('si', 'I'),
+                    ('ti', 'I'),
+                    ('tk', 'B'),
+                    ('dt', 'd'),
+                    ('oi', 'I'),
+                    ('sn', 'H'),
+                    ('sc', 'H'),
+                    ('ml', 'I'),
+                    ('bk', 'B'),
+                    ('ck', 'B'),
+                    ('fk', 'B'),
+                    ('fl', 'B'),
+              ])
+
 # head fields that may be included in page header if not default value
 PAGE_DEFAULTS = odict([
                         ('ri', 'RAET'),
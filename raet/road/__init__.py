@@ -4,7 +4,8 @@ road.raet package
 modules associated with UDP socket communications
 '''
 
-__all__ = ['estating', 'keeping', 'packeting', 'stacking', 'transacting']
+__all__ = ['estating', 'keeping', 'packeting', 'sharding', 'stacking', 'tracing',
+           'transacting', 'beating']
 
 import  importlib
 for m in __all__:
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+'''
+beating.py raet protocol keep alive heartbeats without transactions
+
+A Beater sends and answers alive heartbeats for its road stack without
+creating an Aliver or Alivent transaction per beat. Each remote has a cached
+head data template per direction and at most one outstanding Beat record.
+Redos and timeouts of all the outstanding beats are driven from one deadline
+scheduler. The packets on the wire are the same alive request, ack, and nack
+packets that the Aliver and Alivent transactions send and accept, so a stack
+with a beater interoperates with one without. Heartbeat bodies are empty so
+they are signed but the coat is empty whatever the stack coat kind.
+
+Only the head data is cached, not the packed frame. The transaction id and
+with it the head and packet lengths change on every beat and the signature
+covers the whole head, so each beat is packed and signed anew. Patching a
+cached frame in place would save the head encoding but not the signing.
+
+A Coalescer is a Beater for large rosters. It spreads the heartbeats of the
+remotes that come due in the same tick over part of the period and stretches
+the period as the roster and transmit backlog grow so the heartbeat rate grows
+sublinearly with the number of remotes.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import random
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+
+from .. import raeting
+from .. import scheduling
+from . import packeting
+
+from ..consoling import getConsole
+console = getConsole()
+
+class Beat(object):
+    '''
+    State of one outstanding heartbeat to a remote
+    '''
+    __slots__ = ('uid', 'tid', 'packed', 'cascade', 'duration', 'redo', 'expire')
+
+    def __init__(self, uid, tid, packed, cascade, duration, redo, expire):
+        '''
+        Setup Beat instance
+        '''
+        self.uid = uid # remote estate id
+        self.tid = tid # transaction id of request
+        self.packed = packed # packed request for redo
+        self.cascade = cascade
+        self.duration = duration # current redo backoff duration
+        self.redo = redo # store stamp of next redo
+        self.expire = expire # store stamp of timeout
+
+    @property
+    def deadline(self):
+        '''
+        Property is store stamp of next redo or timeout
+        '''
+        return min(self.redo, self.expire)
+
+class Beater(object):
+    '''
+    Heartbeat engine of a road stack
+    Timeout and redo durations match those of the Aliver transaction
+    '''
+    Timeout = 2.0
+    RedoTimeoutMin = 0.25 # initial redo timeout
+    RedoTimeoutMax = 1.0 # max redo timeout
+
+    def __init__(self, stack, timeout=None, redoTimeoutMin=None, redoTimeoutMax=None):
+        '''
+        Setup Beater instance
+        '''
+        self.stack = stack
+        self.timeout = timeout if timeout is not None else self.Timeout
+        self.redoTimeoutMin = redoTimeoutMin or self.RedoTimeoutMin
+        self.redoTimeoutMax = redoTimeoutMax or self.RedoTimeoutMax
+        self.beats = dict() # outstanding Beat keyed by remote uid
+        self.deadlines = scheduling.Scheduler() # remote uids by beat deadline
+        self.templates = dict() # (key, data) keyed by (rmt, remote uid)
+        self.body = odict() # empty heartbeat body
+
+    def template(self, remote, rmt, sid):
+        '''
+        Returns head data of heartbeat packets to remote with session id sid
+        from the initiator if not rmt else from the correspondent
+        Cached until any of the fields that come from the stack or remote change
+        '''
+        stack = self.stack
+        local = stack.local
+        key = (local.uid, local.host, local.port, remote.host, remote.port, sid,
+               stack.Hk, stack.Bk, stack.Fk, stack.Ck)
+        cached = self.templates.get((rmt, remote.uid))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        data = dict(sh=local.host,
+                    sp=local.port,
+                    dh=remote.host,
+                    dp=remote.port,
+                    se=local.uid,
+                    de=remote.uid,
+                    tk=raeting.trnsKinds.alive,
+                    cf=rmt,
+                    bf=False,
+                    wf=False,
+                    si=sid,
+                    hk=stack.Hk,
+                    bk=stack.Bk,
+                    fk=stack.Fk,
+                    ck=stack.Ck)
+        self.templates[(rmt, remote.uid)] = (key, data)
+        return data
+
+    def pack(self, data, kind, **kwa):
+        '''
+        Returns packed heartbeat packet of kind from template data updated with kwa
+        or None if packing fails
+        '''
+        packet = packeting.TxPacket(stack=self.stack,
+                                    kind=kind,
+                                    embody=self.body,
+                                    data=data)
+        packet.data.update(kwa)
+        try:
+            packet.pack()
+        except raeting.PacketError as ex:
+            console.terse(str(ex) + '\n')
+            self.stack.incStat("packing_error")
+            return None
+        return packet.packed
+
+    def period(self, remote):
+        '''
+        Returns keep alive period of remote
+        '''
+        return remote.period
+
+    def refresh(self, remote, alived=True):
+        '''
+        Restart keep alive timer of remote with its period and set alived
+        '''
+        remote.refresh(alived=alived)
+        period = self.period(remote)
+        if period != remote.period:
+            remote.restartTimer(duration=period)
+
+    def manage(self, remotes, cascade=False, immediate=False):
+        '''
+        Beat each of remotes whose keep alive timer has expired or all if
+        immediate and restart their timers
+        '''
+        for remote in remotes:
+            if immediate or remote.timer.expired:
+                remote.restartTimer(duration=self.period(remote))
+                self.beat(remote, cascade=cascade)
+
+    def beat(self, remote, cascade=False):
+        '''
+        Send heartbeat request to remote replacing any outstanding beat
+        Joins or allows first, as the Aliver does, if remote is not yet joined
+        or allowed
+        '''
+        stack = self.stack
+        self.forget(remote.uid)
+        if not remote.joined:
+            console.terse("Beater {0}. Must be joined first\n", stack.name)
+            stack.incStat('unjoined_remote')
+            stack.join(duid=remote.uid, cascade=cascade)
+            return
+        if not remote.allowed:
+            console.terse("Beater {0}. Must be allowed first\n", stack.name)
+            stack.incStat('unallowed_remote')
+            stack.allow(duid=remote.uid, cascade=cascade)
+            return
+
+        tid = remote.nextTid()
+        packed = self.pack(self.template(remote, False, remote.sid),
+                           raeting.pcktKinds.request,
+                           ti=tid)
+        if packed is None:
+            return
+        remote.alived = None # reset alive status until acked or timed out
+        stamp = stack.store.stamp
+        beat = Beat(uid=remote.uid,
+                    tid=tid,
+                    packed=packed,
+                    cascade=cascade,
+                    duration=self.redoTimeoutMin,
+                    redo=stamp + self.redoTimeoutMin,
+                    expire=stamp + self.timeout)
+        self.beats[remote.uid] = beat
+        self.deadlines.schedule(remote.uid, beat.deadline)
+        stack.tx(packed, remote.uid)
+
+    def forget(self, uid):
+        '''
+        Drop any outstanding beat to remote uid
+        '''
+        if self.beats.pop(uid, None) is not None:
+            self.deadlines.cancel(uid)
+
+    def process(self):
+        '''
+        Redo or time out the outstanding beats whose deadline has passed
+        '''
+        stack = self.stack
+        stamp = stack.store.stamp
+        if stamp is None:
+            return
+        for uid in self.deadlines.expired(stamp):
+            beat = self.beats.get(uid)
+            if beat is None:
+                continue
+            remote = stack.remotes.get(uid)
+            if remote is None:
+                del self.beats[uid]
+                continue
+            if stamp >= beat.expire:
+                del self.beats[uid]
+                self.refresh(remote, alived=False) # mark as dead
+                continue
+            beat.duration = min(max(self.redoTimeoutMin, beat.duration * 2.0),
+                                self.redoTimeoutMax)
+            beat.redo = stamp + beat.duration
+            stack.tx(beat.packed, uid)
+            stack.redoCounter.inc()
+            stack.statCounter('redo_alive').inc()
+            self.deadlines.schedule(uid, beat.deadline)
+
+    def receive(self, packet, remote):
+        '''
+        Returns True if packet answers the outstanding beat to remote and
+        handles it, otherwise False
+        '''
+        if remote is None:
+            return False
+        beat = self.beats.get(remote.uid)
+        data = packet.data
+        if (beat is None or beat.tid != data['ti'] or data['si'] != remote.sid):
+            return False
+        stack = self.stack
+        if not stack.parseInner(packet):
+            return True
+        self.forget(remote.uid)
+        pk = data['pk']
+        if pk == raeting.pcktKinds.ack:
+            self.refresh(remote, alived=True) # restart timer mark as alive
+            stack.statCounter("alive_complete").inc()
+            return True
+        self.refresh(remote, alived=None) # restart timer mark as indeterminate
+        stack.incStat("aliver_transaction_failure")
+        if pk == raeting.pcktKinds.unjoined:
+            remote.joined = False
+            stack.join(duid=remote.uid, cascade=beat.cascade)
+        elif pk == raeting.pcktKinds.unallowed:
+            remote.allowed = False
+            stack.allow(duid=remote.uid, cascade=beat.cascade)
+        return True
+
+    def reply(self, packet, remote):
+        '''
+        Answer heartbeat request packet from remote with ack or with nack
+        when remote is not joined or allowed
+        '''
+        stack = self.stack
+        if not stack.parseInner(packet):
+            return
+        data = packet.data
+        kind = raeting.pcktKinds.ack
+        if not remote.joined:
+            console.terse("Beater {0}. Must be joined first\n", stack.name)
+            stack.incStat('unjoined_alive_attempt')
+            kind = raeting.pcktKinds.unjoined
+        elif not remote.allowed:
+            console.terse("Beater {0}. Must be allowed first\n", stack.name)
+            stack.incStat('unallowed_alive_attempt')
+            kind = raeting.pcktKinds.unallowed
+        packed = self.pack(self.template(remote, True, data['si']),
+                           kind,
+                           bf=data['bf'],
+                           ti=data['ti'])
+        if packed is None:
+            return
+        stack.tx(packed, remote.uid)
+        if kind == raeting.pcktKinds.ack:
+            self.refresh(remote, alived=True)
+            stack.statCounter("alive_complete").inc()
+        else:
+            self.refresh(remote, alived=None) # indeterminate
+            stack.incStat("alivent_transaction_failure")
+
+    @property
+    def deadline(self):
+        '''
+        Property is earliest deadline of outstanding beats or None
+        '''
+        return self.deadlines.deadline
+
+class Coalescer(Beater):
+    '''
+    Heartbeat engine that coalesces the keep alives of large rosters
+
+    The remotes due in one tick are sent in jittered slots spread over
+    spread times the period instead of in one burst. Each timer is restarted
+    with its slot offset so the remotes stay spread in later periods.
+
+    The period is the remote period scaled by (size / knee) ** exponent once
+    the roster size exceeds knee, and by 1 + txes / backlog for the pending
+    transmit backlog, capped at limit. Up to limit the heartbeat rate grows as
+    size ** (1 - exponent).
+
+    jitter is callable that returns a float in [0, 1), default random.random
+    '''
+    Spread = 0.5 # fraction of period over which due heartbeats are spread
+    Knee = 16 # roster size up to which the period is not scaled
+    Exponent = 0.5 # period grows as roster size to this power above knee
+    Backlog = 64 # pending transmits that double the period
+    Limit = 8.0 # max period scale
+
+    def __init__(self, stack, spread=None, knee=None, exponent=None,
+                 backlog=None, limit=None, jitter=None, **kwa):
+        '''
+        Setup Coalescer instance
+        '''
+        super(Coalescer, self).__init__(stack=stack, **kwa)
+        self.spread = spread if spread is not None else self.Spread
+        self.knee = knee if knee is not None else self.Knee
+        self.exponent = exponent if exponent is not None else self.Exponent
+        self.backlog = backlog if backlog is not None else self.Backlog
+        self.limit = limit if limit is not None else self.Limit
+        self.jitter = jitter or random.random
+        self.pending = dict() # cascade of deferred heartbeats keyed by remote uid
+        self.sends = scheduling.Scheduler() # remote uids by deferred send stamp
+
+    @property
+    def scale(self):
+        '''
+        Property is current period scale for roster size and transmit backlog
+        '''
+        size = len(self.stack.remotes)
+        scale = 1.0
+        if size > self.knee:
+            scale = (size / float(self.knee)) ** self.exponent
+        if self.backlog:
+            scale *= 1.0 + len(self.stack.txes) / float(self.backlog)
+        return min(scale, self.limit)
+
+    def period(self, remote):
+        return remote.period * self.scale
+
+    def manage(self, remotes, cascade=False, immediate=False):
+        '''
+        Schedule heartbeats of each of remotes whose keep alive timer has
+        expired or all if immediate in jittered slots spread over the period
+        '''
+        stack = self.stack
+        due = [remote for remote in remotes if immediate or remote.timer.expired]
+        if not due:
+            return
+        stamp = stack.store.stamp
+        scale = self.scale
+        for i, remote in enumerate(due):
+            period = remote.period * scale
+            offset = self.spread * period * (i + self.jitter()) / len(due)
+            remote.restartTimer(duration=period + offset)
+            if not offset or stamp is None:
+                self.beat(remote, cascade=cascade)
+                continue
+            self.pending[remote.uid] = cascade
+            self.sends.schedule(remote.uid, stamp + offset)
+
+    def forget(self, uid):
+        '''
+        Drop any outstanding or deferred beat to remote uid
+        '''
+        super(Coalescer, self).forget(uid)
+        if self.pending.pop(uid, None) is not None:
+            self.sends.cancel(uid)
+
+    def process(self):
+        '''
+        Send the deferred beats whose slot has come then redo or time out the
+        outstanding beats
+        '''
+        stack = self.stack
+        stamp = stack.store.stamp
+        if stamp is not None:
+            for uid in self.sends.expired(stamp):
+                if uid not in self.pending:
+                    continue
+                cascade = self.pending.pop(uid)
+                remote = stack.remotes.get(uid)
+                if remote is not None:
+                    self.beat(remote, cascade=cascade)
+        super(Coalescer, self).process()
+
+    @property
+    def deadline(self):
+        '''
+        Property is earliest deadline of deferred or outstanding beats or None
+        '''
+        deadlines = [deadline for deadline in (self.sends.deadline,
+                                               self.deadlines.deadline)
+                     if deadline is not None]
+        return min(deadlines) if deadlines else None
@@ -16,7 +16,7 @@ from .. import raeting
 from .. import nacling
 from .. import lotting
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
 class Estate(lotting.Lot):
@@ -145,6 +145,7 @@ class RemoteEstate(Estate):
         self.publee = nacling.Publican() # correspondent short term key  manager
         self.verfer = nacling.Verifier(verkey) # correspondent verify key manager
         self.pubber = nacling.Publican(pubkey) # correspondent long term key manager
+        self.box = None # cached box with shared key of privee and publee once allowed
 
         self.rsid = rsid # last sid received from remote when RmtFlag is True
         #self.rtid = rtid # last tid received from remote when RmtFlag is True
@@ -162,6 +163,58 @@ class RemoteEstate(Estate):
         self.timer = aiding.StoreTimer(store=self.stack.store,
                                        duration=duration)
 
+    @property
+    def ha(self):
+        '''
+        property that returns ip address (host, port) tuple
+        '''
+        return (self.host, self.port)
+
+    @ha.setter
+    def ha(self, value):
+        '''
+        Expects value is tuple of (host, port)
+        Keeps stack ha index in sync
+        '''
+        old = (self.host, self.port)
+        self.host, self.port = value
+        if old != value:
+            self.stack.reindexRemote(self, ha=old)
+
+    @property
+    def verfer(self):
+        '''
+        property that returns verifier of correspondent verify key
+        '''
+        return self._verfer
+
+    @verfer.setter
+    def verfer(self, value):
+        '''
+        setter for verfer property. Keeps stack verhex index in sync
+        '''
+        old = self.__dict__.get('_verfer')
+        self._verfer = value
+        if old is not None and old.keyhex != value.keyhex:
+            self.stack.reindexRemote(self, verhex=old.keyhex)
+
+    @property
+    def pubber(self):
+        '''
+        property that returns publican of correspondent long term public key
+        '''
+        return self._pubber
+
+    @pubber.setter
+    def pubber(self, value):
+        '''
+        setter for pubber property. Keeps stack pubhex index in sync
+        '''
+        old = self.__dict__.get('_pubber')
+        self._pubber = value
+        if old is not None and old.keyhex != value.keyhex:
+            self.stack.reindexRemote(self, pubhex=old.keyhex)
+
     def rekey(self):
         '''
         Regenerate short term keys
@@ -169,6 +222,23 @@ class RemoteEstate(Estate):
         self.allowed = None
         self.privee = nacling.Privateer() # short term key
         self.publee = nacling.Publican() # correspondent short term key  manager
+        self.box = None
+
+    def enbox(self):
+        '''
+        Precompute and cache .box with the shared key generated from the
+        short term keys .privee and .publee.
+        Called when allow handshake completes. Discarded by .rekey
+        '''
+        self.box = self.privee.box(self.publee.key)
+
+    @property
+    def boxer(self):
+        '''
+        property that returns cached .box if any otherwise .publee.key
+        suitable for the pubkey parameter of .privee encrypt or decrypt
+        '''
+        return (self.box or self.publee.key)
 
     def validRsid(self, rsid):
         '''
@@ -179,11 +249,20 @@ class RemoteEstate(Estate):
         '''
         return self.validSid(new=rsid, old=self.rsid)
 
+    def restartTimer(self, duration=None):
+        '''
+        Restart presence heartbeat timer with duration default .period
+        and reschedule self on the stack at the new deadline
+        '''
+        self.timer.restart(duration=duration if duration is not None else self.period)
+        if self.stack.remotes.get(self.uid) is self:
+            self.stack.scheduleRemote(self)
+
     def refresh(self, alived=True):
         '''
         Restart presence heartbeat timer
         '''
-        self.timer.restart(duration=self.period)
+        self.restartTimer()
         self.alived = alived
 
     def manage(self, cascade=False, immediate=False):
@@ -191,6 +270,6 @@ class RemoteEstate(Estate):
         Perform time based processing of keep alive heatbeat
         '''
         if immediate or self.timer.expired:
-            self.timer.restart(duration=self.period)
+            self.restartTimer()
             self.stack.alive(duid=self.uid, cascade=cascade)
 
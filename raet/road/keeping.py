@@ -22,7 +22,7 @@ from .. import raeting
 from .. import nacling
 from .. import keeping
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
 class RoadKeep(keeping.Keep):
@@ -6,6 +6,8 @@ packeting module provides classes for Raet packets
 '''
 
 # Import python libs
+import struct
+import zlib
 from collections import Mapping
 try:
     import simplejson as json
@@ -15,22 +17,128 @@ except ImportError:
 try:
     import msgpack
 except ImportError:
-    mspack = None
+    msgpack = None
 
 # Import ioflo libs
 from ioflo.base.odicting import odict
-from ioflo.base.aiding import packByte, unpackByte
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
-from .. import raeting
+from .. import raeting, coding
+
+def _raetHeadEncoder(key, fmt):
+    '''
+    Returns encoder closure that formats val as raet head line for field key
+    '''
+    return "{0} {{0:{1}}}".format(key, fmt).format
+
+def _jsonHeadEncoder(key, fmt):
+    '''
+    Returns encoder closure that formats val as json head member for field key
+    '''
+    prefix = '"{0}":'.format(key)
+    if fmt.endswith('x'):  # integer field so skip json for exact int values
+        def encoder(val):
+            if val.__class__ is int or val.__class__ is long:
+                return "{0}{1:d}".format(prefix, val)
+            return "{0}{1}".format(prefix, json.dumps(val))
+    else:
+        def encoder(val):
+            return "{0}{1}".format(prefix, json.dumps(val, encoding='ascii'))
+    return encoder
+
+def _raetHeadDecoder(fmt):
+    '''
+    Returns decoder that converts raet head line value string given fmt
+    '''
+    if 'x' in fmt:
+        return lambda val: int(val, 16)
+    if 'd' in fmt:
+        return int
+    if 'f' in fmt:
+        return float
+    return str
+
+# compiled head codec tables generated once from raeting.PACKET_FIELD_FORMATS
+HEAD_FIELDS = frozenset(raeting.PACKET_HEAD_FIELDS)
+HEAD_FLAGS = frozenset(raeting.PACKET_FLAGS)
+HEAD_CORE_FIELDS = frozenset(['ri', 'pl', 'hl'])  # always in head
+# optional (field, default) in head order. Field included if value not default
+HEAD_DEFAULTS = tuple((k, v) for k, v in raeting.PACKET_DEFAULTS.items()
+                      if (k in HEAD_FIELDS and
+                          k not in HEAD_FLAGS and
+                          k not in HEAD_CORE_FIELDS))
+# (field, mask) of flag fields in flags byte
+HEAD_FLAG_MASKS = tuple((field, 1 << (7 - i))
+                        for i, field in enumerate(raeting.PACKET_FLAG_FIELDS)
+                        if field)
+
+RAET_HEAD_ENCODERS = dict((k, _raetHeadEncoder(k, fmt))
+                          for k, fmt in raeting.PACKET_FIELD_FORMATS.items()
+                          if k not in HEAD_FLAGS)
+RAET_HEAD_DECODERS = dict((k, _raetHeadDecoder(fmt))
+                          for k, fmt in raeting.PACKET_FIELD_FORMATS.items()
+                          if k in HEAD_FIELDS)
+RAET_HEAD_PREFIX = "{0}\n{1}\n{2}".format(RAET_HEAD_ENCODERS['ri']('RAET'),
+                                          RAET_HEAD_ENCODERS['pl'](0),
+                                          RAET_HEAD_ENCODERS['hl'](0))
+RAET_HEAD_PREFIX_SIZE = len(RAET_HEAD_PREFIX)
+
+JSON_HEAD_ENCODERS = dict((k, _jsonHeadEncoder(k, fmt))
+                          for k, fmt in raeting.PACKET_FIELD_FORMATS.items()
+                          if k not in HEAD_FLAGS)
+# json head pl and hl are fixed length hex strings
+JSON_HEAD_PREFIX = '{{"ri":"RAET","pl":"{0:07x}","hl":"{1:02x}"'
+JSON_HEAD_PREFIX_SIZE = len(JSON_HEAD_PREFIX.format(0, 0))
+
+BINARY_HEAD_CORE_PACKER = struct.Struct(raeting.PACKET_BINARY_CORE_FORMAT)
+BINARY_HEAD_BITMAP_PACKER = struct.Struct('!H')
+# optional (field, default, bit) in bitmap order. Field included if not default
+BINARY_HEAD_DEFAULTS = tuple((k, raeting.PACKET_DEFAULTS[k], 1 << i)
+                    for i, k in enumerate(raeting.PACKET_BINARY_FIELD_FORMATS))
+BINARY_HEAD_CODECS = dict() # precompiled (packer, fields) keyed by bitmap
+
+def cloneData(data):
+    '''
+    Returns shallow copy of odict data with the same key order
+    Avoids the per key order membership check of odict(data)
+    '''
+    clone = odict.__new__(odict)
+    dict.update(clone, data)
+    clone._keys = data.keys()
+    return clone
+
+def binaryHeadCodec(bitmap):
+    '''
+    Returns duple of (packer, fields) for binary head with optional fields
+    given by bitmap where packer is precompiled struct.Struct and fields is
+    tuple of optional field names in packed order.
+    Compiles and caches on first use.
+    Raises PacketError if bitmap has bits for unknown fields
+    '''
+    codec = BINARY_HEAD_CODECS.get(bitmap)
+    if codec is None:
+        if bitmap >> len(raeting.PACKET_BINARY_FIELD_FORMATS):
+            emsg = "Unknown head field in bitmap '{0:04x}'".format(bitmap)
+            raise raeting.PacketError(emsg)
+        fmt = [raeting.PACKET_BINARY_CORE_FORMAT]
+        fields = []
+        for i, (k, f) in enumerate(raeting.PACKET_BINARY_FIELD_FORMATS.items()):
+            if bitmap & (1 << i):
+                fmt.append(f)
+                fields.append(k)
+        codec = (struct.Struct(''.join(fmt)), tuple(fields))
+        BINARY_HEAD_CODECS[bitmap] = codec
+    return codec
 
 class Part(object):
     '''
     Base class for parts of a RAET packet
     Should be subclassed
+    Parts are slotted so subclasses must also declare __slots__
     '''
+    __slots__ = ('packet', 'packed')
 
     def __init__(self, packet=None, **kwa):
         '''
@@ -57,6 +165,8 @@ class Head(Part):
     RAET protocol packet header class
     Manages the header portion of a packet
     '''
+    __slots__ = ()
+
     def __init__(self, **kwa):
         '''
         Setup Head instance
@@ -67,6 +177,8 @@ class TxHead(Head):
     '''
     RAET protocol transmit packet header class
     '''
+    __slots__ = ()
+
     def pack(self):
         '''
         Composes .packed, which is the packed form of this part
@@ -74,90 +186,200 @@ class TxHead(Head):
         self.packed = ''
         data = self.packet.data  # for speed
         data['fl'] = self.packet.foot.size
-        data['fg'] = "{0:02x}".format(self.packFlags())
-
-        # kit always includes raet id, packet length, and header kind fields
-        kit = odict([('ri', 'RAET'), ('pl', 0), ('hl', 0)])
-        for k, v in raeting.PACKET_DEFAULTS.items():  # include if not equal to default
-            if ((k in raeting.PACKET_HEAD_FIELDS) and
-                (k not in raeting.PACKET_FLAGS) and
-                (data[k] != v)):
-                kit[k] = data[k]
-
-        if data['hk'] == raeting.headKinds.raet:
-            packed = ''
-            lines = []
-            for k, v in kit.items():
-                lines.append("{key} {val:{fmt}}".format(
-                        key=k, val=v, fmt=raeting.PACKET_FIELD_FORMATS[k]))
-
-            packed = "\n".join(lines)
-            packed = '{0}{1}'.format(packed, raeting.HEAD_END)
-            hl = len(packed)
-            if hl > raeting.MAX_HEAD_SIZE:
-                emsg = "Head length of {0}, exceeds max of {1}".format(hl, MAX_HEAD_SIZE)
-                raise raeting.PacketError(emsg)
-            data['hl'] = hl
-
-            if self.packet.coat.size > raeting.MAX_MESSAGE_SIZE:
-                emsg = "Packed message length of {0}, exceeds max of {1}".format(
-                         self.packet.coat.size, raeting.MAX_MESSAGE_SIZE)
-                raise raeting.PacketError(emsg)
-            pl = hl + self.packet.coat.size + data['fl']
-            data['pl'] = pl
+        flags = self.packFlags()
+        data['fg'] = "{0:02x}".format(flags)
+        hk = data['hk']
+
+        if hk == raeting.headKinds.binary:
+            self.packBinary(flags)
+            return
+
+        # raet id, packet length, and header length fields always included
+        fields = [(k, data[k]) for k, v in HEAD_DEFAULTS if data[k] != v]
+
+        if hk == raeting.headKinds.raet:
+            rest = "\n".join([RAET_HEAD_ENCODERS[k](v) for k, v in fields])
+            hl = (RAET_HEAD_PREFIX_SIZE + (len(rest) + 1 if rest else 0) +
+                  len(raeting.HEAD_END))
+            pl = self.packLengths(hl)
             # Tray checks for packet length greater than UDP_MAX_PACKET_SIZE
             # and segments appropriately so pl may be truncated below in this case
-            # substitute true lengths
-            packed = packed.replace('\npl {val:{fmt}}\n'.format(
-                                        val=kit['pl'],
-                                        fmt=raeting.PACKET_FIELD_FORMATS['pl']),
-                                    '\npl {0}\n'.format("{val:{fmt}}".format(
-                                        val=pl,
-                                        fmt=raeting.PACKET_FIELD_FORMATS['pl'])[-4:]),
-                                    1)
-            packed = packed.replace('\nhl {val:{fmt}}\n'.format(
-                                        val=kit['hl'],
-                                        fmt=raeting.PACKET_FIELD_FORMATS['hl']),
-                                    '\nhl {0}\n'.format("{val:{fmt}}".format(
-                                            val=hl,
-                                            fmt=raeting.PACKET_FIELD_FORMATS['hl'])[-2:]),
-                                    1)
-            self.packed = packed
+            lines = [RAET_HEAD_ENCODERS['ri']('RAET'),
+                     RAET_HEAD_ENCODERS['pl'](pl & 0xffff),
+                     RAET_HEAD_ENCODERS['hl'](hl)]
+            if rest:
+                lines.append(rest)
+            self.packed = '{0}{1}'.format("\n".join(lines), raeting.HEAD_END)
+
+        elif hk == raeting.headKinds.json:
+            rest = ",".join([JSON_HEAD_ENCODERS[k](v) for k, v in fields])
+            hl = (JSON_HEAD_PREFIX_SIZE + (len(rest) + 1 if rest else 0) + 1 +
+                  len(raeting.JSON_END))
+            pl = self.packLengths(hl)
+            front = JSON_HEAD_PREFIX.format(pl & 0xfffffff, hl)
+            if rest:
+                self.packed = '{0},{1}}}{2}'.format(front, rest, raeting.JSON_END)
+            else:
+                self.packed = '{0}}}{1}'.format(front, raeting.JSON_END)
+
+    def packLengths(self, hl):
+        '''
+        Validates head length hl and coat size. Updates .packet.data with
+        hl and computed packet length pl. Returns pl
+        '''
+        if hl > raeting.MAX_HEAD_SIZE:
+            emsg = "Head length of {0}, exceeds max of {1}".format(
+                    hl, raeting.MAX_HEAD_SIZE)
+            raise raeting.PacketError(emsg)
+
+        if self.packet.coat.size > raeting.MAX_MESSAGE_SIZE:
+            emsg = "Packed message length of {0}, exceeds max of {1}".format(
+                     self.packet.coat.size, raeting.MAX_MESSAGE_SIZE)
+            raise raeting.PacketError(emsg)
+        data = self.packet.data
+        data['hl'] = hl
+        pl = hl + self.packet.coat.size + data['fl']
+        data['pl'] = pl
+        return pl
+
+    def packBinary(self, flags):
+        '''
+        Composes .packed for binary head kind with single pack of precompiled
+        struct given by bitmap of optional fields that are not default
+        '''
+        data = self.packet.data  # for speed
+        bitmap = 0
+        values = []
+        for k, v, bit in BINARY_HEAD_DEFAULTS:
+            if data[k] != v:
+                bitmap |= bit
+                values.append(data[k])
+
+        packer, fields = binaryHeadCodec(bitmap)
+        pl = self.packLengths(packer.size)
+        # Tray checks for packet length greater than UDP_MAX_PACKET_SIZE
+        # and segments appropriately so pl may be truncated below in this case
+        try:
+            self.packed = packer.pack(data['ri'], data['vn'], data['pk'],
+                                      data['hk'], packer.size, flags,
+                                      pl & 0xffff, bitmap, *values)
+        except struct.error as ex:
+            emsg = "Invalid binary head field value. {0}".format(ex)
+            raise raeting.PacketError(emsg)
 
-        elif data['hk'] == raeting.headKinds.json:
-            kit['pl'] = '0000000'  # need hex string so fixed length and jsonable
-            kit['hl'] = '00'  # need hex string so fixed length and jsonable
-            packed = json.dumps(kit, separators=(',', ':'), encoding='ascii',)
-            packed = '{0}{1}'.format(packed, raeting.JSON_END)
-            hl = len(packed)
+    def segmenter(self):
+        '''
+        Returns head template function for the segments of .packet.data
+        Segment heads differ only in the sn, hl, and pl fields so all the other
+        fields are encoded here once.
+        The function given segment number sn and segment coat size cs returns
+        the triple (packed, hl, pl) of the packed head, head length, and
+        packet length of that segment.
+        '''
+        data = self.packet.data  # for speed
+        data['fl'] = fl = self.packet.foot.size
+        flags = self.packFlags()
+        data['fg'] = "{0:02x}".format(flags)
+        hk = data['hk']
+
+        if hk == raeting.headKinds.binary:
+            bitmap = 0
+            snbit = 0
+            befores = []
+            afters = []
+            for k, v, bit in BINARY_HEAD_DEFAULTS:
+                if k == 'sn':
+                    snbit = bit
+                elif data[k] != v:
+                    bitmap |= bit
+                    (afters if snbit else befores).append(data[k])
+            core = (data['ri'], data['vn'], data['pk'], data['hk'])
+            packers = (binaryHeadCodec(bitmap)[0],
+                       binaryHeadCodec(bitmap | snbit)[0])
+
+            def segment(sn, cs):
+                if sn:
+                    packer = packers[1]
+                    values = befores + [sn] + afters
+                    bm = bitmap | snbit
+                else:
+                    packer = packers[0]
+                    values = befores + afters
+                    bm = bitmap
+                hl = packer.size
+                pl = hl + cs + fl
+                try:
+                    packed = packer.pack(*(core + (hl, flags, pl & 0xffff, bm) +
+                                           tuple(values)))
+                except struct.error as ex:
+                    emsg = "Invalid binary head field value. {0}".format(ex)
+                    raise raeting.PacketError(emsg)
+                return (packed, hl, pl)
+
+            return segment
+
+        names = [k for k, v in HEAD_DEFAULTS if k == 'sn' or data[k] != v]
+        i = names.index('sn')
+        if hk == raeting.headKinds.raet:
+            encoders = RAET_HEAD_ENCODERS
+            sep = "\n"
+        elif hk == raeting.headKinds.json:
+            encoders = JSON_HEAD_ENCODERS
+            sep = ","
+        else:
+            emsg = "Unrecognizable packet head."
+            raise raeting.PacketError(emsg)
+        befores = [encoders[k](data[k]) for k in names[:i]]
+        afters = [encoders[k](data[k]) for k in names[i + 1:]]
+        sner = encoders['sn']
+
+        def segment(sn, cs):
+            rest = sep.join(befores + [sner(sn)] + afters if sn else
+                            befores + afters)
+            if hk == raeting.headKinds.raet:
+                hl = (RAET_HEAD_PREFIX_SIZE + (len(rest) + 1 if rest else 0) +
+                      len(raeting.HEAD_END))
+                pl = hl + cs + fl
+                lines = [encoders['ri']('RAET'),
+                         encoders['pl'](pl & 0xffff),
+                         encoders['hl'](hl)]
+                if rest:
+                    lines.append(rest)
+                packed = '{0}{1}'.format("\n".join(lines), raeting.HEAD_END)
+            else:
+                hl = (JSON_HEAD_PREFIX_SIZE + (len(rest) + 1 if rest else 0) + 1 +
+                      len(raeting.JSON_END))
+                pl = hl + cs + fl
+                front = JSON_HEAD_PREFIX.format(pl & 0xfffffff, hl)
+                if rest:
+                    packed = '{0},{1}}}{2}'.format(front, rest, raeting.JSON_END)
+                else:
+                    packed = '{0}}}{1}'.format(front, raeting.JSON_END)
             if hl > raeting.MAX_HEAD_SIZE:
-                emsg = "Head length of {0}, exceeds max of {1}".format(hl, MAX_HEAD_SIZE)
+                emsg = "Head length of {0}, exceeds max of {1}".format(
+                        hl, raeting.MAX_HEAD_SIZE)
                 raise raeting.PacketError(emsg)
-            data['hl'] = hl
+            return (packed, hl, pl)
 
-            if self.packet.coat.size > raeting.MAX_MESSAGE_SIZE:
-                emsg = "Packed message length of {0}, exceeds max of {1}".format(
-                         self.packet.coat.size, raeting.MAX_MESSAGE_SIZE)
-                raise raeting.PacketError(emsg)
-            pl = hl + self.packet.coat.size + data['fl']
-            data['pl'] = pl
-            #substitute true length converted to 2 byte hex string
-            packed = packed.replace('"pl":"0000000"', '"pl":"{0}"'.format("{0:07x}".format(pl)[-7:]), 1)
-            self.packed = packed.replace('"hl":"00"', '"hl":"{0}"'.format("{0:02x}".format(hl)[-2:]), 1)
+        return segment
 
     def packFlags(self):
         '''
-        Packs all the flag fields into a single two char hex string
+        Packs all the flag fields into a single byte
         '''
-        values = []
-        for field in raeting.PACKET_FLAG_FIELDS:
-            values.append(1 if self.packet.data.get(field, 0) else 0)
-        return packByte(fmt='11111111', fields=values)
+        data = self.packet.data
+        flags = 0
+        for field, mask in HEAD_FLAG_MASKS:
+            if data.get(field):
+                flags |= mask
+        return flags
 
 class RxHead(Head):
     '''
     RAET protocol receive packet header class
     '''
+    __slots__ = ()
+
     def parse(self):
         '''
         From .packed.packed, Detects head kind. Unpacks head. Parses head and updates
@@ -176,16 +398,11 @@ class RxHead(Head):
             lines = front.split('\n')
             for line in lines:
                 key, val = line.split(' ')
-                if key not in raeting.PACKET_HEAD_FIELDS:
+                decoder = RAET_HEAD_DECODERS.get(key)
+                if decoder is None:
                     emsg = "Unknown head field '{0}'".format(key)
                     raise raeting.PacketError(emsg)
-                if 'x' in raeting.PACKET_FIELD_FORMATS[key]:
-                    val = int(val, 16)
-                elif 'd' in raeting.PACKET_FIELD_FORMATS[key]:
-                    val = int(val)
-                elif 'f' in raeting.PACKET_FIELD_FORMATS[key]:
-                    val = float(val)
-                kit[key] = val
+                kit[key] = decoder(val)
 
             data.update(kit)
             if 'fg' in data:
@@ -232,25 +449,70 @@ class RxHead(Head):
                 raise raeting.PacketError(emsg)
             data['pl'] = pl
 
+        elif (packed.startswith('RAET') and
+                len(packed) >= BINARY_HEAD_CORE_PACKER.size and
+                ord(packed[raeting.PACKET_BINARY_KIND_OFFSET]) ==
+                        raeting.headKinds.binary): # binary head
+            self.parseBinary()
+
         else:  # notify unrecognizable packet head
             data['hk'] = raeting.headKinds.unknown
             emsg = "Unrecognizable packet head."
             raise raeting.PacketError(emsg)
 
+    def parseBinary(self):
+        '''
+        Parses binary head kind from .packet.packed with single unpack of
+        precompiled struct given by bitmap of optional fields
+        '''
+        data = self.packet.data  # for speed
+        packed = self.packet.packed  # for speed
+
+        bitmap, = BINARY_HEAD_BITMAP_PACKER.unpack_from(packed,
+                                        raeting.PACKET_BINARY_BITMAP_OFFSET)
+        packer, fields = binaryHeadCodec(bitmap)
+        if len(packed) < packer.size:
+            emsg = "Packet length = {0} less than head length = {1}".format(
+                    len(packed), packer.size)
+            raise raeting.PacketError(emsg)
+        values = packer.unpack_from(packed)
+        self.packed = packed[:packer.size]
+
+        (data['ri'], data['vn'], data['pk'], data['hk'],
+                hl, flags, pl, bitmap) = values[:8]
+        data.update(zip(fields, values[8:]))
+        data['fg'] = "{0:02x}".format(flags)
+        self.unpackFlags(data['fg'])
+
+        if hl != self.size:
+            emsg = 'Actual head length = {0} not match head field = {1}'.format(
+                    self.size, hl)
+            raise raeting.PacketError(emsg)
+        data['hl'] = hl
+
+        if pl != self.packet.size:
+            emsg = 'Actual packet length = {0} not match head field = {1}'.format(
+                self.packet.size, pl)
+            raise raeting.PacketError(emsg)
+        data['pl'] = pl
+
     def unpackFlags(self, flags):
         '''
         Unpacks all the flag fields from a single two char hex string
         '''
-        values = unpackByte(fmt='11111111', byte=int(flags, 16), boolean=True)
-        for i, field in enumerate(raeting.PACKET_FLAG_FIELDS):
-            if field in self.packet.data:
-                self.packet.data[field] = values[i]
+        data = self.packet.data
+        flags = int(flags, 16)
+        for field, mask in HEAD_FLAG_MASKS:
+            if field in data:
+                data[field] = True if flags & mask else False
 
 class Body(Part):
     '''
     RAET protocol packet body class
     Manages the message portion of the packet
     '''
+    __slots__ = ('data', )
+
     def __init__(self, data=None, **kwa):
         '''
         Setup Body instance
@@ -264,69 +526,67 @@ class TxBody(Body):
     '''
     RAET protocol tx packet body class
     '''
+    __slots__ = ()
+
     def pack(self):
         '''
         Composes .packed, which is the packed form of this part
         '''
-        self.packed = ''
-        bk = self.packet.data['bk']
-        if bk == raeting.bodyKinds.json:
-            if self.data:
-                self.packed = json.dumps(self.data, separators=(',', ':'))
-        elif bk == raeting.bodyKinds.msgpack:
-            if self.data:
-                if not msgpack:
-                    emsg = "Msgpack not installed."
-                    raise raeting.PacketError(emsg)
-                self.packed = msgpack.dumps(self.data)
-        elif bk == raeting.bodyKinds.raw:
-            self.packed = self.data # data is already formatted string
+        self.packed = coding.fetch(self.packet.data['bk']).pack(self.data)
 
 class RxBody(Body):
     '''
     RAET protocol rx packet body class
+    Decoding of .packed is deferred until .data is first read
     '''
+    __slots__ = ('codec', '_data')
+
+    def __init__(self, **kwa):
+        '''
+        Setup RxBody instance
+        '''
+        self.codec = None
+        self._data = None
+        super(RxBody, self).__init__(**kwa)
+
+    @property
+    def data(self):
+        '''
+        Property that returns body data decoding .packed on first read
+        Decodes to plain dicts instead of odicts when the stack is plain
+        Raises PacketError if .packed cannot be decoded
+        '''
+        if self._data is None:
+            stack = self.packet.stack if self.packet else None
+            plain = getattr(stack, 'plain', False)
+            self._data = self.codec.unpack(self.packed, plain=plain)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        ''' setter for data property '''
+        self._data = value
+
     def parse(self):
         '''
         Parses body. Assumes already unpacked.
-        Results in updated .data
+        Selects codec for body kind and resets .data for lazy decode
         '''
         bk = self.packet.data['bk']
-
-        if bk not in raeting.BODY_KIND_NAMES:
+        try:
+            self.codec = coding.fetch(bk)
+        except raeting.PacketError:
             self.packet.data['bk']= raeting.bodyKinds.unknown
-            emsg = "Unrecognizable packet body."
-            raise raeting.PacketError(emsg)
-
-        self.data = odict()
-
-        if bk == raeting.bodyKinds.json:
-            if self.packed:
-                kit = json.loads(self.packed, object_pairs_hook=odict)
-                if not isinstance(kit, Mapping):
-                    emsg = "Packet body not a mapping."
-                    raise raeting.PacketError(emsg)
-                self.data = kit
-        elif bk == raeting.bodyKinds.msgpack:
-            if self.packed:
-                if not msgpack:
-                    emsg = "Msgpack not installed."
-                    raise raeting.PacketError(emsg)
-                kit = msgpack.loads(self.packed, object_pairs_hook=odict)
-                if not isinstance(kit, Mapping):
-                    emsg = "Packet body not a mapping."
-                    raise raeting.PacketError(emsg)
-                self.data = kit
-        elif bk == raeting.bodyKinds.raw:
-            self.data = self.packed # return as string
-        elif bk == raeting.bodyKinds.nada:
-            pass
+            raise
+        self._data = None
 
 class Coat(Part):
     '''
     RAET protocol packet coat class
     Supports encapsulated encrypt/decrypt of body portion of packet
     '''
+    __slots__ = ()
+
     def __init__(self, **kwa):
         ''' Setup Coat instance'''
         super(Coat, self).__init__(**kwa)
@@ -335,29 +595,51 @@ class TxCoat(Coat):
     '''
     RAET protocol tx packet coat class
     '''
+    __slots__ = ()
+
     def pack(self):
         '''
         Composes .packed, which is the packed form of this part
         '''
         self.packed = ''
         ck = self.packet.data['ck']
+        msg = self.compress(self.packet.body.packed)
 
         if ck == raeting.coatKinds.nacl:
-            msg = self.packet.body.packed
             if msg:
                 cipher, nonce = self.packet.encrypt(msg)
                 self.packed = "".join([cipher, nonce])
 
         if ck == raeting.coatKinds.nada:
-            self.packed = self.packet.body.packed
+            self.packed = msg
+
+    def compress(self, msg):
+        '''
+        Returns msg compressed with zlib when msg is at least as long as the
+        stack compress threshold and compression makes it shorter
+        Otherwise returns msg unchanged. Updates the zf flag to match
+        '''
+        data = self.packet.data
+        data['zf'] = False
+        threshold = getattr(self.packet.stack, 'compress', 0)
+        if not threshold or len(msg) < threshold:
+            return msg
+        zipped = zlib.compress(msg, raeting.COMPRESS_LEVEL)
+        if len(zipped) >= len(msg):
+            return msg
+        data['zf'] = True
+        return zipped
 
 class RxCoat(Coat):
     '''
     RAET protocol rx packet coat class
     '''
-    def parse(self):
+    __slots__ = ()
+
+    def parse(self, boxer=None):
         '''
         Parses coat. Assumes already unpacked.
+        boxer is optional Box to decrypt with instead of the remote's
         '''
         ck = self.packet.data['ck']
 
@@ -369,22 +651,44 @@ class RxCoat(Coat):
         if ck == raeting.coatKinds.nacl:
             if self.packed:
                 tl = raeting.tailSizes.nacl # nonce length
-                cipher = self.packed[:-tl]
-                nonce = self.packed[-tl:]
-                msg = self.packet.decrypt(cipher, nonce)
-                self.packet.body.packed = msg
+                view = memoryview(self.packed) # packed may be reassembly buffer
+                cipher = view[:-tl].tobytes()
+                nonce = view[-tl:].tobytes()
+                msg = self.packet.decrypt(cipher, nonce, boxer=boxer)
+                self.packet.body.packed = self.decompress(msg)
             else:
-                self.packet.body.packed = self.packed
+                self.packet.body.packed = ''
 
         if ck == raeting.coatKinds.nada:
-            self.packet.body.packed = self.packed
-            pass
+            self.packet.body.packed = self.decompress(bytes(self.packed))
+
+    def decompress(self, msg):
+        '''
+        Returns msg decompressed with zlib when the zf flag is set
+        Otherwise returns msg unchanged
+        Raises PacketError if msg is not valid or inflates beyond max message size
+        '''
+        if not self.packet.data['zf']:
+            return msg
+        inflater = zlib.decompressobj()
+        try:
+            msg = inflater.decompress(msg, raeting.MAX_MESSAGE_SIZE)
+        except zlib.error as ex:
+            emsg = "Invalid compressed packet body. {0}".format(ex)
+            raise raeting.PacketError(emsg)
+        if inflater.unconsumed_tail:
+            emsg = "Decompressed packet body exceeds max of {0}".format(
+                    raeting.MAX_MESSAGE_SIZE)
+            raise raeting.PacketError(emsg)
+        return msg
 
 class Foot(Part):
     '''
     RAET protocol packet foot class
     Manages the signing or authentication of the packet
     '''
+    __slots__ = ()
+
     def __init__(self, **kwa):
         '''
         Setup Foot instance
@@ -395,6 +699,7 @@ class TxFoot(Foot):
     '''
     RAET protocol transmit packet foot class
     '''
+    __slots__ = ()
 
     def pack(self):
         '''
@@ -434,9 +739,12 @@ class RxFoot(Foot):
     '''
     RAET protocol receive packet foot class
     '''
-    def parse(self):
+    __slots__ = ()
+
+    def parse(self, verify=True):
         '''
         Parses foot. Assumes foot already unpacked
+        If verify then verifies signature otherwise caller must call .verify
         '''
         fk = self.packet.data['fk']
         fl = self.packet.data['fl']
@@ -459,28 +767,48 @@ class RxFoot(Foot):
                     "kind size '{1}'".format(self.size, raeting.footSizes.nacl))
                 raise raeting.PacketError(emsg)
 
-            signature = self.packed
-            blank = "".rjust(raeting.footSizes.nacl, '\x00')
-
-            front = self.packet.packed[:self.packet.size - fl]
-
-            msg = "".join([front, blank])
-            if not self.packet.verify(signature, msg):
-                emsg = "Failed verification"
-                raise raeting.PacketError(emsg)
+            if verify:
+                self.verify()
 
         if fk == raeting.footKinds.nada:
             pass
 
+    def message(self):
+        '''
+        Returns bytearray of the signed message which is the packet with the
+        signature blanked. Copies .packet.packed once
+        '''
+        fl = self.packet.data['fl']
+        msg = bytearray(self.packet.packed)
+        msg[len(msg) - fl:] = bytearray(fl)
+        return msg
+
+    def verify(self):
+        '''
+        Verifies signature of nacl foot
+        Raises PacketError if fails
+        '''
+        if not self.packet.verify(self.packed, self.message()):
+            emsg = "Failed verification"
+            raise raeting.PacketError(emsg)
+
 class Packet(object):
     '''
     RAET protocol packet object
+    Packets are slotted so subclasses must also declare __slots__
+
+    Packets are not pooled and .data stays an odict clone of PACKET_DEFAULTS.
+    Received packets are held by transactions as rxPacket past the service pass
+    that parsed them so the stack cannot tell when one is free for reuse, and
+    code iterating .data relies on the field order of the odict.
     '''
+    __slots__ = ('stack', 'packed', 'data', 'head', 'body', 'coat', 'foot')
+
     def __init__(self, stack=None, data=None, kind=None):
         ''' Setup Packet instance. Meta data for a packet. '''
         self.stack = stack
         self.packed = ''  # packed string
-        self.data = odict(raeting.PACKET_DEFAULTS)
+        self.data = cloneData(raeting.PACKET_DEFAULTS)
         if data:
             self.data.update(data)
         if kind:
@@ -509,7 +837,7 @@ class Packet(object):
         '''
         Refresh .data to defaults and update if data
         '''
-        self.data = odict(raeting.PACKET_DEFAULTS)
+        self.data = cloneData(raeting.PACKET_DEFAULTS)
         if data:
             self.data.update(data)
         return self  # so can method chain
@@ -518,6 +846,8 @@ class TxPacket(Packet):
     '''
     RAET Protocol Transmit Packet object
     '''
+    __slots__ = ()
+
     def __init__(self, embody=None, **kwa):
         '''
         Setup TxPacket instance
@@ -542,11 +872,12 @@ class TxPacket(Packet):
             re = (data['dh'], data['dp'])
         return ((data['cf'], le, re, data['si'], data['ti'], data['bf']))
 
-    def signature(self, msg):
+    def signature(self, msg, size=None):
         '''
         Return signature resulting from signing msg
+        If msg is a bytearray buffer then sign only its leading size bytes
         '''
-        return (self.stack.local.signer.signature(msg))
+        return (self.stack.local.signer.signature(msg, size=size))
 
     def sign(self):
         '''
@@ -563,7 +894,7 @@ class TxPacket(Packet):
         with short term keys
         '''
         remote = self.stack.remotes[self.data['de']]
-        return (remote.privee.encrypt(msg, remote.publee.key))
+        return (remote.privee.encrypt(msg, remote.boxer))
 
     def prepack(self):
         '''
@@ -595,6 +926,8 @@ class RxPacket(Packet):
     '''
     RAET Protocol Receive Packet object
     '''
+    __slots__ = ('boxed', )
+
     def __init__(self, packed=None, **kwa):
         '''
         Setup RxPacket instance
@@ -605,6 +938,7 @@ class RxPacket(Packet):
         self.coat = RxCoat(packet=self)
         self.foot = RxFoot(packet=self)
         self.packed = packed or ''
+        self.boxed = None # session box coat was already decrypted with if any
 
     @property
     def index(self):
@@ -628,13 +962,13 @@ class RxPacket(Packet):
             return False
         return (self.stack.remotes[self.data['se']].verfer.verify(signature, msg))
 
-    def decrypt(self, cipher, nonce):
+    def decrypt(self, cipher, nonce, boxer=None):
         '''
         Return msg resulting from decrypting cipher and nonce
-        with short term keys
+        with short term keys or with boxer if provided
         '''
         remote = self.stack.remotes[self.data['se']]
-        return (remote.privee.decrypt(cipher, nonce, remote.publee.key))
+        return (remote.privee.decrypt(cipher, nonce, boxer or remote.boxer))
 
     def parse(self, packed=None):
         '''
@@ -645,12 +979,12 @@ class RxPacket(Packet):
         self.parseOuter(packed=packed)
         self.parseInner()
 
-    def parseOuter(self, packed=None):
+    def parseOuter(self, packed=None, verify=True):
         '''
         Parses raw packet head from packed if provided or .packed otherwise
         Deserializes head
         Unpacks rest of packet.
-        Parses foot (signature) if given and verifies signature
+        Parses foot (signature) if given and verifies signature if verify
         Returns False if not verified Otherwise True
         Result is .data
         Raises PacketError exception If failure
@@ -668,7 +1002,7 @@ class RxPacket(Packet):
                     "version '{1}'".format(self.data['vn']))
             raise raeting.PacketError(emsg)
 
-        self.foot.parse() #foot unpacks itself
+        self.foot.parse(verify=verify) #foot unpacks itself
 
     def unpackInner(self, packed=None):
         '''
@@ -690,9 +1024,12 @@ class RxPacket(Packet):
         Returns True if decrypted deserialize successful Otherwise False
         Result is .body.data and .data
         Raises PacketError exception If failure
+        Skips the coat when already decrypted with the current session box
         '''
-        self.unpackInner()
-        self.coat.parse()
+        remote = self.stack.remotes.get(self.data['se']) if self.boxed else None
+        if remote is None or remote.box is not self.boxed:
+            self.unpackInner()
+            self.coat.parse()
         self.body.parse()
 
 class Tray(object):
@@ -752,51 +1089,87 @@ class TxTray(Tray):
             self.packets.append(packet)
         else:
             self.packed = packet.coat.packed
+            self.data['zf'] = packet.data['zf'] # set when coat compressed
             self.packetize(headsize=packet.head.size, footsize=packet.foot.size)
 
     def packetize(self, headsize, footsize):
         '''
         Create packeted segments from .packed using headsize footsize
+        Each segment datagram is composed in one reused buffer from a head
+        template and a memoryview slice of .packed and then signed in place
         '''
         extrasize = 0
         if self.data['hk'] == raeting.headKinds.raet:
             extrasize = 27 # extra header size as a result of segmentation
         elif self.data['hk'] == raeting.headKinds.json:
             extrasize = 36 # extra header size as a result of segmentation
+        elif self.data['hk'] == raeting.headKinds.binary:
+            extrasize = 8 # extra header size as a result of segmentation
 
         hotelsize = headsize + extrasize + footsize
         segsize = raeting.UDP_MAX_PACKET_SIZE - hotelsize
 
         segcount = (self.size // segsize) + (1 if self.size % segsize else 0)
+
+        template = TxPacket(stack=self.stack, data=self.data)
+        template.data.update(sn=0, sc=segcount, ml=self.size, sf=True)
+        template.foot.pack()
+        blank = template.foot.packed
+        fl = len(blank)
+        signed = template.data['fk'] == raeting.footKinds.nacl
+        executor = getattr(self.stack, 'executor', None) if signed else None
+        frames = [] # segment buffers to be signed by executor
+        segment = template.head.segmenter()
+
+        packed = memoryview(self.packed)
+        buf = bytearray(raeting.UDP_MAX_PACKET_SIZE)
+        view = memoryview(buf)
         for i in range(segcount):
-            if i == segcount - 1: #last segment
-                segment = self.packed[i * segsize:]
+            chunk = packed[i * segsize: (i+1) * segsize] # last may be short
+            cs = len(chunk)
+            head, hl, pl = segment(i, cs)
+            if pl > len(buf):
+                buf = bytearray(pl)
+                view = memoryview(buf)
+            view[:hl] = head
+            view[hl:hl + cs] = chunk
+            view[hl + cs:pl] = blank
+
+            packet = TxPacket(stack=self.stack)
+            packet.data = cloneData(template.data)
+            packet.data.update(sn=i, hl=hl, pl=pl)
+            if executor:
+                frames.append(bytearray(view[:pl]))
             else:
-                segment = self.packed[i * segsize: (i+1) * segsize]
-
-            packet = TxPacket( stack=self.stack,
-                                data=self.data)
-            packet.data.update(sn=i, sc=segcount, ml=self.size, sf=True)
-            packet.coat.packed = packet.body.packed = segment
-            packet.foot.pack()
-            packet.head.pack()
-            packet.packed = ''.join([  packet.head.packed,
-                                        packet.coat.packed,
-                                        packet.foot.packed])
-            packet.sign()
+                if signed:
+                    view[hl + cs:pl] = template.signature(buf, size=pl)
+                packet.packed = view[:pl].tobytes()
             self.packets.append(packet)
 
+        if frames:
+            signatures = executor.map(template.signature, frames)
+            for packet, frame, signature in zip(self.packets, frames, signatures):
+                frame[len(frame) - fl:] = signature
+                packet.packed = bytes(frame)
+
 
 class RxTray(Tray):
     '''
     Manages segmentated messages and the associated packets
+    Segments are written in place into a preallocated buffer of the full
+    message length as they arrive. Arrivals are tracked in a bitmap.
     '''
-    def __init__(self, segments=None, **kwa):
+    def __init__(self, **kwa):
         '''
         Setup instance
         '''
         super(RxTray, self).__init__(**kwa)
-        self.segments = segments if segments is not None else []
+        self.buffer = None # bytearray of reassembled message of size ml
+        self.bitmap = None # bytearray of bits one per arrived segment number
+        self.count = 0 # number of distinct segments arrived
+        self.contiguous = 0 # number of leading segments all arrived
+        self.highest = -1 # highest segment number arrived
+        self.segsize = None # size of each segment except maybe the last
         self.complete = False
         self.last = 0 # last packet number received
         self.prev = 0 # previous packet number received
@@ -808,8 +1181,7 @@ class RxTray(Tray):
         sc = packet.data['sc']
         self.prev = self.last
         self.last = sn = packet.data['sn']
-        console.verbose("segment count={0} number={1} tid={2}\n".format(
-            sc, sn, packet.data['ti']))
+        console.verbose("segment count={0} number={1} tid={2}\n", sc, sn, packet.data['ti'])
 
         if sc == 1:
             self.data.update(packet.data)
@@ -818,20 +1190,71 @@ class RxTray(Tray):
             self.complete = True
             return self.body
 
-        if not self.segments: #get data from first packet received
+        if self.buffer is None: #get data from first packet received
+            ml = packet.data['ml']
+            if not (0 < ml <= raeting.MAX_MESSAGE_SIZE):
+                emsg = "Invalid message length '{0}'".format(ml)
+                raise raeting.PacketError(emsg)
+            if not (0 < sc <= raeting.MAX_SEGMENT_COUNT):
+                emsg = "Invalid segment count '{0}'".format(sc)
+                raise raeting.PacketError(emsg)
             self.data.update(packet.data)
-            self.segments = [None] * sc
+            self.buffer = bytearray(self.data['ml'])
+            self.bitmap = bytearray((sc + 7) // 8)
+            self.count = 0
+            self.contiguous = 0
+            self.highest = -1
+
+        sc = self.data['sc']
+        if sn >= sc:
+            emsg = ("Segment number '{0}' out of range of segment count"
+                    " '{1}'".format(sn, sc))
+            raise raeting.PacketError(emsg)
+
+        if self.bitmap[sn >> 3] & (1 << (sn & 7)): # duplicate
+            return None
 
         hl = packet.data['hl']
         fl = packet.data['fl']
-        segment = packet.packed[hl:packet.size - fl]
-
-        self.segments[sn] = segment
-        if None in self.segments: #don't have all segments yet
+        segment = memoryview(packet.packed)[hl:packet.size - fl]
+        self.place(sn, segment)
+
+        self.bitmap[sn >> 3] |= (1 << (sn & 7))
+        self.count += 1
+        self.highest = max(self.highest, sn)
+        while (self.contiguous < sc and
+                self.bitmap[self.contiguous >> 3] & (1 << (self.contiguous & 7))):
+            self.contiguous += 1
+        if self.count < sc: #don't have all segments yet
             return None
         self.body = self.desegmentize()
         return self.body
 
+    def place(self, sn, segment):
+        '''
+        Write segment with segment number sn into .buffer at offset sn * segsize
+        The segment size is inferred from the first segment to arrive since
+        all segments but the last are the same size
+        '''
+        sc = self.data['sc']
+        ml = len(self.buffer)
+        size = len(segment)
+        if self.segsize is None:
+            if sn < sc - 1:
+                self.segsize = size
+            else: # last segment holds the remainder
+                self.segsize = (ml - size) // (sc - 1)
+
+        offset = sn * self.segsize
+        if ((sn < sc - 1 and size != self.segsize) or
+                (sn == sc - 1 and offset + size != ml) or
+                offset + size > ml):
+            emsg = ("Segment '{0}' of size '{1}' does not fit message payload"
+                    " length '{2}'".format(sn, size, ml))
+            raise raeting.PacketError(emsg)
+
+        memoryview(self.buffer)[offset:offset + size] = segment
+
     def missing(self, begin=None, end=None):
         '''
         return list of missing packet numbers between begin and end
@@ -839,27 +1262,37 @@ class RxTray(Tray):
         if begin is None:
             begin = 0
         if end is None:
-            end = len(self.segments)
-        if begin >= end:
+            end = self.data['sc'] if self.bitmap is not None else 0
+        if begin >= end or self.bitmap is None:
             return []
-        misseds = []
-        for i, segment in enumerate(self.segments[begin:end]):
-            if segment is None:
-                misseds.append(i)
-        return misseds
+        bitmap = self.bitmap
+        return [sn for sn in xrange(begin, end)
+                    if not bitmap[sn >> 3] & (1 << (sn & 7))]
+
+    def acks(self, limit=raeting.MAX_SACK_BITS):
+        '''
+        Returns duple (ca, sack) of selective acknowledgment of arrived segments
+        where ca is the cumulative ack, that is, the number of leading segments
+        all arrived and sack is bitmap int of the arrived segments after ca
+        with bit i set when segment ca + 1 + i has arrived
+        sack has at most limit bits so later arrived segments are left unacked
+        '''
+        ca = self.contiguous
+        sack = 0
+        bitmap = self.bitmap
+        for sn in xrange(min(self.highest, ca + limit), ca, -1):
+            sack <<= 1
+            if bitmap[sn >> 3] & (1 << (sn & 7)):
+                sack |= 1
+        return (ca, sack)
 
     def desegmentize(self):
         '''
         Process message packet assumes already parsed outer so verified signature
         and processed header data
+        Decrypts and decodes the reassembled .buffer in place
         '''
-        sc = self.data['sc']
-        self.packed = "".join(self.segments)
-        ml = self.data['ml']
-        if sc > 1 and self.size != ml:
-            emsg = ("Full message payload length '{0}' does not equal head field"
-                                          " '{1}'".format(self.size, ml))
-            raise raeting.PacketError(emsg)
+        self.packed = self.buffer
 
         packet = RxPacket(stack = self.stack, data=self.data)
         packet.coat.packed = self.packed
@@ -869,5 +1302,3 @@ class RxTray(Tray):
         self.complete = True
 
         return packet.body.data
-
-
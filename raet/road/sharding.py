@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+'''
+sharding.py raet protocol road stack sharding across processes
+
+A sharded road runs one RoadStack per worker process. Each shard binds the
+same udp port with SO_REUSEPORT so the kernel spreads received datagrams over
+the shards by source address. Each shard owns the remotes whose estate id
+modulo the shard count is its shard index and allocates new estate ids that
+it owns so a remote that joins on a shard stays on that shard.
+Packets that land on a shard that does not own their source estate are
+forwarded over a unix domain control channel to the owning shard.
+Transaction state stays local to the owning shard so no locks are shared.
+
+The channel sockets live in a directory only the user running the shards
+may enter and a shard accepts forwarded datagrams only from the channel
+sockets of the other shards since it trusts the source address they carry.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import sys
+import os
+import socket
+import errno
+import stat
+import tempfile
+
+# Import ioflo libs
+from ioflo.base import aiding
+
+from .. import raeting
+
+from ..consoling import getConsole
+console = getConsole()
+
+# python 2 socket module does not define SO_REUSEPORT
+SO_REUSEPORT = getattr(socket, 'SO_REUSEPORT',
+                       15 if sys.platform.startswith('linux') else None)
+
+def owner(uid, count):
+    '''
+    Returns index of shard out of count shards that owns estate id uid
+    '''
+    return uid % count
+
+class SocketUdpShardNb(aiding.SocketUdpNb):
+    '''
+    Non blocking udp socket that shares its port with the other shards
+    '''
+    def open(self):
+        '''
+        Opens socket in non blocking mode with SO_REUSEPORT set before bind
+        '''
+        if SO_REUSEPORT is None:
+            console.terse("SO_REUSEPORT not supported on this platform\n")
+            return False
+
+        self.ss = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            self.ss.setsockopt(socket.SOL_SOCKET, SO_REUSEPORT, 1)
+        except socket.error as ex:
+            console.terse("socket.error = {0}\n".format(ex))
+            return False
+        if self.ss.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF) <  self.bs:
+            self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.bs)
+        if self.ss.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) < self.bs:
+            self.ss.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.bs)
+        self.ss.setblocking(0) #non blocking socket
+
+        try:
+            self.ss.bind(self.ha)
+        except socket.error as ex:
+            console.terse("socket.error = {0}\n".format(ex))
+            return False
+
+        self.ha = self.ss.getsockname() #get resolved ha after bind
+
+        if self.log:
+            if not self.openLogs():
+                return False
+
+        return True
+
+class Channel(object):
+    '''
+    Control channel between the shards of a road bound to udp port
+    Each shard receives on a uxd socket named for the port and its index in
+    .dirpath. Forwarded datagrams carry the source address of the packet
+    .dirpath is made private to the user and datagrams from any socket but
+    those of the other shards are dropped
+    '''
+    Dirpath = os.path.join(tempfile.gettempdir(), 'raet', 'shard')
+
+    def __init__(self, port, index, count, dirpath=''):
+        '''
+        Setup Channel instance
+
+        port is udp port shared by the shards
+        index is the shard index of this channel
+        count is the number of shards
+        dirpath is directory of the uxd sockets
+        '''
+        self.port = port
+        self.index = index
+        self.count = count
+        self.dirpath = os.path.abspath(os.path.expanduser(dirpath or self.Dirpath))
+        self.secure()
+        self.peers = set(self.path(i) for i in range(count) if i != index)
+        self.server = aiding.SocketUxdNb(ha=self.path(index),
+                                         bufsize=raeting.UXD_MAX_PACKET_SIZE)
+        if not self.server.reopen():
+            raise raeting.StackError("Failed opening shard channel at"
+                                     " '{0}'\n".format(self.server.ha))
+
+    def secure(self):
+        '''
+        Creates .dirpath if need be and makes it accessible only by this user
+        Raises StackError if .dirpath is not a directory owned by this user
+        '''
+        if not os.path.exists(self.dirpath):
+            os.makedirs(self.dirpath, stat.S_IRWXU)
+        status = os.lstat(self.dirpath)
+        if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid():
+            raise raeting.StackError("Shard channel directory '{0}' is not a"
+                                     " directory owned by user\n".format(self.dirpath))
+        if stat.S_IMODE(status.st_mode) != stat.S_IRWXU:
+            os.chmod(self.dirpath, stat.S_IRWXU)
+
+    def path(self, index):
+        '''
+        Returns uxd socket path of shard at index
+        '''
+        return os.path.join(self.dirpath, "{0}.{1}.uxd".format(self.port, index))
+
+    def forward(self, index, raw, sa):
+        '''
+        Forward raw datagram received from source address sa to shard at index
+        Returns True if sent
+        '''
+        host, port = sa
+        try:
+            self.server.send("{0}\n{1}\n{2}".format(host, port, raw), self.path(index))
+        except socket.error as ex:
+            if ex.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.ENOENT,
+                            errno.ECONNREFUSED):
+                return False # shard busy or not running so drop like udp
+            raise
+        return True
+
+    def receive(self):
+        '''
+        Returns list of duples (raw, sa) of datagrams forwarded to this shard
+        '''
+        received = []
+        while True:
+            rx, ra = self.server.receive()
+            if not rx:
+                break
+            if ra not in self.peers:
+                console.terse("Dropped datagram from '{0}' not a shard on shard"
+                              " channel\n".format(ra))
+                continue
+            try:
+                host, port, raw = rx.split("\n", 2)
+                sa = (host, int(port))
+            except ValueError:
+                console.terse("Invalid forwarded datagram on shard channel\n")
+                continue
+            received.append((raw, sa))
+        return received
+
+    def close(self):
+        '''
+        Close uxd socket
+        '''
+        self.server.close()
@@ -9,6 +9,7 @@ stacking.py raet protocol stacking classes
 import socket
 import os
 import errno
+import warnings
 
 from collections import deque,  Mapping
 try:
@@ -19,7 +20,7 @@ except ImportError:
 try:
     import msgpack
 except ImportError:
-    mspack = None
+    msgpack = None
 
 # Import ioflo libs
 from ioflo.base.odicting import odict
@@ -29,14 +30,39 @@ from ioflo.base import storing
 from .. import raeting
 from .. import nacling
 from .. import stacking
+from .. import scheduling
+from .. import executing
 from . import keeping
 from . import packeting
 from . import estating
 from . import transacting
+from . import sharding
+from . import tracing
+from . import beating
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
+def _cryptJob(job):
+    '''
+    Performs the receive crypto of job triple (packet, verfer, box) and
+    returns verfer if the signature is valid, False if not valid, or None if
+    verfer is None. When box then also decrypts the coat of the verified packet
+    and marks the packet as decrypted by box
+    '''
+    packet, verfer, box = job
+    if verfer is not None:
+        if not verfer.verify(packet.foot.packed, packet.foot.message()):
+            return False
+    if box is not None:
+        try:
+            packet.unpackInner()
+            packet.coat.parse(boxer=box)
+        except Exception: # redone inline later where errors are handled
+            return verfer
+        packet.boxed = box
+    return verfer
+
 class RoadStack(stacking.Stack):
     '''
     RAET protocol RoadStack for UDP communications. This is the primary
@@ -70,6 +96,41 @@ class RoadStack(stacking.Stack):
     period
         The default itteration timeframe to use for the background management
         of the presence system. Defaults to 1.0
+    window
+        The max number of message segments in flight per message when sent
+        with a sliding window and selective acks. Defaults to 0 which sends
+        segments without a window
+    bk
+        The body kind used to encode transaction bodies, one of
+        raeting.bodyKinds. Defaults to json
+    plain
+        When True received bodies decode to plain dicts instead of odicts
+        which is faster but does not preserve field order. Defaults to False
+    compress
+        The min packed body size in bytes that is zlib compressed inside the
+        coat when compression makes it shorter. Defaults to 0 which never
+        compresses
+    crypters
+        The number of threads of the crypto executor that verifies and
+        decrypts each batch of received packets before they are processed
+        and signs the segments of large messages. Defaults to 0 which does
+        all crypto inline
+    verifiers
+        Deprecated alias of crypters kept for stacks created with the batch
+        verify option. Warns with DeprecationWarning when given and is used
+        only when crypters is not provided
+    shard
+        The index of this stack among the shards of a sharded road whose
+        stacks run in separate processes and share the udp port. Defaults to 0
+    shards
+        The number of shards of a sharded road. Defaults to 1 which is not
+        sharded. The shards reach each other through uxd sockets in the
+        private shard directory beside the keep directory of the stack so
+        shards must share the base directory of their keeps
+    tracer
+        The transaction tracer whose hooks are called as transactions are
+        added, step, and are removed. Defaults to a tracing.ConsoleTracer.
+        None disables tracing
     '''
     Count = 0
     Eid = 1 # class attribute
@@ -81,6 +142,13 @@ class RoadStack(stacking.Stack):
     Wf = False # stack default for waitflag
     Period = 1.0 # stack default for keep alive
     Offset = 0.5 # stack default for keep alive
+    Window = 0 # stack default max message segment window, 0 means no window
+    Plain = False # stack default for decoding bodies to plain dicts
+    Compress = 0 # stack default min body size to compress, 0 means never
+    Crypters = 0 # stack default number of crypto threads, 0 means inline
+    Shards = 1 # stack default number of shards, 1 means not sharded
+    Beats = False # stack default for keep alive heartbeats without transactions
+    Coalesce = False # stack default for coalesced heartbeats, implies beats
 
     def __init__(self,
                  name='',
@@ -97,6 +165,17 @@ class RoadStack(stacking.Stack):
                  auto=None,
                  period=None,
                  offset=None,
+                 window=None,
+                 bk=None,
+                 plain=None,
+                 compress=None,
+                 crypters=None,
+                 verifiers=None,
+                 shard=None,
+                 shards=None,
+                 tracer=tracing.DEFAULT_TRACER,
+                 beats=None,
+                 coalesce=None,
                  **kwa
                  ):
         '''
@@ -104,6 +183,11 @@ class RoadStack(stacking.Stack):
 
         stack.name and stack.local.name will match
         '''
+        self.shard = shard if shard is not None else 0
+        self.shards = shards if shards is not None else self.Shards
+        if not (0 <= self.shard < self.shards):
+            emsg = "Invalid shard index {0} of {1} shards".format(self.shard, self.shards)
+            raise raeting.StackError(emsg)
         self.neid = self.Eid # eid of initial next estate to add to road
 
         if not name:
@@ -135,6 +219,37 @@ class RoadStack(stacking.Stack):
 
         self.period = period if period is not None else self.Period
         self.offset = offset if offset is not None else self.Offset
+        self.window = window if window is not None else self.Window
+        if bk is not None:
+            self.Bk = bk # instance override of class default
+        self.plain = plain if plain is not None else self.Plain
+        self.compress = compress if compress is not None else self.Compress
+        if verifiers is not None: # batch verify is done by the crypto executor
+            warnings.warn("RoadStack verifiers is deprecated, use crypters",
+                          DeprecationWarning, stacklevel=2)
+            if crypters is None:
+                crypters = verifiers
+        self.crypters = crypters if crypters is not None else self.Crypters
+        self.executor = (executing.Executor(workers=self.crypters)
+                                if self.crypters else None)
+        beats = beats if beats is not None else self.Beats
+        coalesce = coalesce if coalesce is not None else self.Coalesce
+        if coalesce:
+            self.beater = beating.Coalescer(stack=self) # spread adaptive heartbeats
+        elif beats:
+            self.beater = beating.Beater(stack=self) # heartbeat engine
+        else:
+            self.beater = None
+
+        self.haRemotes = dict() # lists of remotes indexed by ha (host, port)
+        self.verRemotes = dict() # lists of remotes indexed by verify key hex
+        self.pubRemotes = dict() # lists of remotes indexed by public key hex
+        self.remoteDeadlines = scheduling.Scheduler() # remotes by keep alive deadline
+        self.trnsDeadlines = scheduling.Scheduler() # transaction indexes by deadline
+        self.trnsTouched = set() # transaction indexes to reschedule before process
+        # transaction tracer, None disables tracing
+        self.tracer = (tracer if tracer is not tracing.DEFAULT_TRACER
+                              else tracing.ConsoleTracer())
 
         super(RoadStack, self).__init__(name=name,
                                         keep=keep,
@@ -146,14 +261,41 @@ class RoadStack(stacking.Stack):
                                         **kwa)
 
         self.transactions = odict() #transactions
+        self.trnsSeconds = self.meter.histogram('transaction_seconds',
+                "Store time from start to removal of transactions.")
+        self.redoCounter = self.meter.counter('transaction_redos',
+                "Packets resent by transactions on redo timeout.")
+        self.meter.gauge('transactions', "Live transactions.",
+                         fetch=lambda: len(self.transactions))
+        self.meter.gauge('remotes', "Remote estates.",
+                         fetch=lambda: len(self.remotes))
+
+        self.channel = None # control channel to the other shards
+        if self.shards > 1:
+            self.channel = sharding.Channel(port=self.local.ha[1],
+                                            index=self.shard,
+                                            count=self.shards,
+                                            dirpath=os.path.join(
+                                                os.path.dirname(self.keep.dirpath),
+                                                'shard'))
+
+    def owns(self, uid):
+        '''
+        Returns True if this shard owns estate id uid
+        Unsharded stacks own all
+        '''
+        return self.shards == 1 or sharding.owner(uid, self.shards) == self.shard
 
     def nextEid(self):
         '''
         Generates next estate id number.
+        When sharded the estate id is one owned by this shard
         '''
         self.neid += 1
+        if self.shards > 1:
+            self.neid += (self.shard - self.neid) % self.shards
         if self.neid > 0xffffffffL:
-            self.neid = 1  # rollover to 1
+            self.neid = self.shard or self.shards  # rollover to first owned
         return self.neid
 
     def serverFromLocal(self):
@@ -163,6 +305,9 @@ class RoadStack(stacking.Stack):
         if not self.local:
             return None
 
+        if self.shards > 1:
+            return sharding.SocketUdpShardNb(ha=self.local.ha,
+                        bufsize=raeting.UDP_MAX_PACKET_SIZE * self.bufcnt)
         server = aiding.SocketUdpNb(ha=self.local.ha,
                         bufsize=raeting.UDP_MAX_PACKET_SIZE * self.bufcnt)
         return server
@@ -175,6 +320,8 @@ class RoadStack(stacking.Stack):
         if remote.timer.store is not self.store:
             raise raeting.StackError("Store reference mismatch between remote"
                     " '{0}' and stack '{1}'".format(remote.name, stack.name))
+        self.indexRemote(remote)
+        self.scheduleRemote(remote)
 
     def removeRemote(self, uid):
         '''
@@ -183,44 +330,93 @@ class RoadStack(stacking.Stack):
         remote = self.remotes.get(uid)
         super(RoadStack, self).removeRemote(uid)
         if remote:
+            self.unindexRemote(remote)
+            self.remoteDeadlines.cancel(remote)
+            if self.beater:
+                self.beater.forget(remote.uid)
             for index in remote.indexes:
                 if index in self.transactions:
                     self.transactions[index].nack()
                     self.removeTransaction(index)
 
+    def indexRemote(self, remote):
+        '''
+        Add remote to the ha, verhex, and pubhex indexes
+        Each index keeps a list of the remotes at a key in the order indexed so
+        when the first one is removed any other remote sharing the key is found
+        Indexes hold remote references so are unaffected by moveRemote
+        and renameRemote which change uid and name
+        '''
+        for index, key in ((self.haRemotes, remote.ha),
+                           (self.verRemotes, remote.verfer.keyhex),
+                           (self.pubRemotes, remote.pubber.keyhex)):
+            if key:
+                remotes = index.setdefault(key, [])
+                if remote not in remotes:
+                    remotes.append(remote)
+
+    def unindexRemote(self, remote, ha=None, verhex=None, pubhex=None):
+        '''
+        Remove remote from the ha, verhex, and pubhex indexes
+        Uses the provided old ha, verhex or pubhex otherwise the current ones
+        Only removes index entries that refer to remote
+        '''
+        for index, key in ((self.haRemotes, ha or remote.ha),
+                           (self.verRemotes, verhex or remote.verfer.keyhex),
+                           (self.pubRemotes, pubhex or remote.pubber.keyhex)):
+            remotes = index.get(key)
+            if remotes and remote in remotes:
+                remotes.remove(remote)
+                if not remotes:
+                    del index[key]
+
+    def reindexRemote(self, remote, ha=None, verhex=None, pubhex=None):
+        '''
+        Update indexes of remote after its ha, verhex or pubhex changed from the
+        provided old values. Does nothing if remote not in .remotes
+        '''
+        if self.remotes.get(remote.uid) is not remote:
+            return
+        self.unindexRemote(remote, ha=ha, verhex=verhex, pubhex=pubhex)
+        self.indexRemote(remote)
+
+    def fetchIndexedRemote(self, index, key):
+        '''
+        Return first remote at key in index that is still in .remotes
+        Otherwise return None
+        Discards stale entries such as when .remotes replaced wholesale
+        '''
+        remotes = index.get(key)
+        while remotes:
+            remote = remotes[0]
+            if self.remotes.get(remote.uid) is remote:
+                return remote
+            del remotes[0]  # stale
+        if remotes is not None:
+            del index[key]
+        return None
+
     def fetchRemoteByHostPort(self, host, port):
         '''
         Search for remote with matching host and port
         Return remote if found Otherwise return None
         '''
-        for remote in self.remotes.values():
-            if remote.host == host and remote.port == port:
-                return remote
-
-        return None
+        return self.fetchIndexedRemote(self.haRemotes, (host, port))
 
     def fetchRemoteByHa(self, ha):
         '''
         Search for remote with matching host address tuple, ha = (host, port)
         Return remote if found Otherwise return None
         '''
-        for remote in self.remotes.values():
-            if remote.ha == ha:
-                return remote
-
-        return None
+        return self.fetchIndexedRemote(self.haRemotes, ha)
 
-    def fetchRemoteByKeys(self, sighex, prihex):
+    def fetchRemoteByKeys(self, verhex, pubhex):
         '''
-        Search for remote with matching (name, sighex, prihex)
+        Search for remote with matching verhex or pubhex
         Return remote if found Otherwise return None
         '''
-        for remote in self.remotes.values():
-            if (remote.signer.keyhex == sighex or
-                remote.priver.keyhex == prihex):
-                return remote
-
-        return None
+        return (self.fetchIndexedRemote(self.verRemotes, verhex) or
+                self.fetchIndexedRemote(self.pubRemotes, pubhex))
 
     def retrieveRemote(self, duid, ha=None):
         '''
@@ -279,6 +475,18 @@ class RoadStack(stacking.Stack):
         else:
             self.local = estating.LocalEstate(stack=self, name=name)
 
+    def close(self):
+        '''
+        Close server, shard channel, and stop crypto executor worker threads
+        '''
+        if self.executor:
+            self.executor.close()
+            self.executor = None
+        if self.channel:
+            self.channel.close()
+            self.channel = None
+        super(RoadStack, self).close()
+
     def clearLocal(self):
         '''
         Clear local keeps
@@ -296,9 +504,13 @@ class RoadStack(stacking.Stack):
     def loadRemotes(self):
         '''
         Load .remotes from valid keep and safe data if any
+        When sharded only loads the remotes that this shard owns
         '''
-        keeps = self.keep.loadAllRemoteData()
-        safes = self.safe.loadAllRemoteData()
+        owns = None
+        if self.shards > 1:
+            owns = lambda uid: uid.isdigit() and self.owns(int(uid))
+        keeps = self.keep.loadAllRemoteData(owns=owns)
+        safes = self.safe.loadAllRemoteData(owns=owns)
         if not keeps or not safes:
             return
         for key, keepData in keeps.items():
@@ -343,15 +555,49 @@ class RoadStack(stacking.Stack):
         failure or alive success
 
         immediate indicates to run first attempt immediately and not wait for timer
+
+        Unless immediate only the remotes whose keep alive deadline has passed
+        are managed
+
+        With .beater keep alives are heartbeats instead of alive transactions
+        '''
+        if immediate:
+            remotes = self.remotes.values() # should not start anything
+        else:
+            if self.store.stamp is None:
+                return
+            remotes = [remote for remote in self.remoteDeadlines.expired(self.store.stamp)
+                       if self.remotes.get(remote.uid) is remote] # not stale
+
+        if self.beater:
+            self.beater.manage(remotes, cascade=cascade, immediate=immediate)
+        else:
+            for remote in remotes:
+                remote.manage(cascade=cascade, immediate=immediate)
+        for remote in remotes:
+            self.scheduleRemote(remote)
+
+    def scheduleRemote(self, remote):
+        '''
+        Schedule remote at the deadline of its keep alive timer
         '''
-        for remote in self.remotes.values(): # should not start anything
-            remote.manage(cascade=cascade, immediate=immediate)
+        self.remoteDeadlines.schedule(remote, remote.timer.stop)
+
+    def scheduleTransaction(self, index):
+        '''
+        Schedule transaction at index at its deadline
+        Unschedule if no such transaction or it has no deadline
+        '''
+        transaction = self.transactions.get(index)
+        self.trnsDeadlines.schedule(index,
+                transaction.deadline if transaction is not None else None)
 
     def addTransaction(self, index, transaction):
         '''
         Safely add transaction at index If not already there
         '''
         self.transactions[index] = transaction
+        self.trnsTouched.add(index)
         re = index[2]
         remote = None
         if re in self.remotes:
@@ -360,9 +606,8 @@ class RoadStack(stacking.Stack):
             remote = self.fetchRemoteByHa(ha=re)
         if remote is not None:
             remote.indexes.add(index)
-
-        console.verbose( "Added {0} transaction to {1} at '{2}'\n".format(
-                transaction.__class__.__name__, self.name, index))
+        if self.tracer is not None:
+            self.tracer.enter(transaction, index)
 
     def removeTransaction(self, index, transaction=None):
         '''
@@ -370,11 +615,14 @@ class RoadStack(stacking.Stack):
         If transaction is None then remove without comparing identity
         '''
         if index in self.transactions:
-            if transaction:
-                if transaction is self.transactions[index]:
-                    del  self.transactions[index]
-            else:
+            present = self.transactions[index]
+            if not transaction or transaction is present:
                 del self.transactions[index]
+                self.trnsDeadlines.cancel(index)
+                if present.stamp is not None and self.store.stamp is not None:
+                    self.trnsSeconds.observe(self.store.stamp - present.stamp)
+                if self.tracer is not None:
+                    self.tracer.exit(present, index)
 
             re = index[2]
             remote = None
@@ -391,15 +639,35 @@ class RoadStack(stacking.Stack):
         Assumes that there is a message on the .rxes deque
         '''
         raw, sa, da = self.rxes.popleft()
-        console.verbose("{0} received packet\n{1}\n".format(self.name, raw))
+        packet = self.parseOuterRx(raw, sa, da)
+        if packet is not None:
+            self.processRx(packet)
+
+    def parseOuterRx(self, raw, sa, da, verify=True):
+        '''
+        Returns packet parsed from raw received from source address sa at
+        destination address da or None if dropped
+        Verifies signature if verify
+        When sharded forwards packet to the shard that owns its source estate
+        '''
+        console.verbose("{0} received packet\n{1}\n", self.name, raw)
 
         packet = packeting.RxPacket(stack=self, packed=raw)
+        if self.checkOuterRx(packet, sa, da, verify=verify):
+            return packet
+        return None
+
+    def checkOuterRx(self, packet, sa, da, verify=True):
+        '''
+        Returns True if outer of packet parses and packet is not dropped
+        Otherwise False
+        '''
         try:
-            packet.parseOuter()
+            packet.parseOuter(verify=False)
         except raeting.PacketError as ex:
             console.terse(str(ex) + '\n')
             self.incStat('parsing_outer_error')
-            return
+            return False
 
         sh, sp = sa
         dh, dp = da
@@ -407,20 +675,111 @@ class RoadStack(stacking.Stack):
 
         deid = packet.data['de']
         if deid != 0 and self.local.uid != 0 and deid != self.local.uid:
-            emsg = "Invalid destination eid = {0}. Dropping packet...\n".format(deid)
-            console.concise( emsg)
+            console.concise("Invalid destination eid = {0}. Dropping packet...\n", deid)
             self.incStat('invalid_destination')
+            return False
+
+        if self.channel:
+            seid = packet.data['se']
+            index = sharding.owner(seid, self.shards) if seid else self.shard
+            if index != self.shard:
+                if self.channel.forward(index, packet.packed, sa):
+                    self.incStat('shard_forward')
+                else:
+                    self.incStat('shard_forward_drop')
+                return False
+
+        if verify and packet.data['fk'] == raeting.footKinds.nacl:
+            try:
+                packet.foot.verify()
+            except raeting.PacketError as ex:
+                console.terse(str(ex) + '\n')
+                self.incStat('parsing_outer_error')
+                return False
+
+        return True
+
+    def serviceReceives(self):
+        '''
+        Retrieve from server all recieved and put on the rxes deque
+        Also retrieve any forwarded from other shards
+        '''
+        super(RoadStack, self).serviceReceives()
+        if self.channel:
+            ha = self.server.ha
+            self.rxes.extend([(raw, sa, ha) for raw, sa in self.channel.receive()])
+
+    def serviceRxes(self):
+        '''
+        Process all messages in .rxes deque
+        When .executor then the whole batch is verified and decrypted in the
+        executor before the packets are processed in order
+        '''
+        if not self.executor:
+            super(RoadStack, self).serviceRxes()
             return
 
-        self.processRx(packet)
+        packets = []
+        while self.rxes:
+            raw, sa, da = self.rxes.popleft()
+            packet = self.parseOuterRx(raw, sa, da, verify=False)
+            if packet is not None:
+                packets.append(packet)
+
+        for packet, verfer in zip(packets, self.verifyRxes(packets)):
+            if self.verifiedRx(packet, verfer):
+                self.processRx(packet)
+
+    def verifyRxes(self, packets):
+        '''
+        Returns list of batch verification results of packets in order
+        Each result is the remote verifier when the signature is valid, False
+        when not valid, or None when not verified because the packet is not
+        signed or its remote is not yet known
+        Unsegmented packets with nacl coat from remotes with session box are
+        also decrypted with that box
+        '''
+        jobs = []
+        for packet in packets:
+            verfer = box = None
+            remote = self.remotes.get(packet.data['se'])
+            if remote is not None:
+                if packet.data['fk'] == raeting.footKinds.nacl:
+                    verfer = remote.verfer
+                if (packet.data['ck'] == raeting.coatKinds.nacl and
+                        packet.data['sc'] == 1):
+                    box = remote.box
+            jobs.append((packet, verfer, box))
+        return self.executor.map(_cryptJob, jobs)
+
+    def verifiedRx(self, packet, verfer):
+        '''
+        Returns True if signature of packet is verified given batch result
+        verfer from .verifyRxes. Verifies packet inline when it was not
+        verified in the batch or the remote verifier has since changed
+        '''
+        if packet.data['fk'] != raeting.footKinds.nacl:
+            return True
+        try:
+            if verfer is False:
+                emsg = "Failed verification"
+                raise raeting.PacketError(emsg)
+            remote = self.remotes.get(packet.data['se'])
+            if verfer is None or remote is None or remote.verfer is not verfer:
+                packet.foot.verify()
+        except raeting.PacketError as ex:
+            console.terse(str(ex) + '\n')
+            self.incStat('parsing_outer_error')
+            return False
+        return True
 
     def processRx(self, received):
         '''
         Process packet via associated transaction or
         reply with new correspondent transaction
         '''
-        console.verbose("{0} received packet data\n{1}\n".format(self.name, received.data))
-        console.verbose("{0} received packet index = '{1}'\n".format(self.name, received.index))
+        console.verbose("{0} received packet data\n{1}\n", self.name, received.data)
+        console.verbose("{0} received packet index = '{1}'\n", self.name, received.index)
 
         cf = received.data['cf']
         rsid = received.data['si']
@@ -451,9 +810,15 @@ class RoadStack(stacking.Stack):
                     remote.rsid = rsid
                     # need to remove any stale correspondent transactions with this remote with older sid
 
+        if (self.beater and cf and
+                received.data['tk'] == raeting.trnsKinds.alive and
+                self.beater.receive(received, remote)):
+            return
+
         trans = self.transactions.get(received.index, None)
         if trans:
             trans.receive(received)
+            self.trnsTouched.add(received.index)
             return
 
         if cf: #packet from correspondent to non-existent locally initiated transaction
@@ -475,8 +840,7 @@ class RoadStack(stacking.Stack):
         if not remote:
             emsg = "Invalid remote destination estate id '{0}'\n".format(packet.data['se'])
             console.terse(emsg)
-            self.stack.incStat('invalid_remote_eid')
-            self.remove()
+            self.incStat('invalid_remote_eid')
             return
 
         if (packet.data['tk'] == raeting.trnsKinds.allow and
@@ -501,10 +865,50 @@ class RoadStack(stacking.Stack):
 
     def process(self):
         '''
-        Call .process or all transactions to allow timer based processing
+        Call .process on transactions whose deadline has passed to allow
+        timer based processing
+        Transactions added or that received packets since the last call are
+        rescheduled first since their timers may have been restarted
         '''
-        for transaction in self.transactions.values():
+        while self.trnsTouched:
+            self.scheduleTransaction(self.trnsTouched.pop())
+
+        if self.store.stamp is None:
+            return
+
+        for index in self.trnsDeadlines.expired(self.store.stamp):
+            transaction = self.transactions.get(index)
+            if transaction is None: # stale
+                continue
             transaction.process()
+            self.scheduleTransaction(index)
+
+        if self.beater:
+            self.beater.process()
+
+    def nextDeadline(self):
+        '''
+        Returns earliest deadline of transactions and remote keep alives or
+        None if nothing is scheduled
+        '''
+        while self.trnsTouched:
+            self.scheduleTransaction(self.trnsTouched.pop())
+
+        deadlines = [deadline for deadline in (self.trnsDeadlines.deadline,
+                                               self.remoteDeadlines.deadline,
+                                               self.beater.deadline if self.beater else None)
+                                if deadline is not None]
+        return min(deadlines) if deadlines else None
+
+    def waitables(self):
+        '''
+        Returns list of sockets whose readability should end a .wait
+        Includes shard channel if any
+        '''
+        waitables = super(RoadStack, self).waitables()
+        if self.channel:
+            waitables.append(self.channel.server.ss)
+        return waitables
 
     def parseInner(self, packet):
         '''
@@ -513,7 +917,8 @@ class RoadStack(stacking.Stack):
         '''
         try:
             packet.parseInner()
-            console.verbose("{0} received packet body\n{1}\n".format(self.name, packet.body.data))
+            packet.body.data # decode now while errors are handled here
+            console.verbose("{0} received packet body\n{1}\n", self.name, packet.body.data)
         except raeting.PacketError as ex:
             console.terse(str(ex) + '\n')
             self.incStat('parsing_inner_error')
@@ -626,7 +1031,11 @@ class RoadStack(stacking.Stack):
     def replyAlive(self, packet, remote):
         '''
         Correspond to new Alive transaction
+        With .beater answer with heartbeat ack instead of Alivent transaction
         '''
+        if self.beater:
+            self.beater.reply(packet, remote)
+            return
         data = odict(hk=self.Hk, bk=self.Bk, fk=self.Fk, ck=self.Ck)
         alivent = transacting.Alivent(stack=self,
                                       remote=remote,
@@ -653,7 +1062,8 @@ class RoadStack(stacking.Stack):
                                           remote=remote,
                                           txData=data,
                                           bcst=self.Bf,
-                                          wait=self.Wf)
+                                          wait=self.Wf,
+                                          window=self.window)
         messenger.message(body)
 
     def replyMessage(self, packet, remote):
@@ -664,6 +1074,7 @@ class RoadStack(stacking.Stack):
         messengent = transacting.Messengent(stack=self,
                                             remote=remote,
                                             bcst=packet.data['bf'],
+                                            wait=packet.data['wf'],
                                             sid=packet.data['si'],
                                             tid=packet.data['ti'],
                                             txData=data,
@@ -89,6 +89,7 @@ class BasicTestCase(unittest.TestCase):
                                             'ml': 0,
                                             'sf': False,
                                             'af': False,
+                                            'zf': False,
                                             'bk': 1,
                                             'ck': 0,
                                             'fk': 0,
@@ -140,6 +141,7 @@ class BasicTestCase(unittest.TestCase):
                                             'ml': 0,
                                             'sf': False,
                                             'af': False,
+                                            'zf': False,
                                             'bk': 3,
                                             'ck': 0,
                                             'fk': 0,
@@ -191,6 +193,7 @@ class BasicTestCase(unittest.TestCase):
                                             'ml': 0,
                                             'sf': False,
                                             'af': False,
+                                            'zf': False,
                                             'bk': 1,
                                             'ck': 0,
                                             'fk': 0,
@@ -242,6 +245,7 @@ class BasicTestCase(unittest.TestCase):
                                             'ml': 0,
                                             'sf': False,
                                             'af': False,
+                                            'zf': False,
                                             'bk': 3,
                                             'ck': 0,
                                             'fk': 0,
@@ -293,6 +297,7 @@ class BasicTestCase(unittest.TestCase):
                                             'ml': 0,
                                             'sf': False,
                                             'af': False,
+                                            'zf': False,
                                             'bk': 2,
                                             'ck': 0,
                                             'fk': 0,
@@ -354,6 +359,7 @@ class BasicTestCase(unittest.TestCase):
                                            'ml': 1200,
                                            'sf': True,
                                            'af': False,
+                                           'zf': False,
                                            'bk': 2,
                                            'ck': 0,
                                            'fk': 0,
@@ -361,6 +367,116 @@ class BasicTestCase(unittest.TestCase):
                                            'fg': '10'})
         self.assertEquals( tray1.body, stuff)
 
+    def testBasicBinaryJson(self):
+        '''
+        Basic pack parse with header binary and body json
+        '''
+        console.terse("{0}\n".format(self.testBasicBinaryJson.__doc__))
+
+        hk = raeting.headKinds.binary
+        bk = raeting.bodyKinds.json
+
+        data = odict(hk=hk, bk=bk)
+        body = odict(msg='Hello Raet World', extra='Goodby Big Moon')
+        packet0 = packeting.TxPacket(embody=body, data=data, )
+        self.assertDictEqual(packet0.body.data, body)
+        packet0.pack()
+        self.assertEqual(packet0.packed,
+                'RAET\x00\x00\x02\x0e\x00\x00B\x04\x00\x01{"msg":"Hello Raet World","extra":"Goodby Big Moon"}')
+
+        packet1 = packeting.RxPacket(packed=packet0.packed)
+        packet1.parse()
+        self.assertDictEqual(packet1.data, {'sh': '',
+                                            'sp': 7530,
+                                            'dh': '127.0.0.1',
+                                            'dp': 7530,
+                                            'ri':'RAET',
+                                            'vn': 0,
+                                            'pk': 0,
+                                            'pl': 66,
+                                            'hk': 2,
+                                            'hl': 14,
+                                            'se': 0,
+                                            'de': 0,
+                                            'cf': False,
+                                            'bf': False,
+                                            'si': 0,
+                                            'ti': 0,
+                                            'tk': 0,
+                                            'dt': 0,
+                                            'oi': 0,
+                                            'wf': False,
+                                            'sn': 0,
+                                            'sc': 1,
+                                            'ml': 0,
+                                            'sf': False,
+                                            'af': False,
+                                            'zf': False,
+                                            'bk': 1,
+                                            'ck': 0,
+                                            'fk': 0,
+                                            'fl': 0,
+                                            'fg': '00'})
+        self.assertDictEqual(packet1.body.data, body)
+
+        # corrupted bitmap with unknown field
+        packed = packet0.packed[:11] + '\xc0\x00' + packet0.packed[13:]
+        packet2 = packeting.RxPacket(packed=packed)
+        self.assertRaises(raeting.PacketError, packet2.parse)
+
+        # truncated head
+        packet3 = packeting.RxPacket(packed=packet0.packed[:13])
+        self.assertRaises(raeting.PacketError, packet3.parse)
+
+    def testSegmentationBinary(self):
+        '''
+        Test pack unpack segmented with header binary
+        '''
+        console.terse("{0}\n".format(self.testSegmentationBinary.__doc__))
+        hk = raeting.headKinds.binary
+        bk = raeting.bodyKinds.raw
+
+        data = odict(hk=hk, bk=bk)
+
+        stuff = []
+        for i in range(300):
+            stuff.append(str(i).rjust(4, " "))
+        stuff = "".join(stuff)
+        self.assertEqual(len(stuff), 1200)
+
+        tray0 = packeting.TxTray(data=data, body=stuff)
+        tray0.pack()
+        self.assertEquals(len(tray0.packets), 2)
+        for packet in tray0.packets:
+            self.assertTrue(packet.size <= raeting.UDP_MAX_PACKET_SIZE)
+
+        tray1 = packeting.RxTray()
+        for packet in tray0.packets:
+            tray1.parse(packet)
+
+        self.assertEqual(tray1.data['hk'], hk)
+        self.assertEqual(tray1.data['hl'], 20)
+        self.assertEqual(tray1.data['sc'], 2)
+        self.assertEqual(tray1.data['ml'], 1200)
+        self.assertEqual(tray1.data['sf'], True)
+        self.assertEqual(tray1.data['fg'], '10')
+        self.assertEquals( tray1.body, stuff)
+
+    def testSlots(self):
+        '''
+        Test slotted packets and parts
+        '''
+        console.terse("{0}\n".format(self.testSlots.__doc__))
+
+        data = odict(hk=raeting.headKinds.raet, bk=raeting.bodyKinds.json)
+        body = odict(msg='Hello Raet World', extra='Goodby Big Moon')
+        packet0 = packeting.TxPacket(embody=body, data=data, )
+        packet0.pack()
+        self.assertRaises(AttributeError, setattr, packet0, 'extra', 1)
+        self.assertRaises(AttributeError, setattr, packet0.head, 'extra', 1)
+        self.assertIs(packet0.data.__class__, odict)
+        self.assertEqual(packet0.data.keys(), raeting.PACKET_DEFAULTS.keys())
+
 class StackTestCase(unittest.TestCase):
     '''
     Pack and Parse with stacks
@@ -513,6 +629,7 @@ class StackTestCase(unittest.TestCase):
                                           'ml': 1200,
                                           'sf': True,
                                           'af': False,
+                                          'zf': False,
                                           'bk': 2,
                                           'ck': 0,
                                           'fk': 1,
@@ -563,6 +680,7 @@ class StackTestCase(unittest.TestCase):
                                           'ml': 1212,
                                           'sf': True,
                                           'af': False,
+                                          'zf': False,
                                           'bk': 1,
                                           'ck': 0,
                                           'fk': 1,
@@ -625,6 +743,7 @@ class StackTestCase(unittest.TestCase):
                                           'ml': 1252,
                                           'sf': True,
                                           'af': False,
+                                          'zf': False,
                                           'bk': 1,
                                           'ck': 1,
                                           'fk': 1,
@@ -633,6 +752,124 @@ class StackTestCase(unittest.TestCase):
 
         self.assertEqual( tray1.body, body)
 
+    def testReassembly(self):
+        '''
+        Reassembly of out of order and duplicate segments tests
+        '''
+        console.terse("{0}\n".format(self.testReassembly.__doc__))
+
+        body = odict(stuff=self.stuff * 4)
+        self.data.update(se=1, de=2,
+                    bk=raeting.bodyKinds.json,
+                    ck=raeting.coatKinds.nacl,
+                    fk=raeting.footKinds.nacl)
+        tray0 = packeting.TxTray(stack=self.main, data=self.data, body=body)
+        tray0.pack()
+        sc = len(tray0.packets)
+        self.assertEqual(sc, 6)
+
+        tray1 = packeting.RxTray(stack=self.other)
+        self.assertEqual(tray1.missing(), [])
+        packets = list(reversed(tray0.packets)) # last segment first
+        for packet in packets[:3]:
+            self.assertIs(tray1.parse(packet), None)
+            self.assertIs(tray1.parse(packet), None) # duplicate ignored
+        self.assertFalse(tray1.complete)
+        self.assertEqual(len(tray1.buffer), tray1.data['ml'])
+        self.assertEqual(tray1.missing(), [0, 1, 2])
+        self.assertEqual(tray1.missing(begin=1, end=4), [1, 2])
+        self.assertEqual(tray1.acks(), (0, 0b11100)) # segments 3, 4, 5 after 0
+        tray1.parse(packets[5]) # segment 0
+        self.assertEqual(tray1.acks(), (1, 0b1110)) # segments 3, 4, 5 after 1
+        self.assertEqual(tray1.acks(limit=3), (1, 0b110)) # capped to segments 2 to 4
+
+        for packet in packets[3:5]:
+            tray1.parse(packet)
+        self.assertTrue(tray1.complete)
+        self.assertEqual(tray1.missing(), [])
+        self.assertEqual(tray1.acks(), (sc, 0))
+        self.assertEqual(tray1.packed, tray0.packed)
+        self.assertEqual(tray1.body, body)
+
+        # segment that does not fit the message payload length
+        tray1 = packeting.RxTray(stack=self.other)
+        tray1.parse(tray0.packets[0])
+        self.assertRaises(raeting.PacketError, tray1.place, sc - 1, 'short')
+        self.assertRaises(raeting.PacketError, tray1.place, 1, 'short')
+
+        # forged first segment with oversized lengths is dropped before allocating
+        for field, value in (('ml', raeting.MAX_MESSAGE_SIZE + 1), ('ml', 0),
+                             ('sc', raeting.MAX_SEGMENT_COUNT + 1)):
+            packet = packeting.RxPacket(stack=self.other, packed=tray0.packets[0].packed)
+            packet.parseOuter()
+            packet.data[field] = value
+            tray1 = packeting.RxTray(stack=self.other)
+            self.assertRaises(raeting.PacketError, tray1.parse, packet)
+            self.assertIs(tray1.buffer, None)
+
+    def testCompress(self):
+        '''
+        Compression of body inside coat tests
+        '''
+        console.terse("{0}\n".format(self.testCompress.__doc__))
+
+        body = odict(stuff=self.stuff * 4)
+        self.data.update(se=1, de=2,
+                    bk=raeting.bodyKinds.json,
+                    ck=raeting.coatKinds.nacl,
+                    fk=raeting.footKinds.nacl)
+        self.main.compress = 512
+        tray0 = packeting.TxTray(stack=self.main, data=self.data, body=body)
+        tray0.pack()
+        self.assertEqual(len(tray0.packets), 1) # 6 segments uncompressed
+        packet0 = tray0.packets[0]
+        self.assertTrue(packet0.data['zf'])
+        self.assertEqual(packet0.data['fg'], '08')
+
+        packet1 = packeting.RxPacket(stack=self.other, packed=packet0.packed)
+        packet1.parseOuter()
+        tray1 = packeting.RxTray(stack=self.other)
+        self.assertEqual(tray1.parse(packet1), body)
+        self.assertTrue(packet1.data['zf'])
+
+        # segmented compressed message
+        stuff = "".join([chr(i % 256) for i in range(6000)]) # not compressible
+        body = odict(stuff=self.stuff * 4, noise=stuff.encode('hex'))
+        tray0 = packeting.TxTray(stack=self.main, data=self.data, body=body)
+        tray0.pack()
+        self.assertTrue(len(tray0.packets) > 1)
+        self.assertTrue(tray0.data['zf'])
+        tray1 = packeting.RxTray(stack=self.other)
+        for packet in tray0.packets:
+            packet1 = packeting.RxPacket(stack=self.other, packed=packet.packed)
+            packet1.parseOuter()
+            tray1.parse(packet1)
+        self.assertTrue(tray1.complete)
+        self.assertEqual(tray1.body, body)
+
+        # below threshold not compressed
+        self.main.compress = 8192
+        body = odict(stuff=self.stuff * 4)
+        tray0 = packeting.TxTray(stack=self.main, data=self.data, body=body)
+        tray0.pack()
+        self.assertEqual(len(tray0.packets), 6)
+        self.assertFalse(tray0.data['zf'])
+
+        # nada coat and invalid compressed body
+        self.main.compress = 512
+        self.data.update(ck=raeting.coatKinds.nada)
+        packet0 = packeting.TxPacket(stack=self.main, embody=odict(stuff=self.stuff),
+                                     data=self.data)
+        packet0.pack()
+        self.assertTrue(packet0.data['zf'])
+        packet1 = packeting.RxPacket(stack=self.other, packed=packet0.packed)
+        packet1.parse()
+        self.assertEqual(packet1.body.data, odict(stuff=self.stuff))
+
+        packet1 = packeting.RxPacket(stack=self.other, data=packet0.data)
+        packet1.coat.packed = 'not compressed'
+        self.assertRaises(raeting.PacketError, packet1.coat.parse)
+
 
 
 def runOneBasic(test):
@@ -659,7 +896,10 @@ def runSome():
              'testBasicRaetJson',
              'testBasicRaetMsgpack',
              'testBasicRaetRaw',
-             'testSegmentation']
+             'testSegmentation',
+             'testBasicBinaryJson',
+             'testSegmentationBinary',
+             'testSlots',]
     tests.extend(map(BasicTestCase, names))
 
     #names = ['testPackParse']
@@ -23,7 +23,7 @@ from ioflo.base.consoling import getConsole
 console = getConsole()
 
 from raet import raeting, nacling
-from raet.road import estating, keeping, stacking
+from raet.road import estating, keeping, stacking, beating, packeting
 
 
 def setUpModule():
@@ -70,7 +70,8 @@ class BasicTestCase(unittest.TestCase):
 
         return data
 
-    def createRoadStack(self, data, eid=0, main=None, auto=None, ha=None):
+    def createRoadStack(self, data, eid=0, main=None, auto=None, ha=None, beats=None,
+                        coalesce=None):
         '''
         Creates stack and local estate from data with
         local estate.eid = eid
@@ -94,7 +95,9 @@ class BasicTestCase(unittest.TestCase):
                                    auto=auto if auto is not None else data['auto'],
                                    main=main,
                                    dirpath=data['dirpath'],
-                                   store=self.store)
+                                   store=self.store,
+                                   beats=beats,
+                                   coalesce=coalesce)
 
         return stack
 
@@ -875,6 +878,217 @@ class BasicTestCase(unittest.TestCase):
         other1.clearLocal()
         other1.clearRemoteKeeps()
 
+    def serviceAlived(self, stacks, remotes, duration=3.0):
+        '''
+        Utility method to service stacks until all remotes alived
+        '''
+        self.timer.restart(duration=duration)
+        while not self.timer.expired:
+            for stack in stacks:
+                stack.serviceAll()
+            if all([remote.alived for remote in remotes]):
+                break
+            self.store.advanceStamp(0.1)
+            time.sleep(0.1)
+
+    def testManageBeats(self):
+        '''
+        Test stack manage remotes with heartbeats instead of alive transactions
+        '''
+        console.terse("{0}\n".format(self.testManageBeats.__doc__))
+
+        mainData = self.createRoadData(name='main', base=self.base, auto=True)
+        keeping.clearAllKeepSafe(mainData['dirpath'])
+        main = self.createRoadStack(data=mainData,
+                                     eid=1,
+                                     main=True,
+                                     auto=mainData['auto'],
+                                     ha=None,
+                                     beats=True)
+
+        otherData = self.createRoadData(name='other', base=self.base)
+        keeping.clearAllKeepSafe(otherData['dirpath'])
+        other = self.createRoadStack(data=otherData,
+                                     eid=0,
+                                     main=None,
+                                     auto=None,
+                                     ha=("", raeting.RAET_TEST_PORT),
+                                     beats=True)
+
+        other1Data = self.createRoadData(name='other1', base=self.base)
+        keeping.clearAllKeepSafe(other1Data['dirpath'])
+        other1 = self.createRoadStack(data=other1Data,
+                                     eid=0,
+                                     main=None,
+                                     auto=None,
+                                     ha=("", 7532)) # answers with alivent
+
+        self.join(other, main)
+        self.join(other1, main)
+        self.allow(other, main)
+        self.allow(other1, main)
+        self.assertIsInstance(main.beater, beating.Beater)
+        self.assertIs(other1.beater, None)
+
+        console.terse("\nMake all expired so send heartbeats *********\n")
+        stacks = [main, other, other1]
+        self.store.advanceStamp(estating.RemoteEstate.Period + estating.RemoteEstate.Offset)
+        main.manage()
+        self.assertEqual(len(main.transactions), 0) # no alive transactions
+        self.assertEqual(len(main.beater.beats), 2)
+        for remote in main.remotes.values():
+            self.assertIs(remote.alived, None)
+        self.assertLessEqual(main.nextDeadline(),
+                             self.store.stamp + beating.Beater.RedoTimeoutMin)
+        for beat in main.beater.beats.values(): # same coat kind as aliver
+            packet = packeting.RxPacket(stack=other, packed=beat.packed)
+            packet.parseOuter()
+            self.assertEqual(packet.data['ck'], main.Ck)
+            self.assertEqual(packet.coat.packed, '')
+
+        self.serviceAlived(stacks, main.remotes.values())
+        for remote in main.remotes.values():
+            self.assertTrue(remote.alived)
+        self.assertEqual(len(main.beater.beats), 0)
+        self.assertEqual(main.stats['alive_complete'], 2)
+        self.assertEqual(other.stats['alive_complete'], 1) # replied by beater
+        self.assertEqual(other1.stats['alive_complete'], 1) # replied by alivent
+        for stack in stacks:
+            self.assertEqual(len(stack.transactions), 0)
+            for remote in stack.remotes.values(): # refresh reschedules remote
+                self.assertEqual(stack.remoteDeadlines.entries[remote][0],
+                                 remote.timer.stop)
+
+        console.terse("\nOther beats main *********\n")
+        mainRemote = other.remotes.values()[0]
+        mainRemote.alived = None
+        other.manage(immediate=True)
+        self.assertEqual(len(other.transactions), 0)
+        self.serviceAlived(stacks, [mainRemote])
+        self.assertTrue(mainRemote.alived)
+
+        console.terse("\nOther beats main that has unjoined other *********\n")
+        otherRemote = main.remotes[other.local.uid]
+        otherRemote.joined = False
+        other.manage(immediate=True)
+        self.serviceStack(other, duration=0.1) # send heartbeat
+        self.serviceStacks([main, other]) # nack then rejoin
+        self.assertEqual(main.stats['unjoined_alive_attempt'], 1)
+        self.assertEqual(other.stats['aliver_transaction_failure'], 1)
+        self.assertTrue(otherRemote.joined) # other rejoined
+        self.assertTrue(mainRemote.joined)
+
+        console.terse("\nDead Other from Main *********\n")
+        main.manage(immediate=True)
+        self.serviceStack(main, duration=0.1)
+        self.timer.restart(duration=3.0)
+        while not self.timer.expired and main.beater.beats:
+            main.serviceAll()
+            self.store.advanceStamp(0.1)
+        self.assertFalse(otherRemote.alived)
+        self.assertGreater(main.stats['redo_alive'], 0)
+        self.assertEqual(main.redoCounter.value, main.stats['redo_alive'])
+
+        for stack in stacks:
+            stack.server.close()
+            stack.clearLocal()
+            stack.clearRemoteKeeps()
+
+    def testManageCoalesce(self):
+        '''
+        Test stack manage remotes with coalesced heartbeats spread over the period
+        '''
+        console.terse("{0}\n".format(self.testManageCoalesce.__doc__))
+
+        mainData = self.createRoadData(name='main', base=self.base, auto=True)
+        keeping.clearAllKeepSafe(mainData['dirpath'])
+        main = self.createRoadStack(data=mainData,
+                                     eid=1,
+                                     main=True,
+                                     auto=mainData['auto'],
+                                     ha=None,
+                                     coalesce=True)
+
+        others = []
+        for i, port in enumerate([raeting.RAET_TEST_PORT, 7532, 7533]):
+            otherData = self.createRoadData(name='other{0}'.format(i), base=self.base)
+            keeping.clearAllKeepSafe(otherData['dirpath'])
+            others.append(self.createRoadStack(data=otherData,
+                                               eid=0,
+                                               main=None,
+                                               auto=None,
+                                               ha=("", port)))
+        for other in others:
+            self.join(other, main)
+            self.allow(other, main)
+        self.assertIsInstance(main.beater, beating.Coalescer)
+        self.assertEqual(len(main.remotes), 3)
+
+        console.terse("\nPeriod adapts to roster size and backlog *********\n")
+        beater = main.beater
+        self.assertEqual(beater.scale, 1.0) # below knee
+        beater.knee = 1
+        self.assertAlmostEqual(beater.scale, 3 ** 0.5)
+        beater.backlog = 1
+        main.txes.append((b'', None))
+        self.assertAlmostEqual(beater.scale, 2 * 3 ** 0.5)
+        main.txes.clear()
+        beater.limit = 1.5
+        self.assertEqual(beater.scale, 1.5)
+        beater.limit = beating.Coalescer.Limit
+        beater.backlog = 0
+        remote = main.remotes.values()[0]
+        self.assertAlmostEqual(beater.period(remote), remote.period * 3 ** 0.5)
+
+        console.terse("\nDue remotes are spread over the period *********\n")
+        beater.jitter = lambda: 0.5
+        stacks = [main] + others
+        self.store.advanceStamp(estating.RemoteEstate.Period * 2)
+        stamp = self.store.stamp
+        main.manage()
+        self.assertEqual(len(main.transactions), 0)
+        self.assertEqual(len(beater.beats), 0) # none sent in burst
+        self.assertEqual(len(beater.pending), 3)
+        period = remote.period * beater.scale
+        slot = beater.spread * period / 3
+        sends = sorted(deadline for deadline, seq, uid in beater.sends.heap)
+        for i, deadline in enumerate(sends):
+            self.assertAlmostEqual(deadline, stamp + slot * (i + 0.5))
+        self.assertAlmostEqual(main.nextDeadline(), stamp + slot * 0.5)
+        stops = sorted(remote.timer.stop for remote in main.remotes.values())
+        for i, stop in enumerate(stops):
+            self.assertAlmostEqual(stop, stamp + period + slot * (i + 0.5))
+
+        main.manage() # timers not expired so nothing more
+        self.assertEqual(len(beater.pending), 3)
+
+        self.store.advanceStamp(slot)
+        main.serviceAll()
+        self.assertEqual(len(beater.beats), 1) # first slot sent
+        self.assertEqual(len(beater.pending), 2)
+
+        self.serviceAlived(stacks, main.remotes.values())
+        for remote in main.remotes.values():
+            self.assertTrue(remote.alived)
+        self.assertEqual(len(beater.pending), 0)
+        self.assertEqual(len(beater.beats), 0)
+        self.assertEqual(main.stats['alive_complete'], 3)
+        for remote in main.remotes.values(): # refreshed with adapted period
+            self.assertAlmostEqual(remote.timer.duration, period)
+
+        console.terse("\nRemoved remote drops deferred heartbeat *********\n")
+        main.manage(immediate=True)
+        self.assertEqual(len(beater.pending), 3)
+        uid = main.remotes.values()[0].uid
+        main.removeRemote(uid)
+        self.assertEqual(len(beater.pending), 2)
+        self.assertNotIn(uid, beater.sends)
+
+        for stack in stacks:
+            stack.server.close()
+            stack.clearLocal()
+            stack.clearRemoteKeeps()
+
     def testJoinFromMain(self):
         '''
         Test join, allow, alive initiated by main
@@ -1181,6 +1395,8 @@ def runSome():
     names = ['testAlive',
              'testAliveMultiple',
              'testManage',
+             'testManageBeats',
+             'testManageCoalesce',
              'testAliveUnjoinedOther',
              'testAllowUnjoinedOther',
              'testAliveUnjoinedMain',
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for sharded road stacks sharing a udp port
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import stat
+import time
+import tempfile
+import shutil
+
+from ioflo.base.odicting import odict
+from ioflo.base import aiding
+from ioflo.base.aiding import StoreTimer
+from ioflo.base import storing
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting, nacling
+from raet.road import keeping, estating, stacking, packeting, sharding
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Road main sharded over two stacks on one port
+    '''
+
+    def setUp(self):
+        self.store = storing.Store(stamp=0.0)
+        self.timer = StoreTimer(store=self.store, duration=1.0)
+
+        self.baseDirpath=tempfile.mkdtemp(prefix="raet",  suffix="base", dir='/tmp')
+        stacking.RoadStack.Bk = raeting.bodyKinds.json
+        stacking.RoadStack.Hk = raeting.headKinds.raet
+
+        signer = nacling.Signer()
+        privateer = nacling.Privateer()
+        self.mains = []
+        self.mainDirpaths = []
+        for index in range(2):
+            mainName = "main"
+            mainDirpath = os.path.join(self.baseDirpath, 'road', 'keep',
+                                       "{0}{1}".format(mainName, index))
+            keeping.clearAllKeepSafe(mainDirpath)
+            self.mainDirpaths.append(mainDirpath)
+            local = estating.LocalEstate(eid=1,
+                                         name=mainName,
+                                         sigkey=signer.keyhex,
+                                         prikey=privateer.keyhex,)
+            main = stacking.RoadStack(name=mainName,
+                                      local=local,
+                                      auto=True,
+                                      main=True,
+                                      dirpath=mainDirpath,
+                                      store=self.store,
+                                      shard=index,
+                                      shards=2)
+            self.mains.append(main)
+
+        otherName = "other"
+        otherDirpath = os.path.join(self.baseDirpath, 'road', 'keep', otherName)
+        keeping.clearAllKeepSafe(otherDirpath)
+        signer = nacling.Signer()
+        privateer = nacling.Privateer()
+        local = estating.LocalEstate(eid=0,
+                                     name=otherName,
+                                     ha=("", raeting.RAET_TEST_PORT),
+                                     sigkey=signer.keyhex,
+                                     prikey=privateer.keyhex,)
+        self.other = stacking.RoadStack(name=otherName,
+                                        local=local,
+                                        dirpath=otherDirpath,
+                                        store=self.store)
+
+    def tearDown(self):
+        for stack in self.mains + [self.other]:
+            stack.close()
+            stack.clearLocal()
+            stack.clearRemoteKeeps()
+
+        if os.path.exists(self.baseDirpath):
+            shutil.rmtree(self.baseDirpath)
+
+    def service(self, duration=2.0):
+        '''
+        Utility method to service queues. Call from test method.
+        '''
+        stacks = self.mains + [self.other]
+        self.timer.restart(duration=duration)
+        while not self.timer.expired:
+            for stack in stacks:
+                stack.serviceAll()
+            if not any(stack.transactions for stack in stacks):
+                break
+            self.store.advanceStamp(0.1)
+            time.sleep(0.1)
+
+    def testNextEid(self):
+        '''
+        Test shards allocate only estate ids that they own
+        '''
+        console.terse("{0}\n".format(self.testNextEid.__doc__))
+        for main in self.mains:
+            self.assertIsNotNone(main.channel)
+            self.assertEqual(main.server.ha, self.mains[0].server.ha)
+            eids = [main.nextEid() for i in range(5)]
+            self.assertEqual(len(set(eids)), 5)
+            for eid in eids:
+                self.assertEqual(sharding.owner(eid, main.shards), main.shard)
+        self.assertIs(self.other.channel, None)
+        self.assertEqual(self.other.shards, 1)
+
+        # channel is private to user beside the keeps
+        channel = self.mains[0].channel
+        self.assertEqual(channel.dirpath,
+                         os.path.join(self.baseDirpath, 'road', 'keep', 'shard'))
+        self.assertEqual(stat.S_IMODE(os.stat(channel.dirpath).st_mode), stat.S_IRWXU)
+        self.assertEqual(channel.peers, set([self.mains[1].channel.server.ha]))
+        path = os.path.join(self.baseDirpath, 'file')
+        open(path, 'w').close()
+        self.assertRaises(raeting.StackError, sharding.Channel,
+                          port=raeting.RAET_PORT, index=0, count=2, dirpath=path)
+        self.assertRaises(raeting.StackError, stacking.RoadStack, shard=2, shards=2)
+
+    def testShardedMessage(self):
+        '''
+        Test join allow and message with the shard the kernel picks and
+        forwarding of packets that land on the other shard
+        '''
+        console.terse("{0}\n".format(self.testShardedMessage.__doc__))
+        self.other.join(ha=('127.0.0.1', raeting.RAET_PORT))
+        self.service()
+        owners = [main for main in self.mains if main.remotes]
+        self.assertEqual(len(owners), 1)
+        owner = owners[0]
+        remote = owner.remotes.values()[0]
+        self.assertTrue(remote.joined)
+        self.assertEqual(sharding.owner(remote.uid, owner.shards), owner.shard)
+
+        self.other.allow()
+        self.service()
+        self.assertTrue(remote.allowed)
+
+        self.other.transmit(odict(house="Mama mia", queue="fix me"))
+        self.service()
+        self.assertEqual(list(owner.rxMsgs), [odict(house="Mama mia", queue="fix me")])
+
+        # packet that lands on wrong shard is forwarded to owner
+        stray = self.mains[1 - owner.shard]
+        packet = packeting.TxPacket(stack=self.other,
+                                    kind=raeting.pcktKinds.message,
+                                    embody=odict(house="Mama mia"),
+                                    data=odict(se=self.other.local.uid,
+                                               de=owner.local.uid,
+                                               tk=raeting.trnsKinds.message,
+                                               fk=raeting.footKinds.nacl))
+        packet.pack()
+        sa = ('127.0.0.1', raeting.RAET_TEST_PORT)
+        self.assertIs(stray.parseOuterRx(packet.packed, sa, stray.server.ha), None)
+        self.assertEqual(stray.stats['shard_forward'], 1)
+        owner.serviceReceives()
+        self.assertEqual(list(owner.rxes), [(packet.packed, sa, owner.server.ha)])
+        raw, sa, da = owner.rxes.popleft()
+        self.assertIsNotNone(owner.parseOuterRx(raw, sa, da))
+
+        # datagram from socket that is not a shard is dropped
+        intruder = aiding.SocketUxdNb(ha=os.path.join(self.baseDirpath, 'intruder.uxd'),
+                                      bufsize=raeting.UXD_MAX_PACKET_SIZE)
+        self.assertTrue(intruder.reopen())
+        intruder.send("127.0.0.1\n7531\n{0}".format(packet.packed),
+                      owner.channel.server.ha)
+        intruder.close()
+        self.assertEqual(owner.channel.receive(), [])
+
+    def testShardedKeep(self):
+        '''
+        Test shards load only the remotes they own from a shared keep and
+        close their channel
+        '''
+        console.terse("{0}\n".format(self.testShardedKeep.__doc__))
+        main = self.mains[0]
+        for eid in range(2, 6):
+            main.addRemote(estating.RemoteEstate(stack=main,
+                                                 eid=eid,
+                                                 name="remote{0}".format(eid),
+                                                 ha=('127.0.0.1', 7560 + eid),
+                                                 verkey=nacling.Signer().verhex,
+                                                 pubkey=nacling.Privateer().pubhex,
+                                                 period=main.period,
+                                                 offset=main.offset))
+        main.dumpRemotes()
+
+        stray = self.mains[1]
+        path = stray.channel.server.ha
+        self.assertTrue(os.path.exists(path))
+        stray.close()
+        self.assertIs(stray.channel, None)
+        self.assertFalse(os.path.exists(path))
+
+        local = estating.LocalEstate(eid=1,
+                                     name=main.local.name,
+                                     sigkey=main.local.signer.keyhex,
+                                     prikey=main.local.priver.keyhex,)
+        shard = stacking.RoadStack(name=main.name,
+                                   local=local,
+                                   auto=True,
+                                   main=True,
+                                   dirpath=self.mainDirpaths[0],
+                                   store=self.store,
+                                   shard=1,
+                                   shards=2)
+        self.mains[1] = shard
+        self.assertEqual(sorted(shard.remotes.keys()), [3, 5])
+        self.assertTrue(shard.owns(3))
+        self.assertFalse(shard.owns(2))
+        self.assertTrue(self.other.owns(2))
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testNextEid',
+             'testShardedMessage',
+             'testShardedKeep', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testShardedMessage')
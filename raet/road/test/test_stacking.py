@@ -12,6 +12,7 @@ else:
 
 import os
 import time
+import warnings
 import tempfile
 import shutil
 
@@ -22,8 +23,8 @@ from ioflo.base import storing
 from ioflo.base.consoling import getConsole
 console = getConsole()
 
-from raet import raeting, nacling
-from raet.road import keeping, estating, stacking, transacting
+from raet import raeting, nacling, batching, executing
+from raet.road import keeping, estating, stacking, transacting, packeting, tracing
 
 def setUpModule():
     console.reinit(verbosity=console.Wordage.concise)
@@ -40,7 +41,14 @@ class BasicTestCase(unittest.TestCase):
 
         self.baseDirpath=tempfile.mkdtemp(prefix="raet",  suffix="base", dir='/tmp')
         stacking.RoadStack.Bk = raeting.bodyKinds.json
+        stacking.RoadStack.Hk = raeting.headKinds.raet
 
+        self.createStacks()
+
+    def createStacks(self, **kwa):
+        '''
+        Utility method to create main and other stacks with stack options kwa
+        '''
         #main stack
         mainName = "main"
         mainDirpath = os.path.join(self.baseDirpath, 'road', 'keep', mainName)
@@ -72,7 +80,8 @@ class BasicTestCase(unittest.TestCase):
                                          auto=True,
                                          main=True,
                                          dirpath=mainDirpath,
-                                         store=self.store)
+                                         store=self.store,
+                                         **kwa)
 
         local = estating.LocalEstate(eid=0,
                                      name=otherName,
@@ -83,22 +92,27 @@ class BasicTestCase(unittest.TestCase):
         self.other = stacking.RoadStack(name=otherName,
                                          local=local,
                                          dirpath=otherDirpath,
-                                         store=self.store)
+                                         store=self.store,
+                                         **kwa)
 
+    def tearDown(self):
+        self.closeStacks()
 
+        if os.path.exists(self.baseDirpath):
+            shutil.rmtree(self.baseDirpath)
 
-    def tearDown(self):
-        self.main.server.close()
-        self.other.server.close()
+    def closeStacks(self):
+        '''
+        Utility method to close main and other stacks and clear their keeps
+        '''
+        self.main.close()
+        self.other.close()
 
         self.main.clearLocal()
         self.main.clearRemoteKeeps()
         self.other.clearLocal()
         self.other.clearRemoteKeeps()
 
-        if os.path.exists(self.baseDirpath):
-            shutil.rmtree(self.baseDirpath)
-
 
     def join(self, mha=None, timeout=None):
         '''
@@ -228,6 +242,7 @@ class BasicTestCase(unittest.TestCase):
         self.assertEqual(len(self.main.transactions), 0)
         remote = self.main.remotes.values()[0]
         self.assertTrue(remote.allowed)
+        self.assertIsNotNone(remote.box)
         self.assertEqual(remote.uid, 2)
         self.assertTrue(2 in self.main.remotes)
         self.assertTrue(len(self.main.uids), 1)
@@ -244,6 +259,7 @@ class BasicTestCase(unittest.TestCase):
         self.assertEqual(len(self.other.transactions), 0)
         remote = self.other.remotes.values()[0]
         self.assertTrue(remote.allowed)
+        self.assertIsNotNone(remote.box)
         self.assertEqual(remote.uid, 1)
         self.assertTrue(1 in self.other.remotes)
         self.assertTrue(len(self.other.uids), 1)
@@ -278,7 +294,8 @@ class BasicTestCase(unittest.TestCase):
             console.terse("Estate '{0}' rxed:\n'{1}'\n".format(self.other.local.name, msg))
         self.assertDictEqual(body, self.other.rxMsgs[0])
 
-    def bidirectional(self, bk=raeting.bodyKinds.json, mains=None, others=None, duration=3.0):
+    def bidirectional(self, bk=raeting.bodyKinds.json, mains=None, others=None,
+                      duration=3.0, hk=raeting.headKinds.raet):
         '''
         Initialize
             main on port 7530 with eid of 1
@@ -288,6 +305,7 @@ class BasicTestCase(unittest.TestCase):
             other eid of 2 joined and allowed
         '''
         stacking.RoadStack.Bk = bk
+        stacking.RoadStack.Hk = hk
         mains = mains or []
         other = others or []
 
@@ -437,6 +455,431 @@ class BasicTestCase(unittest.TestCase):
 
         self.bidirectional(bk=raeting.bodyKinds.msgpack, mains=mains, others=others)
 
+    def testMsgBothwaysBatched(self):
+        '''
+        Test message transactions with batched server receive and transmit
+        '''
+        console.terse("{0}\n".format(self.testMsgBothwaysBatched.__doc__))
+
+        for stack in (self.main, self.other):
+            stack.rxbatch = 4
+            stack.receiver = batching.Receiver(stack.server, count=stack.rxbatch)
+            stack.txbatch = 3
+            stack.transmitter = batching.Transmitter(stack.server, count=stack.txbatch)
+
+        others = []
+        mains = []
+        for i in range(10):
+            others.append(odict(house="Mama mia{0}".format(i), queue="fix me"))
+            mains.append(odict(house="Papa pia{0}".format(i), queue="help me"))
+
+        self.bidirectional(bk=raeting.bodyKinds.json, mains=mains, others=others)
+
+    def testMsgBothwaysPlain(self):
+        '''
+        Test message transactions with bodies decoded to plain dicts
+        '''
+        console.terse("{0}\n".format(self.testMsgBothwaysPlain.__doc__))
+
+        for stack in (self.main, self.other):
+            stack.plain = True
+
+        others = []
+        mains = []
+        for i in range(4):
+            others.append(odict(house="Mama mia{0}".format(i), queue="fix me"))
+            mains.append(odict(house="Papa pia{0}".format(i), queue="help me"))
+        stuff = "".join([str(i % 10) for i in range(4096)])
+        others.append(odict(house="Mama mia", queue="big me", stuff=stuff))
+        mains.append(odict(house="Papa pia", queue="big me", stuff=stuff))
+
+        self.bidirectional(bk=raeting.bodyKinds.msgpack, mains=mains, others=others)
+
+        for msg in list(self.main.rxMsgs) + list(self.other.rxMsgs):
+            self.assertIs(type(msg), dict)
+
+    def testMsgBothwaysCrypted(self):
+        '''
+        Test message transactions with crypto executor
+        '''
+        console.terse("{0}\n".format(self.testMsgBothwaysCrypted.__doc__))
+
+        self.closeStacks()
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            self.createStacks(verifiers=2) # deprecated alias of crypters
+        self.assertEqual([warning.category for warning in caught],
+                         [DeprecationWarning] * 2)
+        for stack in (self.main, self.other):
+            self.assertEqual(stack.crypters, 2)
+        self.closeStacks()
+        self.createStacks(crypters=2)
+        for stack in (self.main, self.other):
+            self.assertIsInstance(stack.executor, executing.Executor)
+            self.assertEqual(stack.executor.workers, 2)
+
+        others = []
+        mains = []
+        for i in range(10):
+            others.append(odict(house="Mama mia{0}".format(i), queue="fix me"))
+            mains.append(odict(house="Papa pia{0}".format(i), queue="help me"))
+        stuff = "".join([str(i % 10) for i in range(4096)])
+        others.append(odict(house="Mama mia", queue="big me", stuff=stuff))
+        mains.append(odict(house="Papa pia", queue="big me", stuff=stuff))
+
+        self.bidirectional(bk=raeting.bodyKinds.json, mains=mains, others=others)
+        self.assertNotIn('parsing_outer_error', self.main.stats)
+        self.assertNotIn('parsing_outer_error', self.other.stats)
+
+        # tampered packet fails batch verification and is dropped
+        packet = packeting.TxPacket(stack=self.other,
+                                    kind=raeting.pcktKinds.message,
+                                    embody=odict(house="Mama mia"),
+                                    data=odict(se=self.other.local.uid,
+                                               de=self.main.local.uid,
+                                               tk=raeting.trnsKinds.message,
+                                               fk=raeting.footKinds.nacl,
+                                               ck=raeting.coatKinds.nacl,
+                                               bk=raeting.bodyKinds.json))
+        packet.pack()
+        hl = packet.data['hl']
+        tampered = packet.packed[:hl] + chr(ord(packet.packed[hl]) ^ 0x01) + packet.packed[hl + 1:]
+        self.main.rxes.extend([(packet.packed, self.other.local.ha, self.main.local.ha),
+                               (tampered, self.other.local.ha, self.main.local.ha)])
+        packets = [self.main.parseOuterRx(raw, sa, da, verify=False)
+                        for raw, sa, da in self.main.rxes]
+        self.main.rxes.clear()
+        results = self.main.verifyRxes(packets)
+        remote = self.main.remotes[self.other.local.uid]
+        self.assertEqual(results, [remote.verfer, False])
+        self.assertIs(packets[0].boxed, remote.box) # decrypted in executor
+        self.assertIs(packets[1].boxed, None)
+        self.assertTrue(self.main.parseInner(packets[0]))
+        self.assertEqual(packets[0].body.data, odict(house="Mama mia"))
+        self.assertTrue(self.main.verifiedRx(packets[0], results[0]))
+        self.assertFalse(self.main.verifiedRx(packets[1], results[1]))
+        self.assertEqual(self.main.stats['parsing_outer_error'], 1)
+
+        for stack in (self.main, self.other): # close stops worker threads
+            executor = stack.executor
+            stack.close()
+            self.assertIs(stack.executor, None)
+            self.assertFalse(any(worker.is_alive() for worker in executor.pool._pool))
+
+    def testSegmentedBinary(self):
+        '''
+        Test segmented message transactions with binary packet head
+        '''
+        console.terse("{0}\n".format(self.testSegmentedBinary.__doc__))
+
+        stuff = []
+        for i in range(300):
+            stuff.append(str(i).rjust(10, " "))
+        stuff = "".join(stuff)
+
+        others = []
+        mains = []
+        others.append(odict(house="Snake eyes", queue="near stuff", stuff=stuff))
+        mains.append(odict(house="Craps", queue="far stuff", stuff=stuff))
+
+        bloat = []
+        for i in range(300):
+            bloat.append(str(i).rjust(100, " "))
+        bloat = "".join(bloat)
+        others.append(odict(house="Other", queue="big stuff", bloat=bloat))
+        mains.append(odict(house="Main", queue="gig stuff", bloat=bloat))
+
+        self.bidirectional(bk=raeting.bodyKinds.json, mains=mains, others=others,
+                           hk=raeting.headKinds.binary)
+
+    def testSegmentedWindowed(self):
+        '''
+        Test segmented message transactions with sliding window
+        '''
+        console.terse("{0}\n".format(self.testSegmentedWindowed.__doc__))
+
+        for stack in (self.main, self.other):
+            stack.window = 8
+
+        bloat = []
+        for i in range(300):
+            bloat.append(str(i).rjust(100, " "))
+        bloat = "".join(bloat)
+
+        others = []
+        mains = []
+        others.append(odict(house="Snake eyes", queue="near stuff", stuff=bloat[:3000]))
+        mains.append(odict(house="Craps", queue="far stuff", stuff=bloat[:3000]))
+        others.append(odict(house="Other", queue="big stuff", bloat=bloat))
+        mains.append(odict(house="Main", queue="gig stuff", bloat=bloat))
+
+        self.bidirectional(bk=raeting.bodyKinds.json, mains=mains, others=others)
+        self.assertNotIn('message_window_loss', self.other.stats)
+
+    def testSegmentedWindowedLossy(self):
+        '''
+        Test segmented message transaction with sliding window over lossy link
+        '''
+        console.terse("{0}\n".format(self.testSegmentedWindowedLossy.__doc__))
+
+        self.join()
+        self.allow()
+        self.other.window = 8
+
+        txed = []
+        tx = self.other.tx
+        def lossy(packed, duid):
+            txed.append(packed)
+            if len(txed) in (3, 7, 8, 15, 16, 30): # drop first sends
+                return
+            tx(packed, duid)
+        self.other.tx = lossy
+
+        bloat = []
+        for i in range(300):
+            bloat.append(str(i).rjust(100, " "))
+        body = odict(house="Other", queue="big stuff", bloat="".join(bloat))
+        self.other.transmit(body)
+        self.service(duration=10.0)
+
+        self.assertEqual(len(self.other.transactions), 0)
+        self.assertEqual(len(self.main.transactions), 0)
+        self.assertEqual(len(self.main.rxMsgs), 1)
+        self.assertDictEqual(self.main.rxMsgs[0], body)
+        self.assertTrue(self.other.stats.get('message_window_loss', 0) >= 1)
+
+    def testRemoteIndexes(self):
+        '''
+        Test remote lookup indexes by ha and keys stay in sync
+        '''
+        console.terse("{0}\n".format(self.testRemoteIndexes.__doc__))
+        stack = self.main
+
+        remotes = []
+        for i in range(3):
+            remote = estating.RemoteEstate(stack=stack,
+                                           name="remote{0}".format(i),
+                                           ha=('127.0.0.1', 7540 + i),
+                                           verkey=nacling.Signer().verhex,
+                                           pubkey=nacling.Privateer().pubhex,
+                                           period=stack.period,
+                                           offset=stack.offset)
+            stack.addRemote(remote)
+            remotes.append(remote)
+
+        for remote in remotes:
+            self.assertIs(stack.fetchRemoteByHa(remote.ha), remote)
+            self.assertIs(stack.fetchRemoteByHostPort(remote.host, remote.port), remote)
+            self.assertIs(stack.fetchRemoteByKeys(remote.verfer.keyhex, ''), remote)
+            self.assertIs(stack.fetchRemoteByKeys('', remote.pubber.keyhex), remote)
+        self.assertIs(stack.fetchRemoteByHa(('127.0.0.1', 7550)), None)
+        self.assertIs(stack.fetchRemoteByKeys('', ''), None)
+
+        remote = remotes[0]
+        old = remote.ha
+        remote.ha = ('127.0.0.1', 7550)
+        self.assertIs(stack.fetchRemoteByHa(old), None)
+        self.assertIs(stack.fetchRemoteByHa(('127.0.0.1', 7550)), remote)
+
+        oldverhex = remote.verfer.keyhex
+        oldpubhex = remote.pubber.keyhex
+        verhex = nacling.Signer().verhex
+        pubhex = nacling.Privateer().pubhex
+        remote.verfer = nacling.Verifier(verhex)
+        remote.pubber = nacling.Publican(pubhex)
+        self.assertIs(stack.fetchRemoteByKeys(oldverhex, oldpubhex), None)
+        self.assertIs(stack.fetchRemoteByKeys(verhex, pubhex), remote)
+
+        stack.moveRemote(old=remote.uid, new=remote.uid + 100)
+        stack.renameRemote(old=remote.name, new='renamed')
+        self.assertIs(stack.fetchRemoteByHa(remote.ha), remote)
+        self.assertIs(stack.fetchRemoteByKeys(verhex, pubhex), remote)
+
+        # remotes sharing a key, survivor found after first is removed
+        first = estating.RemoteEstate(stack=stack,
+                                      name="first",
+                                      ha=('127.0.0.1', 7560),
+                                      verkey=verhex,
+                                      period=stack.period,
+                                      offset=stack.offset)
+        stack.addRemote(first)
+        second = estating.RemoteEstate(stack=stack,
+                                       name="second",
+                                       ha=('127.0.0.1', 7560),
+                                       verkey=verhex,
+                                       period=stack.period,
+                                       offset=stack.offset)
+        stack.addRemote(second)
+        self.assertIs(stack.fetchRemoteByHa(('127.0.0.1', 7560)), first)
+        self.assertIs(stack.fetchRemoteByKeys(verhex, ''), remote)
+        stack.removeRemote(first.uid)
+        self.assertIs(stack.fetchRemoteByHa(('127.0.0.1', 7560)), second)
+        stack.removeRemote(remote.uid)
+        self.assertIs(stack.fetchRemoteByKeys(verhex, ''), second)
+        stack.removeRemote(second.uid)
+        self.assertIs(stack.fetchRemoteByHa(('127.0.0.1', 7560)), None)
+        self.assertIs(stack.fetchRemoteByKeys(verhex, ''), None)
+        remotes.remove(remote)
+
+        for remote in remotes:
+            stack.removeRemote(remote.uid)
+            self.assertIs(stack.fetchRemoteByHa(remote.ha), None)
+            self.assertIs(stack.fetchRemoteByKeys(remote.verfer.keyhex,
+                                                  remote.pubber.keyhex), None)
+        self.assertEqual(len(stack.haRemotes), 0)
+        self.assertEqual(len(stack.verRemotes), 0)
+        self.assertEqual(len(stack.pubRemotes), 0)
+
+    def testScheduledManage(self):
+        '''
+        Test manage and process only touch remotes and transactions whose
+        deadline has passed
+        '''
+        console.terse("{0}\n".format(self.testScheduledManage.__doc__))
+        stack = self.main
+
+        remotes = []
+        for i in range(3):
+            remote = estating.RemoteEstate(stack=stack,
+                                           name="remote{0}".format(i),
+                                           ha=('127.0.0.1', 7540 + i),
+                                           period=1.0 + i,
+                                           offset=0.0)
+            stack.addRemote(remote)
+            remotes.append(remote)
+        self.assertEqual(len(stack.remoteDeadlines), 3)
+        self.assertEqual(stack.remoteDeadlines.deadline, remotes[0].timer.stop)
+
+        start = self.store.stamp
+        self.store.advanceStamp(1.0)
+        stack.manage()
+        self.assertEqual(remotes[0].timer.start, self.store.stamp)
+        self.assertEqual(remotes[1].timer.start, start)
+        self.assertEqual(remotes[2].timer.start, start)
+        self.assertEqual(stack.remoteDeadlines.deadline, remotes[1].timer.stop)
+
+        self.assertEqual(len(stack.transactions), 1) # joiner to unjoined remote0
+        index, transaction = stack.transactions.items()[0]
+        stack.process()
+        self.assertIn(index, stack.trnsDeadlines)
+        self.assertEqual(stack.trnsDeadlines.deadline, transaction.deadline)
+        self.assertEqual(transaction.deadline, transaction.redoTimer.stop)
+
+        self.store.advanceStamp(transaction.timeout)
+        stack.process() # times out
+        self.assertEqual(len(stack.transactions), 0)
+        self.assertEqual(len(stack.trnsDeadlines), 0)
+
+        stack.removeRemote(remotes[1].uid)
+        self.assertNotIn(remotes[1], stack.remoteDeadlines)
+        stack.manage(immediate=True)
+        self.assertEqual(remotes[0].timer.start, self.store.stamp)
+        self.assertEqual(remotes[2].timer.start, self.store.stamp)
+        self.assertEqual(len(stack.remoteDeadlines), 2)
+
+    def testWait(self):
+        '''
+        Test wait blocks until received data or next deadline and
+        serviceUntil services between waits
+        '''
+        console.terse("{0}\n".format(self.testWait.__doc__))
+        self.assertIs(self.main.nextDeadline(), None)
+        start = time.time()
+        self.assertFalse(self.main.wait(timeout=0.2))
+        self.assertGreaterEqual(time.time() - start, 0.15)
+
+        self.other.join()
+        self.other.serviceAll()
+        transaction = self.other.transactions.values()[0]
+        self.assertEqual(self.other.nextDeadline(), transaction.deadline)
+        start = time.time()
+        self.assertTrue(self.main.wait(timeout=2.0))
+        self.assertLess(time.time() - start, 1.0)
+
+        # nothing received so other wakes at its redo deadline
+        self.store.advanceStamp(transaction.redoTimer.stop - self.store.stamp - 0.1)
+        start = time.time()
+        self.assertFalse(self.other.wait(timeout=2.0))
+        self.assertLess(time.time() - start, 1.0)
+
+        for i in range(5):
+            self.main.serviceUntil(0.1, stamp=False)
+            self.other.serviceUntil(0.1, stamp=False)
+        remote = self.other.remotes.values()[0]
+        self.assertTrue(remote.joined)
+
+    def testMetrics(self):
+        '''
+        Test stack metrics of datagrams queues and transactions
+        '''
+        console.terse("{0}\n".format(self.testMetrics.__doc__))
+        self.bootstrap()
+        snap = self.main.snapshotMetrics()
+        self.assertGreater(snap['rx_datagrams'], 0)
+        self.assertGreater(snap['tx_datagrams'], 0)
+        self.assertEqual(snap['rxes'], 0)
+        self.assertEqual(snap['transactions'], 0)
+        self.assertEqual(snap['remotes'], 1)
+        self.assertEqual(snap['transaction_seconds']['count'], 4) # join allow two messages
+        self.assertEqual(snap['transaction_redos'], 0)
+        self.assertEqual(snap['stats'], self.main.stats)
+
+        self.other.transmit(odict(house="Mama mia", queue="fix me"))
+        self.assertEqual(self.other.meter.snapshot()['tx_msgs'], 1)
+        self.other.serviceTxMsgs()
+        self.store.advanceStamp(self.other.transactions.values()[0].redoTimer.duration)
+        self.other.serviceAll() # no ack so redo
+        self.assertEqual(self.other.redoCounter.value, 1)
+        self.assertEqual(self.other.stats['redo_segment'], 1) # from counter
+        self.assertIs(self.other.statCounter('redo_segment'),
+                      self.other.meter.metrics['redo_segment'])
+        self.other.incStat('redo_segment')
+        self.assertEqual(self.other.statCounter('redo_segment').value, 2)
+        self.assertEqual(self.other.stats['redo_segment'], 2)
+        self.other.clearStats()
+        self.assertEqual(self.other.stats['redo_segment'], 0)
+        self.assertEqual(self.other.snapshotMetrics()['redo_segment'], 0)
+
+        snap = self.main.snapshotMetrics(reset=True)
+        snap = self.main.snapshotMetrics()
+        self.assertEqual(snap['rx_datagrams'], 0)
+        self.assertEqual(snap['transaction_seconds']['count'], 0)
+        self.assertEqual(snap['remotes'], 1)
+        self.assertTrue(all(value == 0 for value in snap['stats'].values()))
+        self.assertIn('raet_transaction_seconds_count{stack="main"} 0\n', self.main.meter.export())
+
+    def testTracing(self):
+        '''
+        Test transaction tracing spans and disabled tracer
+        '''
+        console.terse("{0}\n".format(self.testTracing.__doc__))
+        self.assertIsInstance(self.main.tracer, tracing.ConsoleTracer)
+        self.other.tracer = tracing.SpanTracer(clock=lambda: self.store.stamp)
+        self.bootstrap()
+        tracer = self.other.tracer
+        self.assertEqual(len(tracer.active), 0)
+        kinds = [span.kind for span in tracer.spans]
+        self.assertEqual(kinds[:2], ['Joiner', 'Allower'])
+        self.assertIn('Messenger', kinds)
+        self.assertIn('Messengent', kinds)
+        joiner = tracer.spans[0]
+        self.assertEqual(joiner.stack, 'other')
+        self.assertEqual(joiner.remote, 'main')
+        self.assertGreaterEqual(joiner.duration, 0.0)
+        self.assertEqual(joiner.events[0][1], 'Do Join')
+        self.assertEqual(joiner.dump()['events'], joiner.events)
+        self.assertEqual(tracer.slowest(1)[0].duration, max(span.duration for span in tracer.spans))
+
+        self.closeStacks()
+        self.createStacks(tracer=None) # explicit None disables tracing
+        self.assertIs(self.main.tracer, None)
+        self.assertIs(self.other.tracer, None)
+        self.bootstrap()
+        self.main.rxMsgs.clear()
+        self.other.transmit(odict(house="Mama mia", queue="fix me"))
+        self.service()
+        self.assertEqual(len(self.main.rxMsgs), 1)
+
     def testJoinForever(self):
         '''
         Test other joining with timeout set to 0.0 and default
@@ -707,8 +1150,19 @@ def runSome():
              'testBootstrapMsgpack',
              'testMsgBothwaysJson',
              'testMsgBothwaysMsgpack',
+             'testMsgBothwaysBatched',
+             'testMsgBothwaysPlain',
+             'testMsgBothwaysCrypted',
              'testSegmentedJson',
              'testSegmentedMsgpack',
+             'testSegmentedBinary',
+             'testSegmentedWindowed',
+             'testSegmentedWindowedLossy',
+             'testRemoteIndexes',
+             'testScheduledManage',
+             'testWait',
+             'testMetrics',
+             'testTracing',
              'testJoinForever',
              'testStaleNack',
              'testBasicAlive', ]
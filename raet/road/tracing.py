@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+'''
+tracing.py raet protocol transaction tracing classes
+
+A road stack calls the enter hook of its tracer when a transaction is added,
+the exit hook when it is removed, and transactions call the event hook at each
+step such as a send, redo, or timeout. The event message is passed as a format
+string and args so it is only formatted when a tracer writes or records it.
+Set stack.tracer to None or create the stack with tracer=None to disable
+tracing altogether.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+from collections import deque
+from timeit import default_timer
+
+# Import ioflo libs
+from ioflo.base.odicting import odict
+
+from ..consoling import getConsole
+console = getConsole()
+
+DEFAULT_TRACER = object() # stack tracer option default that means a ConsoleTracer
+
+class Tracer(object):
+    '''
+    Base transaction tracer whose hooks do nothing
+    '''
+    def enter(self, transaction, index):
+        '''
+        Hook called when transaction is added to its stack at index
+        '''
+        pass
+
+    def exit(self, transaction, index):
+        '''
+        Hook called when transaction is removed from its stack at index
+        '''
+        pass
+
+    def event(self, transaction, what, args):
+        '''
+        Hook called when transaction does step described by format string what
+        with args
+        '''
+        pass
+
+class ConsoleTracer(Tracer):
+    '''
+    Writes transaction events to the console at verbosity and enters at
+    verbose. Only formats when the console verbosity would write.
+    This is the default tracer of road stacks.
+    '''
+    def __init__(self, verbosity=None):
+        '''
+        Setup ConsoleTracer instance
+        '''
+        self.verbosity = (verbosity if verbosity is not None
+                          else console.Wordage.concise)
+
+    def enter(self, transaction, index):
+        console.verbose("Added {0} transaction to {1} at '{2}'\n",
+                        transaction.__class__.__name__, transaction.stack.name, index)
+
+    def event(self, transaction, what, args):
+        if not console.enabled(self.verbosity):
+            return
+        console.write("{0} {1}. {2} at {3}\n",
+                      transaction.__class__.__name__,
+                      transaction.stack.name,
+                      what.format(*args),
+                      transaction.stack.store.stamp,
+                      verbosity=self.verbosity)
+
+class Span(object):
+    '''
+    Timing span of one transaction from enter to exit
+    start and stop are clock times, events is list of (time, message) duples
+    '''
+    def __init__(self, kind, stack, remote, index, start):
+        '''
+        Setup Span instance
+        '''
+        self.kind = kind
+        self.stack = stack
+        self.remote = remote
+        self.index = index
+        self.start = start
+        self.stop = None
+        self.events = []
+
+    @property
+    def duration(self):
+        '''
+        Property is seconds from start to stop, None if not stopped
+        '''
+        if self.stop is None:
+            return None
+        return self.stop - self.start
+
+    def dump(self):
+        '''
+        Returns odict of span fields
+        '''
+        return odict([('kind', self.kind),
+                      ('stack', self.stack),
+                      ('remote', self.remote),
+                      ('index', self.index),
+                      ('start', self.start),
+                      ('stop', self.stop),
+                      ('duration', self.duration),
+                      ('events', list(self.events))])
+
+class SpanTracer(Tracer):
+    '''
+    Records a timing span per transaction with its events
+    clock is callable that returns time in seconds, default wall clock
+    limit is max number of finished spans kept, oldest dropped first
+    Events after a transaction is removed are not recorded
+    '''
+    def __init__(self, clock=None, limit=None):
+        '''
+        Setup SpanTracer instance
+        '''
+        self.clock = clock or default_timer
+        self.active = dict() # spans of live transactions keyed by id
+        self.indexes = dict() # ids of live transactions keyed by index
+        self.spans = deque(maxlen=limit) # finished spans
+
+    def enter(self, transaction, index):
+        key = id(transaction)
+        if key in self.active:
+            return # re-added
+        prior = self.indexes.get(index)
+        if prior is not None: # replaced without removal so never finishes
+            del self.active[prior]
+        remote = transaction.remote.name if transaction.remote else None
+        self.active[key] = Span(kind=transaction.__class__.__name__,
+                                stack=transaction.stack.name,
+                                remote=remote,
+                                index=index,
+                                start=self.clock())
+        self.indexes[index] = key
+
+    def exit(self, transaction, index):
+        span = self.active.pop(id(transaction), None)
+        if span is None:
+            return
+        if self.indexes.get(span.index) == id(transaction):
+            del self.indexes[span.index]
+        if transaction.remote: # name may be learned during transaction
+            span.remote = transaction.remote.name
+        span.stop = self.clock()
+        self.spans.append(span)
+
+    def event(self, transaction, what, args):
+        span = self.active.get(id(transaction))
+        if span is not None:
+            span.events.append((self.clock(), what.format(*args)))
+
+    def slowest(self, count=10):
+        '''
+        Returns list of up to count finished spans with longest duration first
+        '''
+        return sorted(self.spans, key=lambda span: span.duration, reverse=True)[:count]
@@ -24,7 +24,7 @@ from .. import nacling
 from . import packeting
 from . import estating
 
-from ioflo.base.consoling import getConsole
+from ..consoling import getConsole
 console = getConsole()
 
 
@@ -33,6 +33,7 @@ class Transaction(object):
     RAET protocol transaction class
     '''
     Timeout =  5.0 # default timeout
+    redoTimer = None # subclasses with retries provide redo timer
 
     def __init__(self, stack=None, remote=None, kind=None, timeout=None,
                  rmt=False, bcst=False, wait=False, sid=None, tid=None,
@@ -49,6 +50,7 @@ class Transaction(object):
             timeout = self.Timeout
         self.timeout = timeout
         self.timer = aiding.StoreTimer(self.stack.store, duration=self.timeout)
+        self.stamp = self.stack.store.stamp # store stamp at start
 
         self.rmt = rmt # cf flag
         self.bcst = bcst # bf flag
@@ -74,6 +76,20 @@ class Transaction(object):
             re = self.stack.remotes[0].ha
         return ((self.rmt, le, re, self.sid, self.tid, self.bcst,))
 
+    @property
+    def deadline(self):
+        '''
+        Property that returns the earliest store stamp at which .process has
+        time based work to do, that is timeout or redo, None if never
+        '''
+        deadline = None
+        if self.timeout > 0.0:
+            deadline = self.timer.stop
+        if self.redoTimer is not None:
+            if deadline is None or self.redoTimer.stop < deadline:
+                deadline = self.redoTimer.stop
+        return deadline
+
     def process(self):
         '''
         Process time based handling of transaction like timeout or retries
@@ -115,6 +131,21 @@ class Transaction(object):
             index = self.index
         self.stack.removeTransaction(index, transaction=self)
 
+    def redo(self, key):
+        '''
+        Count resend on redo timeout as stat key
+        '''
+        self.stack.redoCounter.inc()
+        self.stack.statCounter(key).inc()
+
+    def event(self, what, *args):
+        '''
+        Trace step described by format string what with args to stack tracer
+        Formatting is left to the tracer so costs nothing when disabled
+        '''
+        if self.stack.tracer is not None:
+            self.stack.tracer.event(self, what, args)
+
     def statKey(self):
         '''
         Return the stat name key from class name
@@ -301,8 +332,7 @@ class Joiner(Initiator):
             else:
                 self.remove(self.index) # in case never sent txPacket
 
-            console.concise("Joiner {0}. Timed out at {1}\n".format(
-                    self.stack.name, self.stack.store.stamp))
+            self.event("Timed out")
 
             return
 
@@ -316,9 +346,8 @@ class Joiner(Initiator):
             if (self.txPacket and
                     self.txPacket.data['pk'] == raeting.pcktKinds.request):
                 self.transmit(self.txPacket) #redo
-                console.concise("Joiner {0}. Redo Join at {1}\n".format(
-                        self.stack.name, self.stack.store.stamp))
-                self.stack.incStat('redo_join')
+                self.event("Redo Join")
+                self.redo('redo_join')
 
     def prep(self):
         '''
@@ -358,8 +387,7 @@ class Joiner(Initiator):
             self.remove()
             return
         self.transmit(packet)
-        console.concise("Joiner {0}. Do Join at {1}\n".format(self.stack.name,
-                                                    self.stack.store.stamp))
+        self.event("Do Join")
     def renew(self):
         '''
         Reset to vacuous Road data and try joining again
@@ -512,8 +540,7 @@ class Joiner(Initiator):
 
         self.transmit(packet)
         self.remove(self.rxPacket.index)
-        console.concise("Joiner {0}. Do Accept at {1}\n".format(self.stack.name,
-                                                        self.stack.store.stamp))
+        self.event("Do Accept")
         self.stack.incStat("join_initiate_complete")
         if self.cascade:
             self.stack.allow(duid=self.remote.uid, cascade=self.cascade)
@@ -590,8 +617,7 @@ class Joinent(Correspondent):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.nack()
-            console.concise("Joinent {0}. Timed out at {0}\n".format(
-                    self.stack.name, self.stack.store.stamp))
+            self.event("Timed out")
             return
 
         # need to perform the check for accepted status and then send accept
@@ -606,8 +632,8 @@ class Joinent(Correspondent):
                     self.txPacket.data['pk'] == raeting.pcktKinds.response):
 
                 self.transmit(self.txPacket) #redo
-                console.concise("Joinent Redo Accept at {0}\n".format(self.stack.store.stamp))
-                self.stack.incStat('redo_accept')
+                self.event("Redo Accept")
+                self.redo('redo_accept')
             else: #check to see if status has changed to accept
                 if self.remote:
                     data = self.stack.safe.loadRemote(self.remote)
@@ -767,8 +793,7 @@ class Joinent(Correspondent):
                     self.nack() # reject as keys rejected
                     return
 
-                self.remote.host = host
-                self.remote.port = port
+                self.remote.ha = (host, port)
                 self.remote.rsid = self.sid # fix this?
                 if name != self.remote.name:
                     self.stack.renameRemote(old=self.remote.name, new=name)
@@ -903,8 +928,7 @@ class Joinent(Correspondent):
                 self.stack.local.uid = leid
                 self.stack.dumpLocal()
 
-            self.remote.host = host
-            self.remote.port = port
+            self.remote.ha = (host, port)
             self.remote.rsid = self.sid # fix this ?
             if name != self.remote.name:
                 self.stack.renameRemote(old=self.remote.name, new=name)
@@ -936,8 +960,7 @@ class Joinent(Correspondent):
             return
 
         self.transmit(packet)
-        console.concise("Joinent {0}. Pending Accept at {1}\n".format(self.stack.name,
-                                                        self.stack.store.stamp))
+        self.event("Pending Accept")
 
     def accept(self):
         '''
@@ -961,8 +984,7 @@ class Joinent(Correspondent):
             return
 
         self.transmit(packet)
-        console.concise("Joinent {0}. Do Accept at {1}\n".format(self.stack.name,
-                                                        self.stack.store.stamp))
+        self.event("Do Accept")
 
     def nack(self, kind=raeting.pcktKinds.nack):
         '''
@@ -1097,8 +1119,7 @@ class Allower(Initiator):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.remove()
-            console.concise("Allower {0}. Timed out at {1}\n".format(
-                    self.stack.name, self.stack.store.stamp))
+            self.event("Timed out")
             return
 
         # need keep sending join until accepted or timed out
@@ -1111,21 +1132,18 @@ class Allower(Initiator):
             if self.txPacket:
                 if self.txPacket.data['pk'] == raeting.pcktKinds.hello:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Allower {0}. Redo Hello at {1}\n".format(
-                            self.stack.name, self.stack.store.stamp))
-                    self.stack.incStat('redo_hello')
+                    self.event("Redo Hello")
+                    self.redo('redo_hello')
 
                 if self.txPacket.data['pk'] == raeting.pcktKinds.initiate:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Allower {0}. Redo Initiate at {1}\n".format(
-                            self.stack.name, self.stack.store.stamp))
-                    self.stack.incStat('redo_initiate')
+                    self.event("Redo Initiate")
+                    self.redo('redo_initiate')
 
                 if self.txPacket.data['pk'] == raeting.pcktKinds.ack:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Allower {0}. Redo Ack Final at {1}\n".format(
-                            self.stack.name, self.stack.store.stamp))
-                    self.stack.incStat('redo_final')
+                    self.event("Redo Ack Final")
+                    self.redo('redo_final')
 
     def prep(self):
         '''
@@ -1172,8 +1190,7 @@ class Allower(Initiator):
             self.remove()
             return
         self.transmit(packet)
-        console.concise("Allower {0}. Do Hello at {1}\n".format(self.stack.name,
-                                                        self.stack.store.stamp))
+        self.event("Do Hello")
 
     def cookie(self):
         '''
@@ -1258,8 +1275,7 @@ class Allower(Initiator):
             return
 
         self.transmit(packet)
-        console.concise("Allower {0}. Do Initiate at {1}\n".format(self.stack.name,
-                                                            self.stack.store.stamp))
+        self.event("Do Initiate")
 
     def allow(self):
         '''
@@ -1270,6 +1286,7 @@ class Allower(Initiator):
         if not self.stack.parseInner(self.rxPacket):
             return
 
+        self.remote.enbox()
         self.remote.allowed = True
         self.ackFinal()
 
@@ -1293,8 +1310,7 @@ class Allower(Initiator):
 
         self.transmit(packet)
         self.remove()
-        console.concise("Allower {0}. Ack Final at {1}\n".format(self.stack.name,
-                                                        self.stack.store.stamp))
+        self.event("Ack Final")
         self.stack.incStat("allow_initiate_complete")
         if self.cascade:
             self.stack.alive(duid=self.remote.uid, cascade=self.cascade)
@@ -1309,8 +1325,7 @@ class Allower(Initiator):
 
         self.remote.allowed = False
         self.remove()
-        console.concise("Allower {0}. Rejected at {1}\n".format(self.stack.name,
-                                                        self.stack.store.stamp))
+        self.event("Rejected")
         self.stack.incStat(self.statKey())
 
     def unjoin(self):
@@ -1322,8 +1337,7 @@ class Allower(Initiator):
             return
         self.remote.joined = False
         self.remove()
-        console.concise("Allower {0}. Rejected at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Rejected")
         self.stack.incStat(self.statKey())
         self.stack.join(duid=self.remote.uid, cascade=self.cascade)
 
@@ -1383,8 +1397,7 @@ class Allowent(Correspondent):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.nack()
-            console.concise("Allowent {0}. Timed out at {0}\n".format(
-                    self.stack.name, self.stack.store.stamp))
+            self.event("Timed out")
             return
 
         # need to perform the check for accepted status and then send accept
@@ -1398,15 +1411,13 @@ class Allowent(Correspondent):
             if self.txPacket:
                 if self.txPacket.data['pk'] == raeting.pcktKinds.cookie:
                     self.transmit(self.txPacket) #redo
-                    console.concise("Allowent {0}. Redo Cookie at {1}\n".format(
-                            self.stack.name, self.stack.store.stamp))
-                    self.stack.incStat('redo_cookie')
+                    self.event("Redo Cookie")
+                    self.redo('redo_cookie')
 
                 if self.txPacket.data['pk'] == raeting.pcktKinds.ack:
                     self.transmit(self.txPacket) #redo
-                    console.concise("Allowent {0}. Redo Ack at {1}\n".format(
-                            self.stack.name, self.stack.store.stamp))
-                    self.stack.incStat('redo_allow')
+                    self.event("Redo Ack")
+                    self.redo('redo_allow')
 
     def prep(self):
         '''
@@ -1494,8 +1505,7 @@ class Allowent(Correspondent):
             self.remove()
             return
         self.transmit(packet)
-        console.concise("Allowent {0}. Do Cookie at {1}\n".format(self.stack.name,
-                                                        self.stack.store.stamp))
+        self.event("Do Cookie")
 
     def initiate(self):
         '''
@@ -1589,8 +1599,7 @@ class Allowent(Correspondent):
             return
 
         self.transmit(packet)
-        console.concise("Allowent {0}. Do Ack at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Do Ack")
 
         self.allow()
 
@@ -1598,6 +1607,7 @@ class Allowent(Correspondent):
         '''
         Perform allowment
         '''
+        self.remote.enbox()
         self.remote.allowed = True
 
     def final(self):
@@ -1610,8 +1620,7 @@ class Allowent(Correspondent):
             return
 
         self.remove()
-        console.concise("Allowent {0}. Do Final at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Do Final")
         self.stack.incStat("allow_correspond_complete")
 
     def reject(self):
@@ -1625,8 +1634,7 @@ class Allowent(Correspondent):
         self.remote.allowed = False
 
         self.remove()
-        console.concise("Allowent {0}. Rejected at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Rejected")
         self.stack.incStat(self.statKey())
 
     def nack(self, kind=raeting.pcktKinds.nack):
@@ -1648,8 +1656,7 @@ class Allowent(Correspondent):
 
         self.transmit(packet)
         self.remove()
-        console.concise("Allowent {0}. Reject at {1}\n".format(self.stack.name,
-                                                    self.stack.store.stamp))
+        self.event("Reject")
         self.stack.incStat(self.statKey())
 
 class Aliver(Initiator):
@@ -1711,8 +1718,7 @@ class Aliver(Initiator):
         Perform time based processing of transaction
         '''
         if self.timeout > 0.0 and self.timer.expired:
-            console.concise("Aliver {0}. Timed out at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+            self.event("Timed out")
             self.remove()
             self.remote.refresh(alived=False) # mark as dead
             #self.reap() #remote is dead so reap it
@@ -1728,9 +1734,8 @@ class Aliver(Initiator):
             if self.txPacket:
                 if self.txPacket.data['pk'] == raeting.pcktKinds.request:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Aliver {0}. Redo at {1}\n".format(
-                        self.stack.name, self.stack.store.stamp))
-                    self.stack.incStat('redo_alive')
+                    self.event("Redo")
+                    self.redo('redo_alive')
 
     def prep(self):
         '''
@@ -1782,8 +1787,7 @@ class Aliver(Initiator):
             self.remove()
             return
         self.transmit(packet)
-        console.concise("Aliver {0}. Do Alive at {1}\n".format(self.stack.name,
-                                                    self.stack.store.stamp))
+        self.event("Do Alive")
     def complete(self):
         '''
         Process ack packet. Complete transaction and remove
@@ -1792,8 +1796,7 @@ class Aliver(Initiator):
             return
         self.remote.refresh(alived=True) # restart timer mark as alive
         self.remove()
-        console.concise("Aliver {0}. Done at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Done")
         self.stack.incStat("alive_complete")
 
     def reap(self):
@@ -1802,8 +1805,7 @@ class Aliver(Initiator):
         '''
         self.remove()
         self.remote.refresh(alived=False) # mark as dead
-        console.concise("Aliver {0}. Reaping dead remote '{1}' at {2}\n".format(
-                self.stack.name, self.remote.name, self.stack.store.stamp))
+        self.event("Reaping dead remote '{0}'", self.remote.name)
         self.stack.incStat("alive_reap")
         self.stack.removeRemote(self.remote.uid)
 
@@ -1816,8 +1818,7 @@ class Aliver(Initiator):
             return
         self.remote.refresh(alived=None) # restart timer mark as indeterminate
         self.remove()
-        console.concise("Aliver {0}. Rejected at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Rejected")
         self.stack.incStat(self.statKey())
 
     def unjoin(self):
@@ -1830,8 +1831,7 @@ class Aliver(Initiator):
         self.remote.refresh(alived=None) # restart timer mark as indeterminate
         self.remote.joined = False
         self.remove()
-        console.concise("Aliver {0}. Rejected at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Rejected")
         self.stack.incStat(self.statKey())
         self.stack.join(duid=self.remote.uid, cascade=self.cascade)
 
@@ -1845,8 +1845,7 @@ class Aliver(Initiator):
         self.remote.refresh(alived=None) # restart timer mark as indeterminate
         self.remote.allowed = False
         self.remove()
-        console.concise("Aliver {0}. Rejected at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Rejected")
         self.stack.incStat(self.statKey())
         self.stack.allow(duid=self.remote.uid, cascade=self.cascade)
 
@@ -1885,8 +1884,7 @@ class Alivent(Correspondent):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.nack()
-            console.concise("Alivent {0}. Timed out at {1}\n".format(
-                    self.stack.name, self.stack.store.stamp))
+            self.event("Timed out")
             return
 
     def prep(self):
@@ -1945,12 +1943,10 @@ class Alivent(Correspondent):
             return
 
         self.transmit(packet)
-        console.concise("Alivent {0}. Do ack alive at {1}\n".format(self.stack.name,
-                                                        self.stack.store.stamp))
+        self.event("Do ack alive")
         self.remote.refresh(alived=True)
         self.remove()
-        console.concise("Alivent {0}. Done at {1}\n".format(
-                        self.stack.name, self.stack.store.stamp))
+        self.event("Done")
         self.stack.incStat("alive_complete")
 
     def nack(self, kind=raeting.pcktKinds.nack):
@@ -1972,8 +1968,7 @@ class Alivent(Correspondent):
 
         self.transmit(packet)
         self.remove()
-        console.concise("Alivent {0}. Reject at {1}\n".format(self.stack.name,
-                                                    self.stack.store.stamp))
+        self.event("Reject")
         self.stack.incStat(self.statKey())
 
 class Messenger(Initiator):
@@ -1984,12 +1979,22 @@ class Messenger(Initiator):
     Timeout = 10.0
     RedoTimeoutMin = 1.0 # initial timeout
     RedoTimeoutMax = 3.0 # max timeout
+    DupThreshold = 3 # number of later segments acked before segment deemed lost
 
-    def __init__(self, redoTimeoutMin=None, redoTimeoutMax=None, **kwa):
+    def __init__(self, redoTimeoutMin=None, redoTimeoutMax=None, window=None,
+                 **kwa):
         '''
         Setup instance
+
+        window is max number of segments in flight. When nonzero the segments
+        are sent with a sliding window that the correspondent acks with
+        cumulative and selective acks. The congestion window grows additively
+        per acked segment and shrinks multiplicatively on loss
         '''
         kwa['kind'] = raeting.trnsKinds.message
+        self.window = window or 0
+        if self.window:
+            kwa['wait'] = True # correspondent acks every segment
         super(Messenger, self).__init__(**kwa)
 
         self.redoTimeoutMax = redoTimeoutMax or self.RedoTimeoutMax
@@ -1997,6 +2002,14 @@ class Messenger(Initiator):
         self.redoTimer = aiding.StoreTimer(self.stack.store,
                                            duration=self.redoTimeoutMin)
 
+        self.cwnd = 1.0 # congestion window in segments
+        self.ssthresh = float(self.window) # slow start threshold
+        self.base = 0 # cumulative ack, all segments before base acked
+        self.sent = 0 # one past highest segment number ever sent
+        self.sacked = set() # selectively acked segment numbers after base
+        self.resent = set() # segment numbers retransmitted in loss recovery
+        self.recover = 0 # segment number that ends current loss recovery
+
         self.sid = self.remote.sid
         self.tid = self.remote.nextTid()
         self.prep() # prepare .txData
@@ -2030,8 +2043,7 @@ class Messenger(Initiator):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.remove()
-            console.concise("Messenger {0}. Timed out at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+            self.event("Timed out")
             return
 
         # need keep sending message until completed or timed out
@@ -2041,12 +2053,21 @@ class Messenger(Initiator):
                               self.redoTimer.duration * 2.0),
                          self.redoTimeoutMax)
             self.redoTimer.restart(duration=duration)
-            if self.txPacket:
+            if self.window:
+                if self.base < self.sent: # no acks so deem all unacked lost
+                    self.ssthresh = max(1.0, self.cwnd / 2.0)
+                    self.cwnd = 1.0
+                    self.recover = self.sent
+                    self.resent = set()
+                    self.tray.current = self.base # go back over unacked
+                    self.event("Redo Window at Segment {0}", self.base)
+                    self.redo('redo_segment')
+                    self.slide()
+            elif self.txPacket:
                 if self.txPacket.data['pk'] == raeting.pcktKinds.message:
                     self.transmit(self.txPacket) # redo
-                    console.concise("Messenger {0}. Redo Segment {1} at {2}\n".format(
-                        self.stack.name, self.tray.last, self.stack.store.stamp))
-                    self.stack.incStat('redo_segment')
+                    self.event("Redo Segment {0}", self.tray.last)
+                    self.redo('redo_segment')
 
     def prep(self):
         '''
@@ -2088,15 +2109,38 @@ class Messenger(Initiator):
         if self.tray.current >= len(self.tray.packets):
             return
 
+        if self.window:
+            self.slide()
+            return
+
         burst = 1 if self.wait else len(self.tray.packets) - self.tray.current
 
         for packet in self.tray.packets[self.tray.current:self.tray.current + burst]:
             self.transmit(packet) #if self.tray.current %  2 else None
             self.tray.last = self.tray.current
             self.stack.incStat("message_segment_tx")
-            console.concise("Messenger {0}. Do Message Segment {1} at {2}\n".format(
-                    self.stack.name, self.tray.last, self.stack.store.stamp))
+            self.event("Do Message Segment {0}", self.tray.last)
+            self.tray.current += 1
+
+    def slide(self):
+        '''
+        Send unacked segments from .tray.current while the number of segments
+        in flight is less than the congestion window
+        '''
+        packets = self.tray.packets
+        inflight = (max(0, self.tray.current - self.base) -
+                    len([sn for sn in self.sacked if sn < self.tray.current]))
+        while inflight < int(self.cwnd) and self.tray.current < len(packets):
+            sn = self.tray.current
             self.tray.current += 1
+            if sn in self.sacked or sn in self.resent:
+                continue
+            self.transmit(packets[sn])
+            self.tray.last = sn
+            self.sent = max(self.sent, sn + 1)
+            inflight += 1
+            self.stack.incStat("message_segment_tx")
+            self.event("Do Message Segment {0}", sn)
 
     def another(self):
         '''
@@ -2107,11 +2151,84 @@ class Messenger(Initiator):
 
         self.remote.refresh(alived=True)
 
+        if self.window:
+            self.acknowledge()
+            return
+
         if self.tray.current >= len(self.tray.packets):
             self.complete()
         else:
             self.message()
 
+    def acknowledge(self):
+        '''
+        Process cumulative and selective ack of segments in sliding window
+        Grow window per newly acked segment, retransmit segments deemed lost
+        and shrink window once per loss event, then slide window
+        '''
+        body = self.rxPacket.body.data
+        count = len(self.tray.packets)
+        acked = self.base + len(self.sacked)
+
+        rca = body.get('ca') if isinstance(body, dict) else None
+        if rca is None: # correspondent without selective acks so acks one
+            ca = self.base + 1
+            sack = 0
+        else:
+            ca = rca
+            try: # only the low bits nearest ca when over size
+                sack = int(body.get('sack', '0')[-(raeting.MAX_SACK_BITS // 4):], 16)
+            except (TypeError, ValueError):
+                sack = 0
+
+        ca = min(ca, self.sent)
+        if ca > self.base:
+            self.sacked = set(sn for sn in self.sacked if sn >= ca)
+            self.resent = set(sn for sn in self.resent if sn >= ca)
+            self.base = ca
+            self.tray.current = max(self.tray.current, self.base)
+
+        if rca is not None:
+            sn = rca + 1
+            while sack and sn < self.sent:
+                if sack & 1 and sn >= self.base:
+                    self.sacked.add(sn)
+                sack >>= 1
+                sn += 1
+
+        if self.base >= count:
+            self.complete()
+            return
+
+        for i in range(len(self.sacked) + self.base - acked): # additive increase
+            if self.cwnd < self.ssthresh:
+                self.cwnd += 1.0 # slow start
+            else:
+                self.cwnd += 1.0 / self.cwnd
+            self.cwnd = min(self.cwnd, float(self.window))
+
+        losts = []
+        later = 0 # number of acked segments after sn
+        for sn in range(max(self.sacked) if self.sacked else self.base,
+                        self.base - 1, -1):
+            if sn in self.sacked:
+                later += 1
+            elif later >= self.DupThreshold and sn not in self.resent:
+                losts.append(sn)
+
+        if losts:
+            if losts[0] >= self.recover: # new loss event so decrease once
+                self.ssthresh = self.cwnd = max(1.0, self.cwnd / 2.0)
+                self.recover = self.sent
+                self.stack.incStat('message_window_loss')
+            for sn in reversed(losts):
+                self.transmit(self.tray.packets[sn])
+                self.resent.add(sn)
+                self.stack.incStat("message_segment_tx")
+                self.event("Resend Lost Segment {0}", sn)
+
+        self.slide()
+
     def resend(self):
         '''
         Process resend packet and send misseds list of missing packets
@@ -2143,16 +2260,14 @@ class Messenger(Initiator):
 
                 self.transmit(packet)
                 self.stack.incStat("message_segment_tx")
-                console.concise("Messenger {0}. Resend Message Segment {1} at {2}\n".format(
-                        self.stack.name, m, self.stack.store.stamp))
+                self.event("Resend Message Segment {0}", m)
 
     def complete(self):
         '''
         Complete transaction and remove
         '''
         self.remove()
-        console.concise("Messenger {0}. Done at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Done")
         self.stack.incStat("message_initiate_complete")
 
     def reject(self):
@@ -2166,8 +2281,7 @@ class Messenger(Initiator):
         self.remote.refresh(alived=True)
 
         self.remove()
-        console.concise("Messenger {0}. Rejected at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Rejected")
         self.stack.incStat(self.statKey())
 
 class Messengent(Correspondent):
@@ -2222,8 +2336,7 @@ class Messengent(Correspondent):
         '''
         if self.timeout > 0.0 and self.timer.expired:
             self.nack()
-            console.concise("Messengent {0}. Timed out at {1}\n".format(
-                    self.stack.name, self.stack.store.stamp))
+            self.event("Timed out")
             return
 
         if self.redoTimer.expired:
@@ -2271,7 +2384,7 @@ class Messengent(Correspondent):
             body = self.tray.parse(self.rxPacket)
         except raeting.PacketError as ex:
             console.terse(str(ex) + '\n')
-            self.incStat('parsing_message_error')
+            self.stack.incStat('parsing_message_error')
             self.remove()
             return
 
@@ -2279,8 +2392,7 @@ class Messengent(Correspondent):
 
         if self.tray.complete:
             self.ackMessage()
-            console.verbose("{0} received message body\n{1}\n".format(
-                    self.stack.name, body))
+            console.verbose("{0} received message body\n{1}\n", self.stack.name, body)
             self.stack.rxMsgs.append(body)
             self.complete()
 
@@ -2295,8 +2407,14 @@ class Messengent(Correspondent):
     def ackMessage(self):
         '''
         Send ack to message
+        Ack of segmented message has cumulative ack ca and hex selective ack
+        bitmap sack of segments arrived after ca capped at
+        raeting.MAX_SACK_BITS so the ack fits in one packet
         '''
         body = odict()
+        if self.tray.bitmap is not None:
+            ca, sack = self.tray.acks()
+            body.update(ca=ca, sack="{0:x}".format(sack))
         packet = packeting.TxPacket(stack=self.stack,
                                     kind=raeting.pcktKinds.ack,
                                     embody=body,
@@ -2310,8 +2428,7 @@ class Messengent(Correspondent):
             return
         self.transmit(packet)
         self.stack.incStat("message_segment_ack")
-        console.concise("Messengent {0}. Do Ack Segment {1} at {2}\n".format(
-                self.stack.name, self.tray.last, self.stack.store.stamp))
+        self.event("Do Ack Segment {0}", self.tray.last)
 
     def resend(self, misseds):
         '''
@@ -2338,8 +2455,7 @@ class Messengent(Correspondent):
                 return
             self.transmit(packet)
             self.stack.incStat("message_resend")
-            console.concise("Messengent {0}. Do Resend Segments {1} at {2}\n".format(
-                    self.stack.name, misseds, self.stack.store.stamp))
+            self.event("Do Resend Segments {0}", misseds)
             misseds = remainders
 
     def complete(self):
@@ -2347,8 +2463,7 @@ class Messengent(Correspondent):
         Complete transaction and remove
         '''
         self.remove()
-        console.concise("Messengent {0}. Complete at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Complete")
         self.stack.incStat("messagent_correspond_complete")
 
     def rejected(self):
@@ -2362,8 +2477,7 @@ class Messengent(Correspondent):
         self.remote.refresh(alived=True)
 
         self.remove()
-        console.concise("Messengent {0}. Rejected at {1}\n".format(
-                self.stack.name, self.stack.store.stamp))
+        self.event("Rejected")
         self.stack.incStat(self.statKey())
 
     def nack(self):
@@ -2385,7 +2499,6 @@ class Messengent(Correspondent):
 
         self.transmit(packet)
         self.remove()
-        console.concise("Messagent {0}. Reject at {1}\n".format(self.stack.name,
-                                                    self.stack.store.stamp))
+        self.event("Reject")
         self.stack.incStat(self.statKey())
 
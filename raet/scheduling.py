@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+'''
+scheduling.py raet protocol deadline scheduling
+
+Heap based scheduler of keyed deadlines so that time based processing only
+touches the keys whose deadline has passed instead of polling every timer.
+'''
+# pylint: skip-file
+# pylint: disable=W0611
+
+# Import python libs
+import heapq
+
+from .consoling import getConsole
+console = getConsole()
+
+class Scheduler(object):
+    '''
+    Schedules hashable keys at deadlines in the same time base as the
+    stack store stamp.
+    Each key has at most one live deadline. Rescheduling or canceling a key
+    leaves its old heap entry in place to be discarded lazily when popped.
+    '''
+    Slack = 64 # number of stale heap entries tolerated before compacting
+
+    def __init__(self):
+        '''
+        Setup Scheduler instance
+        '''
+        self.heap = [] # heap of triples (deadline, seq, key)
+        self.entries = dict() # live (deadline, seq) keyed by key
+        self.seq = 0 # tie breaker so keys themselves are never compared
+
+    def __len__(self):
+        '''
+        Returns number of scheduled keys
+        '''
+        return len(self.entries)
+
+    def __contains__(self, key):
+        '''
+        Returns True if key is scheduled
+        '''
+        return key in self.entries
+
+    @property
+    def deadline(self):
+        '''
+        Property that returns the earliest live deadline or None if empty
+        '''
+        heap = self.heap
+        entries = self.entries
+        while heap:
+            deadline, seq, key = heap[0]
+            if entries.get(key) == (deadline, seq):
+                return deadline
+            heapq.heappop(heap) # stale
+        return None
+
+    def schedule(self, key, deadline):
+        '''
+        Schedule key at deadline replacing any prior deadline for key
+        A deadline of None cancels key
+        '''
+        if deadline is None:
+            self.cancel(key)
+            return
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == deadline:
+            return
+        self.seq += 1
+        self.entries[key] = (deadline, self.seq)
+        heapq.heappush(self.heap, (deadline, self.seq, key))
+        if len(self.heap) > 2 * len(self.entries) + self.Slack:
+            self.compact()
+
+    def cancel(self, key):
+        '''
+        Unschedule key if scheduled
+        '''
+        self.entries.pop(key, None)
+
+    def clear(self):
+        '''
+        Unschedule all keys
+        '''
+        del self.heap[:]
+        self.entries.clear()
+
+    def compact(self):
+        '''
+        Rebuild heap from live entries only
+        '''
+        self.heap = [(deadline, seq, key)
+                        for key, (deadline, seq) in self.entries.items()]
+        heapq.heapify(self.heap)
+
+    def expired(self, now):
+        '''
+        Unschedule and return list of keys whose deadline <= now in
+        deadline order
+        '''
+        heap = self.heap
+        entries = self.entries
+        keys = []
+        while heap and heap[0][0] <= now:
+            deadline, seq, key = heapq.heappop(heap)
+            if entries.get(key) == (deadline, seq):
+                del entries[key]
+                keys.append(key)
+        return keys
@@ -9,6 +9,8 @@ stacking.py raet protocol stacking classes
 import socket
 import os
 import errno
+import select
+import time
 
 from collections import deque,  Mapping
 try:
@@ -19,7 +21,7 @@ except ImportError:
 try:
     import msgpack
 except ImportError:
-    mspack = None
+    msgpack = None
 
 # Import ioflo libs
 from ioflo.base.odicting import odict
@@ -29,8 +31,10 @@ from ioflo.base import storing
 from . import raeting
 from . import keeping
 from . import lotting
+from . import batching
+from . import metering
 
-from ioflo.base.consoling import getConsole
+from .consoling import getConsole
 console = getConsole()
 
 class Stack(object):
@@ -39,6 +43,8 @@ class Stack(object):
     Should be subclassed for specific transport type such as UDP or UXD
     '''
     Count = 0
+    RxBatch = 0 # default max datagrams per batched receive, 0 means unbatched
+    TxBatch = 0 # default max datagrams per batched transmit, 0 means unbatched
 
     def __init__(self,
                  name='',
@@ -57,9 +63,16 @@ class Stack(object):
                  txes=None,
                  stats=None,
                  clean=False,
+                 rxbatch=None,
+                 txbatch=None,
                  ):
         '''
         Setup Stack instance
+
+        rxbatch is max datagrams received per batched server receive system call
+            None means use class default .RxBatch. 0 means unbatched
+        txbatch is max datagrams sent per batched server transmit system call
+            None means use class default .TxBatch. 0 means unbatched
         '''
         if not name:
             name = "stack{0}".format(Stack.Count)
@@ -97,14 +110,35 @@ class Stack(object):
             if self.local:
                 self.local.ha = self.server.ha  # update local host address after open
 
-            console.verbose("Stack '{0}': Opened server at '{1}'\n".format(self.name, self.local.ha))
+            console.verbose("Stack '{0}': Opened server at '{1}'\n", self.name, self.local.ha)
+
+        self.rxbatch = rxbatch if rxbatch is not None else self.RxBatch
+        self.receiver = None # batched receiver of server datagrams
+        if self.server and self.rxbatch:
+            self.receiver = batching.Receiver(self.server, count=self.rxbatch)
+        self.txbatch = txbatch if txbatch is not None else self.TxBatch
+        self.transmitter = None # batched transmitter of server datagrams
+        if self.server and self.txbatch:
+            self.transmitter = batching.Transmitter(self.server, count=self.txbatch)
 
         self.rxMsgs = rxMsgs if rxMsgs is not None else deque() # messages received
         self.txMsgs = txMsgs if txMsgs is not None else deque() # messages to transmit
         self.rxes = rxes if rxes is not None else deque() # udp packets received
         self.txes = txes if txes is not None else deque() # udp packet to transmit
-        self.stats = stats if stats is not None else odict() # udp statistics
+        self._stats = stats if stats is not None else odict() # udp statistics
+        self.statCounters = dict() # counters backing hot path stats by stat key
         self.statTimer = aiding.StoreTimer(self.store)
+        self.meter = metering.Meter(labels=odict([('stack', self.name)]))
+        self.rxCounter = self.meter.counter('rx_datagrams', "Datagrams received by server.")
+        self.txCounter = self.meter.counter('tx_datagrams', "Datagrams sent by server.")
+        self.meter.gauge('rxes', "Received datagrams to process.",
+                         fetch=lambda: len(self.rxes))
+        self.meter.gauge('txes', "Datagrams to send.",
+                         fetch=lambda: len(self.txes))
+        self.meter.gauge('rx_msgs', "Received messages to consume.",
+                         fetch=lambda: len(self.rxMsgs))
+        self.meter.gauge('tx_msgs', "Messages to transmit.",
+                         fetch=lambda: len(self.txMsgs))
 
         self.dumpLocal() # save local data
         self.dumpRemotes() # save remote data
@@ -225,6 +259,13 @@ class Stack(object):
         else:
             self.local = lotting.LocalLot(stack=self, name=name)
 
+    def close(self):
+        '''
+        Close server
+        '''
+        if self.server:
+            self.server.close()
+
     def clearLocal(self):
         '''
         Clear local keep
@@ -279,36 +320,84 @@ class Stack(object):
         '''
         self.keep.clearAllRemoteData()
 
+    @property
+    def stats(self):
+        '''
+        Property is odict of stat counters keyed by stat key
+        The values of keys in .statCounters are taken from their counters
+        '''
+        stats = self._stats
+        for key, counter in self.statCounters.items():
+            if counter.value or key in stats:
+                stats[key] = counter.value
+        return stats
+
+    @stats.setter
+    def stats(self, value):
+        ''' setter for stats property '''
+        self._stats = value
+
+    def statCounter(self, key):
+        '''
+        Returns counter handle that backs stat key registered on .meter as key
+        Hot paths increment the handle instead of calling incStat
+        '''
+        counter = self.statCounters.get(key)
+        if counter is None:
+            counter = self.meter.counter(key)
+            counter.value = self._stats.get(key, 0)
+            self.statCounters[key] = counter
+        return counter
+
     def incStat(self, key, delta=1):
         '''
         Increment stat key counter by delta
         '''
-        if key in self.stats:
-            self.stats[key] += delta
+        if key in self.statCounters:
+            self.statCounters[key].inc(delta)
+        elif key in self._stats:
+            self._stats[key] += delta
         else:
-            self.stats[key] = delta
+            self._stats[key] = delta
 
     def updateStat(self, key, value):
         '''
         Set stat key to value
         '''
-        self.stats[key] = value
+        if key in self.statCounters:
+            self.statCounters[key].value = value
+        self._stats[key] = value
 
     def clearStat(self, key):
         '''
         Set the specified state counter to zero
         '''
-        if key in self.stats:
-            self.stats[key] = 0
+        if key in self.statCounters:
+            self.statCounters[key].reset()
+        if key in self._stats:
+            self._stats[key] = 0
 
     def clearStats(self):
         '''
         Set all the stat counters to zero and reset the timer
         '''
-        for key, value in self.stats.items():
-            self.stats[key] = 0
+        for counter in self.statCounters.values():
+            counter.reset()
+        for key in self._stats:
+            self._stats[key] = 0
         self.statTimer.restart()
 
+    def snapshotMetrics(self, reset=False):
+        '''
+        Returns odict snapshot of .meter metrics and the .stats counters
+        If reset then reset metrics and stats after the snapshot
+        '''
+        snap = self.meter.snapshot(reset=reset)
+        snap['stats'] = odict(self.stats)
+        if reset:
+            self.clearStats()
+        return snap
+
     def _handleOneReceived(self):
         '''
         Handle one received message from server
@@ -319,15 +408,36 @@ class Stack(object):
             return False
         # triple = ( packet, source address, destination address)
         self.rxes.append((rx, ra, self.server.ha))
+        self.rxCounter.inc()
         return True
 
+    def _handleBatchReceived(self):
+        '''
+        Handle up to .receiver.count received messages from server with one
+        batched receive and put them on the rxes deque in bulk
+        assumes that there is a server and a receiver
+        Returns True if batch was full so more may be waiting
+        '''
+        received = self.receiver.receive()
+        if not received:
+            return False
+        ha = self.server.ha
+        # triple = ( packet, source address, destination address)
+        self.rxes.extend([(rx, ra, ha) for rx, ra in received])
+        self.rxCounter.inc(len(received))
+        return (len(received) >= self.receiver.count)
+
     def serviceReceives(self):
         '''
         Retrieve from server all recieved and put on the rxes deque
         '''
         if self.server:
-            while self._handleOneReceived():
-                pass
+            if self.receiver:
+                while self._handleBatchReceived():
+                    pass
+            else:
+                while self._handleOneReceived():
+                    pass
 
     def serviceReceiveOnce(self):
         '''
@@ -342,7 +452,7 @@ class Stack(object):
         Assumes that there is a message on the .rxes deque
         '''
         raw, sa, da = self.rxes.popleft()
-        console.verbose("{0} received raw message\n{1}\n".format(self.name, raw))
+        console.verbose("{0} received raw message\n{1}\n", self.name, raw)
         processRx(received=raw)
 
     def serviceRxes(self):
@@ -392,7 +502,7 @@ class Stack(object):
         '''
         body, duid = self.txMsgs.popleft() # duple (body dict, destination uid
         self.message(body, duid)
-        console.verbose("{0} sending\n{1}\n".format(self.name, body))
+        console.verbose("{0} sending\n{1}\n", self.name, body)
 
     def serviceTxMsgs(self):
         '''
@@ -431,7 +541,7 @@ class Stack(object):
         Handle one message on .txes deque
         Assumes there is a message
         laters is deque of messages to try again later
-        blocks is list of destinations that already blocked on this service
+        blocks is set of destinations that already blocked on this service
         '''
         tx, ta = self.txes.popleft()  # duple = (packet, destination address)
 
@@ -445,9 +555,42 @@ class Stack(object):
             if ex.errno == errno.EAGAIN or ex.errno == errno.EWOULDBLOCK:
                 #busy with last message save it for later
                 laters.append((tx, ta))
-                blocks.append(ta)
+                blocks.add(ta)
             else:
                 raise
+        else:
+            self.txCounter.inc()
+
+    def _handleBatchTx(self, laters, blocks):
+        '''
+        Handle up to .transmitter.count messages on .txes deque with one
+        batched send. Assumes there is a message and a transmitter
+        laters is deque of messages to try again later
+        blocks is set of destinations that already blocked on this service
+
+        Messages to blocked destinations go to laters so per destination order
+        is preserved. The first message not sent by the batch is handled
+        individually by ._handleOneTx so its errors are handled as usual
+        Only used with a batched transmitter since the per datagram fallback
+        of the transmitter has already tried the message it stops at
+        '''
+        batch = []
+        count = self.transmitter.count
+        while self.txes and len(batch) < count:
+            tx, ta = self.txes.popleft()  # duple = (packet, destination address)
+            if ta in blocks: # already blocked on this iteration
+                laters.append((tx, ta)) # keep sequential
+            else:
+                batch.append((tx, ta))
+
+        if not batch:
+            return
+
+        sent = self.transmitter.send(batch)
+        self.txCounter.inc(sent)
+        if sent < len(batch): # put back unsent in order
+            self.txes.extendleft(reversed(batch[sent:]))
+            self._handleOneTx(laters, blocks)
 
     def serviceTxes(self):
         '''
@@ -455,9 +598,13 @@ class Stack(object):
         '''
         if self.server:
             laters = deque()
-            blocks = []
-            while self.txes:
-                self._handleOneTx(laters, blocks)
+            blocks = set()
+            if self.transmitter and self.transmitter.batched:
+                while self.txes:
+                    self._handleBatchTx(laters, blocks)
+            else:
+                while self.txes:
+                    self._handleOneTx(laters, blocks)
             while laters:
                 self.txes.append(laters.popleft())
 
@@ -467,7 +614,7 @@ class Stack(object):
         '''
         if self.server:
             laters = deque()
-            blocks = [] # will always be empty since only once
+            blocks = set() # will always be empty since only once
             if self.txes:
                 self._handleOneTx(laters, blocks)
             while laters:
@@ -540,5 +687,71 @@ class Stack(object):
         '''
         pass
 
+    def nextDeadline(self):
+        '''
+        Returns earliest deadline in store stamp time base at which timer based
+        processing is due or None if nothing is scheduled
+        '''
+        return None
+
+    def waitables(self):
+        '''
+        Returns list of sockets whose readability should end a .wait
+        '''
+        return [self.server.ss] if self.server and self.server.ss else []
 
+    def wait(self, timeout=None):
+        '''
+        Block until the server has received data, the .txes deque can be
+        sent, the next deadline is due, or timeout seconds have passed.
+        timeout of None means no limit other than the next deadline.
+        Assumes the store stamp advances in real time while blocked.
+        Returns True if there is something to service
+        '''
+        if self.rxes or self.txMsgs:
+            return True
+
+        delay = timeout
+        deadline = self.nextDeadline()
+        if deadline is not None and self.store.stamp is not None:
+            due = max(0.0, deadline - self.store.stamp)
+            delay = due if delay is None else min(delay, due)
 
+        readers = self.waitables()
+        writers = readers[:1] if self.txes else []
+        if not readers:
+            if delay:
+                time.sleep(delay)
+            return False
+        try:
+            readable, writable, errored = select.select(readers, writers, [], delay)
+        except (select.error, socket.error) as ex:
+            if ex.args[0] == errno.EINTR:
+                return False
+            raise
+        return bool(readable or writable)
+
+    def serviceUntil(self, timeout, stamp=True):
+        '''
+        Service stack for timeout seconds blocking in .wait between services
+        instead of polling.
+        If stamp then advance the store stamp by the elapsed real time which
+        should only be done when nothing else drives the store
+        Also manages remotes when the stack has a .manage
+        '''
+        manage = getattr(self, 'manage', None)
+        last = time.time()
+        end = last + timeout
+        while True:
+            self.serviceAllRx()
+            if manage:
+                manage()
+            self.serviceAllTx()
+            remaining = end - time.time()
+            if remaining <= 0.0:
+                break
+            self.wait(remaining)
+            now = time.time()
+            if stamp and self.store.stamp is not None:
+                self.store.advanceStamp(now - last)
+            last = now
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for asyncio stack driver
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import errno
+import socket
+import tempfile
+import shutil
+
+from ioflo.base.odicting import odict
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting, asyncing
+from raet.lane import stacking, yarding
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class FakeFuture(object):
+    '''
+    Minimal future resolved by hand
+    '''
+    def __init__(self):
+        self._result = None
+        self._done = False
+        self._cancelled = False
+        self.callbacks = []
+
+    def done(self):
+        return self._done
+
+    def cancelled(self):
+        return self._cancelled
+
+    def result(self):
+        return self._result
+
+    def exception(self):
+        return None
+
+    def set_result(self, result):
+        self._result = result
+        self._done = True
+        for callback in self.callbacks:
+            callback(self)
+
+    def cancel(self):
+        if not self._done:
+            self._cancelled = True
+            self._done = True
+
+    def add_done_callback(self, callback):
+        if self._done:
+            callback(self)
+        else:
+            self.callbacks.append(callback)
+
+class FakeHandle(object):
+    '''
+    Timer handle of FakeLoop
+    '''
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class FakeTransport(object):
+    '''
+    Datagram transport that records sends
+    '''
+    def __init__(self, protocol):
+        self.protocol = protocol
+        self.sent = []
+        self.closed = False
+
+    def sendto(self, data, addr):
+        self.sent.append((data, addr))
+
+    def close(self):
+        self.closed = True
+        self.protocol.connection_lost(None)
+
+class FakeLoop(object):
+    '''
+    Event loop with a manual clock that runs timers only when told
+    '''
+    def __init__(self):
+        self.now = 0.0
+        self.handles = []
+        self.transports = []
+        self.writers = {}
+
+    def time(self):
+        return self.now
+
+    def call_later(self, delay, callback):
+        handle = FakeHandle(self.now + delay, callback)
+        self.handles.append(handle)
+        return handle
+
+    def add_writer(self, fd, callback):
+        self.writers[fd] = callback
+
+    def remove_writer(self, fd):
+        return self.writers.pop(fd, None) is not None
+
+    def create_future(self):
+        return FakeFuture()
+
+    def create_task(self, future):
+        return future
+
+    def create_datagram_endpoint(self, factory, sock=None):
+        protocol = factory()
+        transport = FakeTransport(protocol)
+        self.transports.append(transport)
+        protocol.connection_made(transport)
+        future = FakeFuture()
+        future.set_result((transport, protocol))
+        return future
+
+    def runDue(self, advance=0.0):
+        '''
+        Advance clock then run the timers that are due
+        Returns number run
+        '''
+        self.now += advance
+        due = [handle for handle in self.handles
+               if not handle.cancelled and handle.when <= self.now]
+        self.handles = [handle for handle in self.handles
+                        if not handle.cancelled and handle.when > self.now]
+        for handle in due:
+            handle.callback()
+        return len(due)
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Lane stacks driven by asyncio event loop
+    '''
+
+    def setUp(self):
+        self.baseDirpath = tempfile.mkdtemp(prefix="raet",  suffix="base", dir='/tmp')
+        self.main = stacking.LaneStack(name='main',
+                                       yid=1,
+                                       localname='main',
+                                       lanename='cherry',
+                                       basedirpath=self.baseDirpath,
+                                       sockdirpath=self.baseDirpath)
+        self.other = stacking.LaneStack(name='other',
+                                        yid=1,
+                                        localname='other',
+                                        lanename='cherry',
+                                        basedirpath=self.baseDirpath,
+                                        sockdirpath=self.baseDirpath)
+        self.main.addRemote(yarding.RemoteYard(stack=self.main, ha=self.other.local.ha))
+        self.other.addRemote(yarding.RemoteYard(stack=self.other, ha=self.main.local.ha))
+
+    def tearDown(self):
+        self.main.server.close()
+        self.other.server.close()
+
+        if os.path.exists(self.baseDirpath):
+            shutil.rmtree(self.baseDirpath)
+
+    def testMessage(self):
+        '''
+        Test awaitable transmit and receive between drivers on one loop
+        '''
+        console.terse("{0}\n".format(self.testMessage.__doc__))
+        if asyncing.asyncio is None:
+            self.assertRaises(raeting.StackError, asyncing.Driver, self.main)
+            return
+
+        loop = asyncing.asyncio.new_event_loop()
+        mainDriver = asyncing.Driver(self.main, loop=loop)
+        otherDriver = asyncing.Driver(self.other, loop=loop)
+        loop.run_until_complete(mainDriver.start())
+        loop.run_until_complete(otherDriver.start())
+        msg = odict(what="This is a message to the lord. Let me be", extra="Hello")
+        sent = otherDriver.transmit(msg)
+        received = mainDriver.receive()
+        loop.run_until_complete(asyncing.asyncio.wait_for(received, 2.0))
+        self.assertTrue(sent.done())
+        body = received.result()
+        self.assertEqual(body, msg)
+
+        # receive with message already waiting resolves immediately
+        mainDriver.transmit(msg)
+        loop.run_until_complete(asyncing.asyncio.sleep(0.1))
+        received = otherDriver.receive()
+        loop.run_until_complete(asyncing.asyncio.wait_for(received, 2.0))
+        self.assertEqual(received.result(), msg)
+
+        pending = mainDriver.receive()
+        mainDriver.close()
+        otherDriver.close()
+        self.assertTrue(pending.cancelled())
+        loop.close()
+
+    def testFakeLoop(self):
+        '''
+        Test driver read, write and timer paths on a fake loop and transport
+        '''
+        console.terse("{0}\n".format(self.testFakeLoop.__doc__))
+        loop = FakeLoop()
+        mainDriver = asyncing.Driver(self.main, loop=loop)
+        otherDriver = asyncing.Driver(self.other, loop=loop)
+        self.assertTrue(mainDriver.start().done())
+        self.assertTrue(otherDriver.start().done())
+        mainTransport, otherTransport = loop.transports
+        self.assertIs(mainDriver.transport, mainTransport)
+        self.assertEqual(loop.runDue(), 2) # wake services once started
+
+        msg = odict(what="This is a message to the lord. Let me be", extra="Hello")
+        sent = otherDriver.transmit(msg)
+        received = mainDriver.receive()
+        self.assertFalse(sent.done())
+        self.assertFalse(received.done())
+        self.assertEqual(loop.runDue(), 1) # write path
+        self.assertTrue(sent.done())
+        self.assertEqual(len(otherTransport.sent), 0) # sent by stack not transport
+        self.assertEqual(self.other.txCounter.value, 1)
+        self.assertEqual(len(self.other.txes), 0)
+        data, addr = self.main.server.receive()
+        self.assertEqual(addr, self.other.local.ha)
+
+        mainDriver.protocol.datagram_received(data, addr) # read path
+        self.assertEqual(len(self.main.rxes), 1)
+        self.assertEqual(self.main.rxCounter.value, 1)
+        self.assertEqual(loop.runDue(), 1) # woken by datagram
+        self.assertTrue(received.done())
+        self.assertEqual(received.result(), msg)
+
+        # idle driver sleeps until period then services again
+        handles = [handle for handle in loop.handles if not handle.cancelled]
+        self.assertEqual(len(handles), 2)
+        for handle in handles:
+            self.assertEqual(handle.when, loop.now + asyncing.Driver.Period)
+        self.assertEqual(loop.runDue(0.5), 0)
+        self.assertEqual(loop.runDue(0.5), 2)
+        self.assertEqual(self.main.store.stamp, loop.now - mainDriver.offset)
+
+        # receive with message already waiting resolves immediately
+        self.main.rxMsgs.append(msg)
+        self.assertEqual(mainDriver.receive().result(), msg)
+
+        # stale yard refuses datagram so stack reaps it
+        path = os.path.join(self.baseDirpath, 'cherry.stale.uxd')
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stale.bind(path)
+        stale.close() # socket file left without reader
+        yard = yarding.RemoteYard(stack=self.other, ha=path)
+        self.other.addRemote(yard)
+        sent = otherDriver.transmit(msg, duid=yard.uid)
+        self.assertEqual(loop.runDue(), 1)
+        self.assertTrue(sent.done())
+        self.assertNotIn(yard.uid, self.other.remotes)
+        self.assertEqual(self.other.stats['stale_transmit_yard'], 1)
+        self.assertEqual(self.other.txCounter.value, 1)
+
+        # blocked datagram waits for writable socket
+        fd = self.other.server.ss.fileno()
+        def busy(tx, ta):
+            raise socket.error(errno.EAGAIN, 'busy')
+        self.other.server.send = busy
+        sent = otherDriver.transmit(msg)
+        self.assertEqual(loop.runDue(), 1)
+        self.assertFalse(sent.done())
+        self.assertTrue(otherDriver.writing)
+        self.assertIn(fd, loop.writers)
+        del self.other.server.send
+        loop.writers[fd]() # socket writable
+        self.assertNotIn(fd, loop.writers)
+        self.assertEqual(loop.runDue(), 1)
+        self.assertTrue(sent.done())
+        self.assertEqual(len(self.other.txes), 0)
+
+        pending = mainDriver.receive()
+        mainDriver.close()
+        otherDriver.close()
+        self.assertTrue(pending.cancelled())
+        self.assertTrue(mainTransport.closed)
+        self.assertIs(mainDriver.transport, None)
+        self.assertIs(mainDriver.protocol.transport, None)
+        self.assertTrue(all(handle.cancelled for handle in loop.handles))
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testMessage',
+             'testFakeLoop', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testMessage')
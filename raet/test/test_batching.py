@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for batched datagram socket io
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+import os
+import socket
+import tempfile
+import shutil
+
+from ioflo.base import aiding
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting, batching
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Batched receive and transmit with udp and uxd sockets
+    '''
+
+    def setUp(self):
+        self.servers = []
+        self.dirpath = tempfile.mkdtemp(prefix="raet", suffix="batch", dir='/tmp')
+
+    def tearDown(self):
+        for server in self.servers:
+            server.close()
+        if os.path.exists(self.dirpath):
+            shutil.rmtree(self.dirpath)
+
+    def udpServer(self, port):
+        '''
+        Utility method to create and open udp server
+        '''
+        server = aiding.SocketUdpNb(ha=('127.0.0.1', port),
+                                    bufsize=raeting.UDP_MAX_PACKET_SIZE * 2)
+        self.assertTrue(server.reopen())
+        self.servers.append(server)
+        return server
+
+    def uxdServer(self, name):
+        '''
+        Utility method to create and open uxd server
+        '''
+        server = aiding.SocketUxdNb(ha=os.path.join(self.dirpath, "{0}.uxd".format(name)),
+                                    bufsize=raeting.UXD_MAX_PACKET_SIZE)
+        self.assertTrue(server.reopen())
+        self.servers.append(server)
+        return server
+
+    def receiveAll(self, receiver):
+        '''
+        Utility method to receive until no more
+        '''
+        received = []
+        while True:
+            batch = receiver.receive()
+            self.assertTrue(len(batch) <= receiver.count)
+            if not batch:
+                break
+            received.extend(batch)
+        return received
+
+    def testDecodeAddress(self):
+        '''
+        Test decode of raw socket addresses
+        '''
+        console.terse("{0}\n".format(self.testDecodeAddress.__doc__))
+        name = (batching.FAMILY_PACKER.pack(socket.AF_INET) +
+                batching.PORT_PACKER.pack(7530) +
+                socket.inet_aton('127.0.0.1') + '\x00' * 8)
+        self.assertEqual(batching.decodeAddress(name), ('127.0.0.1', 7530))
+        name = (batching.FAMILY_PACKER.pack(socket.AF_UNIX) + '/tmp/raet/me.uxd\x00')
+        self.assertEqual(batching.decodeAddress(name), '/tmp/raet/me.uxd')
+        self.assertIs(batching.decodeAddress(''), None)
+
+    def testReceiveUdp(self):
+        '''
+        Test batched receive on udp sockets
+        '''
+        console.terse("{0}\n".format(self.testReceiveUdp.__doc__))
+        alpha = self.udpServer(raeting.RAET_PORT)
+        beta = self.udpServer(raeting.RAET_TEST_PORT)
+
+        receiver = batching.Receiver(beta, count=4)
+        self.assertEqual(receiver.batched, batching.recvmmsg is not None)
+        self.assertEqual(receiver.receive(), [])
+
+        msgs = ["Message number {0}".format(i) * (i + 1) for i in range(10)]
+        for msg in msgs:
+            alpha.send(msg, beta.ha)
+
+        received = self.receiveAll(receiver)
+        self.assertEqual([rx for rx, ra in received], msgs)
+        for rx, ra in received:
+            self.assertEqual(ra, alpha.ha)
+
+        receiver.batched = False # fallback path
+        for msg in msgs:
+            alpha.send(msg, beta.ha)
+        received = self.receiveAll(receiver)
+        self.assertEqual(received, [(msg, alpha.ha) for msg in msgs])
+
+    def testReceiveUxd(self):
+        '''
+        Test batched receive on uxd sockets
+        '''
+        console.terse("{0}\n".format(self.testReceiveUxd.__doc__))
+        alpha = self.uxdServer('alpha')
+        beta = self.uxdServer('beta')
+
+        receiver = batching.Receiver(beta, count=3)
+        self.assertEqual(receiver.receive(), [])
+
+        msgs = ["Message number {0}".format(i) * 100 for i in range(7)]
+        for msg in msgs:
+            alpha.send(msg, beta.ha)
+
+        received = self.receiveAll(receiver)
+        self.assertEqual(received, [(msg, alpha.ha) for msg in msgs])
+
+    def testTransmitUdp(self):
+        '''
+        Test batched transmit on udp sockets
+        '''
+        console.terse("{0}\n".format(self.testTransmitUdp.__doc__))
+        alpha = self.udpServer(raeting.RAET_PORT)
+        beta = self.udpServer(raeting.RAET_TEST_PORT)
+        gamma = self.udpServer(raeting.RAET_TEST_PORT + 1)
+
+        transmitter = batching.Transmitter(alpha, count=4)
+        self.assertEqual(transmitter.batched, batching.sendmmsg is not None)
+        self.assertEqual(transmitter.send([]), 0)
+
+        txes = []
+        for i in range(6):
+            txes.append(("Beta message {0}".format(i), beta.ha))
+            txes.append(("Gamma message {0}".format(i), gamma.ha))
+
+        sent = 0
+        while sent < len(txes):
+            count = transmitter.send(txes[sent:])
+            self.assertEqual(count, min(4, len(txes) - sent))
+            sent += count
+
+        received = self.receiveAll(batching.Receiver(beta))
+        self.assertEqual(received, [(tx, alpha.ha) for tx, ta in txes if ta == beta.ha])
+        received = self.receiveAll(batching.Receiver(gamma))
+        self.assertEqual(received, [(tx, alpha.ha) for tx, ta in txes if ta == gamma.ha])
+
+        # address cache pruned before batch so headers never point at freed names
+        transmitter.Cache = 1
+        txes = [("Beta cached", beta.ha), ("Gamma cached", gamma.ha)] * 2
+        self.assertEqual(transmitter.send(txes), 4)
+        self.assertEqual(transmitter.send(txes), 4)
+        self.assertTrue(len(transmitter.addresses) <= transmitter.count)
+        received = self.receiveAll(batching.Receiver(beta))
+        self.assertEqual(received, [("Beta cached", alpha.ha)] * 4)
+        received = self.receiveAll(batching.Receiver(gamma))
+        self.assertEqual(received, [("Gamma cached", alpha.ha)] * 4)
+        transmitter.Cache = batching.Transmitter.Cache
+
+        # destination needing name resolution stops batch
+        txes = [("First", beta.ha), ("Second", ('localhost', beta.ha[1])), ("Third", beta.ha)]
+        self.assertEqual(transmitter.send(txes), 1)
+
+        transmitter.batched = False # fallback path
+        self.assertEqual(transmitter.send(txes), 3)
+        received = self.receiveAll(batching.Receiver(beta))
+        self.assertEqual([rx for rx, ra in received], ["First", "First", "Second", "Third"])
+
+    def testTransmitUxd(self):
+        '''
+        Test batched transmit on uxd sockets
+        '''
+        console.terse("{0}\n".format(self.testTransmitUxd.__doc__))
+        alpha = self.uxdServer('alpha')
+        beta = self.uxdServer('beta')
+
+        transmitter = batching.Transmitter(alpha, count=8)
+        txes = [("Message number {0}".format(i) * 100, beta.ha) for i in range(5)]
+        txes.append(("Lost", os.path.join(self.dirpath, "gone.uxd")))
+        txes.append(("Late", beta.ha))
+        self.assertEqual(transmitter.send(txes), 5) # stops at missing destination
+
+        received = self.receiveAll(batching.Receiver(beta))
+        self.assertEqual(received, [(tx, alpha.ha) for tx, ta in txes[:5]])
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testDecodeAddress',
+             'testReceiveUdp',
+             'testReceiveUxd',
+             'testTransmitUdp',
+             'testTransmitUxd', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testReceiveUdp')
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for packet body codecs
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+from ioflo.base.odicting import odict
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting, coding
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Registry of body codecs
+    '''
+
+    def setUp(self):
+        self.data = odict([('z', 1), ('a', "Hello"), ('m', odict([('y', 2), ('b', [1, 2])]))])
+
+    def tearDown(self):
+        pass
+
+    def testRegistry(self):
+        '''
+        Test fetch and register of codecs by body kind
+        '''
+        console.terse("{0}\n".format(self.testRegistry.__doc__))
+        for kind in (raeting.bodyKinds.nada, raeting.bodyKinds.raw,
+                     raeting.bodyKinds.json, raeting.bodyKinds.msgpack):
+            self.assertEqual(coding.fetch(kind).kind, kind)
+
+        self.assertRaises(raeting.PacketError, coding.fetch, raeting.bodyKinds.unknown)
+        self.assertRaises(raeting.PacketError, coding.fetch, 99)
+        self.assertRaises(ValueError, coding.register, coding.Codec())
+
+        codec = coding.JsonCodec(kind=99)
+        coding.register(codec)
+        try:
+            self.assertIs(coding.fetch(99), codec)
+        finally:
+            del coding.CODECS[99]
+
+    def testJson(self):
+        '''
+        Test json codec round trip as odict and plain dict
+        '''
+        console.terse("{0}\n".format(self.testJson.__doc__))
+        codec = coding.fetch(raeting.bodyKinds.json)
+        packed = codec.pack(self.data)
+        self.assertEqual(packed, '{"z":1,"a":"Hello","m":{"y":2,"b":[1,2]}}')
+
+        data = codec.unpack(packed)
+        self.assertIsInstance(data, odict)
+        self.assertIsInstance(data['m'], odict)
+        self.assertEqual(data.keys(), ['z', 'a', 'm'])
+        self.assertEqual(data, self.data)
+
+        data = codec.unpack(packed, plain=True)
+        self.assertIs(type(data), dict)
+        self.assertIs(type(data['m']), dict)
+        self.assertEqual(data, self.data)
+
+        self.assertEqual(codec.pack(odict()), '')
+        self.assertEqual(codec.unpack(''), odict())
+        self.assertRaises(raeting.PacketError, codec.unpack, '{"z":')
+        self.assertRaises(raeting.PacketError, codec.unpack, '[1,2]')
+
+    def testMsgpack(self):
+        '''
+        Test msgpack codec round trip as odict and plain dict
+        '''
+        console.terse("{0}\n".format(self.testMsgpack.__doc__))
+        if not coding.msgpack:
+            return
+        codec = coding.fetch(raeting.bodyKinds.msgpack)
+        packed = codec.pack(self.data)
+        self.assertEqual(packed, coding.msgpack.dumps(self.data))
+
+        data = codec.unpack(packed)
+        self.assertIsInstance(data, odict)
+        self.assertEqual(data.keys(), ['z', 'a', 'm'])
+        self.assertEqual(data, self.data)
+
+        data = codec.unpack(packed, plain=True)
+        self.assertIs(type(data), dict)
+        self.assertEqual(data, self.data)
+
+        self.assertRaises(raeting.PacketError, codec.unpack, coding.msgpack.dumps([1, 2]))
+        self.assertRaises(raeting.PacketError, codec.unpack, '\xc1')
+
+    def testRawNada(self):
+        '''
+        Test raw and nada codecs
+        '''
+        console.terse("{0}\n".format(self.testRawNada.__doc__))
+        codec = coding.fetch(raeting.bodyKinds.raw)
+        self.assertEqual(codec.pack("Hello"), "Hello")
+        self.assertEqual(codec.unpack("Hello"), "Hello")
+
+        codec = coding.fetch(raeting.bodyKinds.nada)
+        self.assertEqual(codec.pack(self.data), '')
+        self.assertEqual(codec.unpack('', plain=True), dict())
+
+        codec = coding.Codec(kind=99) # base is nada passthrough
+        coding.register(codec)
+        try:
+            self.assertEqual(coding.fetch(99).pack(self.data), '')
+            self.assertEqual(coding.fetch(99).unpack(''), odict())
+        finally:
+            del coding.CODECS[99]
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testRegistry',
+             'testJson',
+             'testMsgpack',
+             'testRawNada', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testJson')
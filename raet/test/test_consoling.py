@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for console logging facade
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import consoling
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class Formatted(object):
+    '''
+    Counts times formatted
+    '''
+    def __init__(self):
+        self.count = 0
+
+    def __format__(self, spec):
+        self.count += 1
+        return "formatted"
+
+class Recorder(object):
+    '''
+    Stands in for ioflo console recording messages written
+    '''
+    Wordage = console.Wordage
+
+    def __init__(self, verbosity):
+        self._verbosity = verbosity
+        self.msgs = []
+
+    def write(self, msg, verbosity=None):
+        self.msgs.append(msg)
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Deferred formatting and level guards
+    '''
+
+    def setUp(self):
+        self.recorder = Recorder(verbosity=console.Wordage.concise)
+        self.console = consoling.Console(self.recorder)
+
+    def tearDown(self):
+        pass
+
+    def testLazy(self):
+        '''
+        Test messages format only when console verbosity would write them
+        '''
+        console.terse("{0}\n".format(self.testLazy.__doc__))
+        self.assertIs(consoling.getConsole().Wordage, console.Wordage)
+        self.assertTrue(self.console.enabled(console.Wordage.concise))
+        self.assertFalse(self.console.enabled(console.Wordage.verbose))
+
+        item = Formatted()
+        self.console.verbose("dropped {0}\n", item)
+        self.console.profuse("dropped {0}\n", item)
+        self.assertEqual(item.count, 0)
+        self.console.concise("kept {0}\n", item)
+        self.console.terse("kept {0} {1}\n", item, 2)
+        self.assertEqual(item.count, 2)
+        self.console.write("braces {} kept\n") # no args so not formatted
+        self.console.write("dropped {0}\n", item, verbosity=console.Wordage.verbose)
+        self.assertEqual(item.count, 2)
+        self.assertEqual(self.recorder.msgs,
+                         ["kept formatted\n", "kept formatted 2\n", "braces {} kept\n"])
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testLazy', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testLazy')
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for crypto offload executor
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import nacling, executing
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Executor of batched crypto jobs
+    '''
+
+    def setUp(self):
+        self.executor = executing.Executor(workers=3)
+
+    def tearDown(self):
+        self.executor.close()
+
+    def testMap(self):
+        '''
+        Test results are in submission order inline and in pool
+        '''
+        console.terse("{0}\n".format(self.testMap.__doc__))
+        self.assertEqual(self.executor.workers, 3)
+        self.assertEqual(self.executor.map(abs, []), [])
+        self.assertEqual(self.executor.map(abs, [-1]), [1])
+        jobs = range(-100, 0)
+        self.assertEqual(self.executor.map(abs, jobs), [abs(job) for job in jobs])
+
+    def testSign(self):
+        '''
+        Test signing and verifying batch in pool
+        '''
+        console.terse("{0}\n".format(self.testSign.__doc__))
+        signer = nacling.Signer()
+        verfer = nacling.Verifier(signer.verhex)
+        msgs = [bytearray("Message number {0}".format(i) * 40) for i in range(20)]
+        signatures = self.executor.map(signer.signature, msgs)
+        self.assertEqual(signatures, [signer.signature(str(msg)) for msg in msgs])
+        results = self.executor.map(lambda job: verfer.verify(*job),
+                                    zip(signatures, msgs))
+        self.assertEqual(results, [True] * len(msgs))
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testMap',
+             'testSign', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testMap')
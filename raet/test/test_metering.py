@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for stack metrics
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+from ioflo.base.odicting import odict
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import raeting, metering
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Metrics and meter registry
+    '''
+
+    def setUp(self):
+        self.meter = metering.Meter(labels=odict([('stack', 'main')]))
+
+    def tearDown(self):
+        pass
+
+    def testMetrics(self):
+        '''
+        Test counter gauge and histogram values snapshot and reset
+        '''
+        console.terse("{0}\n".format(self.testMetrics.__doc__))
+        counter = self.meter.counter('rx', "Received.")
+        self.assertIs(self.meter.counter('rx'), counter)
+        counter.inc()
+        counter.inc(2)
+        self.assertEqual(counter.value, 3)
+
+        gauge = self.meter.gauge('depth')
+        gauge.set(5)
+        gauge.dec()
+        self.assertEqual(gauge.snapshot(), 4)
+        queue = [1, 2]
+        fetched = self.meter.gauge('queue', fetch=lambda: len(queue))
+        queue.append(3)
+        self.assertEqual(fetched.snapshot(), 3)
+
+        histogram = self.meter.histogram('seconds', bounds=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        snap = self.meter.snapshot()
+        self.assertEqual(snap.keys(), ['rx', 'depth', 'queue', 'seconds'])
+        self.assertEqual(snap['rx'], 3)
+        self.assertEqual(snap['seconds']['count'], 4)
+        self.assertAlmostEqual(snap['seconds']['sum'], 2.65)
+        self.assertEqual(snap['seconds']['buckets'], odict([(0.1, 2), (1.0, 3), (None, 4)]))
+
+        self.assertRaises(ValueError, self.meter.gauge, 'rx')
+
+        snap = self.meter.snapshot(reset=True)
+        self.assertEqual(snap['rx'], 3)
+        snap = self.meter.snapshot()
+        self.assertEqual(snap['rx'], 0)
+        self.assertEqual(snap['depth'], 0)
+        self.assertEqual(snap['queue'], 3)
+        self.assertEqual(snap['seconds']['count'], 0)
+
+    def testPrometheus(self):
+        '''
+        Test prometheus text export
+        '''
+        console.terse("{0}\n".format(self.testPrometheus.__doc__))
+        self.meter.counter('rx', "Received.").inc(2)
+        self.meter.histogram('seconds', bounds=(0.5, )).observe(0.25)
+        text = self.meter.export()
+        self.assertEqual(text,
+                '# HELP raet_rx_total Received.\n'
+                '# TYPE raet_rx_total counter\n'
+                'raet_rx_total{stack="main"} 2\n'
+                '# TYPE raet_seconds histogram\n'
+                'raet_seconds_bucket{stack="main",le="0.5"} 1\n'
+                'raet_seconds_bucket{stack="main",le="+Inf"} 1\n'
+                'raet_seconds_sum{stack="main"} 0.25\n'
+                'raet_seconds_count{stack="main"} 1\n')
+        self.assertEqual(self.meter.export(lambda meter: meter.metrics.keys()), ['rx', 'seconds'])
+
+        meter = metering.Meter(labels=odict([('stack', 'a"b\\c\nd')]))
+        meter.counter('tx_total', "Sent\\ over\nwire.").inc()
+        meter.gauge('depth').set(1)
+        self.assertEqual(metering.prometheus(meter, prefix=''),
+                '# HELP tx_total Sent\\\\ over\\nwire.\n'
+                '# TYPE tx_total counter\n'
+                'tx_total{stack="a\\"b\\\\c\\nd"} 1\n'
+                '# TYPE depth gauge\n'
+                'depth{stack="a\\"b\\\\c\\nd"} 1\n')
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testMetrics',
+             'testPrometheus', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testMetrics')
@@ -88,6 +88,18 @@ class BasicTestCase(unittest.TestCase):
         self.assertTrue(verified)
         console.terse("Verified by Pam = {0}\n".format(verified))
 
+        # signing leading bytes of buffer in place
+        buf = bytearray(msg + "trailing junk")
+        self.assertEqual(signerBob.signature(buf, size=len(msg)), signature)
+        self.assertEqual(signerBob.signature(bytearray(msg)), signature)
+
+        # verifying buffer in place and failures
+        self.assertTrue(verferPam.verify(signature, bytearray(msg)))
+        self.assertFalse(verferPam.verify(signature, msg + "!"))
+        self.assertFalse(verferPam.verify(signature, bytearray(msg + "!")))
+        self.assertFalse(verferPam.verify(signature[:32], msg))
+        self.assertFalse(nacling.Verifier().verify(signature, msg))
+
     def testEncrypt(self):
         '''
         Test encryption decryption with public private remote local key pairs
@@ -219,6 +231,42 @@ class BasicTestCase(unittest.TestCase):
         self.assertEqual(len(demsg), 50)
         self.assertEqual(demsg, enmsg)
 
+    def testBox(self):
+        '''
+        Test encryption decryption with precomputed shared key boxes
+        '''
+        console.terse("{0}\n".format(self.testBox.__doc__))
+
+        priverBob = nacling.Privateer()
+        pubberBob = nacling.Publican(priverBob.pubhex)
+        priverPam = nacling.Privateer()
+        pubberPam = nacling.Publican(priverPam.pubhex)
+
+        boxBob = priverBob.box(pubberPam.key)
+        self.assertIsInstance(boxBob, nacling.Box)
+        boxPam = priverPam.box(pubberBob.keyhex)
+        self.assertIsInstance(boxPam, nacling.Box)
+
+        enmsg = "Hello its me Bob, Hello its me Bob, Hello its me Bob, Hello its me Bob"
+
+        # encrypt with box decrypt with key
+        cipher, nonce = priverBob.encrypt(enmsg, boxBob)
+        self.assertEqual(len(nonce), 24)
+        demsg = priverPam.decrypt(cipher, nonce, pubberBob.key)
+        self.assertEqual(demsg, enmsg)
+
+        # encrypt with key decrypt with box
+        cipher, nonce = priverBob.encrypt(enmsg, pubberPam.keyraw)
+        demsg = priverPam.decrypt(cipher, nonce, boxPam)
+        self.assertEqual(demsg, enmsg)
+
+        # box reused for multiple messages
+        for i in range(3):
+            msg = "{0} {1}".format(enmsg, i)
+            cipher, nonce = priverBob.encrypt(msg, boxBob, enhex=True)
+            demsg = priverPam.decrypt(cipher, nonce, boxPam, dehex=True)
+            self.assertEqual(demsg, msg)
+
 class PartTestCase(unittest.TestCase):
     """
     Test encrytion of handshake parts
@@ -301,6 +349,7 @@ def runSome():
     names = []
     names.append('testSign')
     names.append('testEncrypt')
+    names.append('testBox')
     tests.extend(map(BasicTestCase, names))
 
     names = []
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+'''
+Tests for deadline scheduling
+
+'''
+# pylint: skip-file
+# pylint: disable=C0103
+import sys
+if sys.version_info < (2, 7):
+    import unittest2 as unittest
+else:
+    import unittest
+
+from ioflo.base.consoling import getConsole
+console = getConsole()
+
+from raet import scheduling
+
+def setUpModule():
+    console.reinit(verbosity=console.Wordage.concise)
+
+def tearDownModule():
+    pass
+
+class BasicTestCase(unittest.TestCase):
+    '''
+    Scheduler of keyed deadlines
+    '''
+
+    def setUp(self):
+        self.scheduler = scheduling.Scheduler()
+
+    def tearDown(self):
+        pass
+
+    def testSchedule(self):
+        '''
+        Test schedule, reschedule, cancel, and expire of keys
+        '''
+        console.terse("{0}\n".format(self.testSchedule.__doc__))
+        scheduler = self.scheduler
+        self.assertIs(scheduler.deadline, None)
+        self.assertEqual(scheduler.expired(10.0), [])
+
+        scheduler.schedule('a', 3.0)
+        scheduler.schedule('b', 1.0)
+        scheduler.schedule('c', 2.0)
+        scheduler.schedule('d', None)
+        self.assertEqual(len(scheduler), 3)
+        self.assertNotIn('d', scheduler)
+        self.assertEqual(scheduler.deadline, 1.0)
+
+        scheduler.schedule('b', 4.0) # later
+        scheduler.schedule('a', 0.5) # earlier
+        scheduler.cancel('c')
+        scheduler.cancel('e')
+        self.assertEqual(len(scheduler), 2)
+        self.assertEqual(scheduler.deadline, 0.5)
+
+        self.assertEqual(scheduler.expired(0.0), [])
+        self.assertEqual(scheduler.expired(3.0), ['a'])
+        self.assertNotIn('a', scheduler)
+        self.assertEqual(scheduler.deadline, 4.0)
+        self.assertEqual(scheduler.expired(4.0), ['b'])
+        self.assertEqual(len(scheduler), 0)
+        self.assertIs(scheduler.deadline, None)
+
+        scheduler.schedule('a', 1.0)
+        scheduler.schedule('b', 1.0)
+        scheduler.schedule('c', 1.0)
+        self.assertEqual(scheduler.expired(1.0), ['a', 'b', 'c'])
+
+        scheduler.schedule('a', 1.0)
+        scheduler.clear()
+        self.assertEqual(scheduler.expired(1.0), [])
+
+    def testCompact(self):
+        '''
+        Test heap of stale entries is compacted when rescheduling
+        '''
+        console.terse("{0}\n".format(self.testCompact.__doc__))
+        scheduler = self.scheduler
+        for i in range(1000):
+            scheduler.schedule('a', float(i))
+            scheduler.schedule('b', float(i) + 0.5)
+        self.assertEqual(len(scheduler), 2)
+        self.assertTrue(len(scheduler.heap) <= 2 * len(scheduler) + scheduler.Slack + 1)
+        self.assertEqual(scheduler.expired(1000.0), ['a', 'b'])
+
+def runOne(test):
+    '''
+    Unittest Runner
+    '''
+    test = BasicTestCase(test)
+    suite = unittest.TestSuite([test])
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runSome():
+    """ Unittest runner """
+    tests =  []
+    names = ['testSchedule',
+             'testCompact', ]
+    tests.extend(map(BasicTestCase, names))
+
+    suite = unittest.TestSuite(tests)
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+def runAll():
+    """ Unittest runner """
+    suite = unittest.TestSuite()
+    suite.addTest(unittest.TestLoader().loadTestsFromTestCase(BasicTestCase))
+
+    unittest.TextTestRunner(verbosity=2).run(suite)
+
+if __name__ == '__main__' and __package__ is None:
+
+    #console.reinit(verbosity=console.Wordage.concise)
+
+    runAll() #run all unittests
+
+    #runSome()#only run some
+
+    #runOne('testSchedule')